@@ -0,0 +1,174 @@
+"""
+Аналитика посещаемости для управленческих отчётов.
+
+Метрики считаются по всей истории appointments:
+  - trainer_attendance: по тренеру и году — проведённые, отменённые, неявки
+    (запланированные записи, время которых уже прошло), доля посещаемости и неявок;
+  - peak_hours: число неотменённых записей по дню недели и часу начала.
+
+Колонки читаются курсором пачками (fetchmany) в массивы NumPy и группируются
+через np.unique/np.bincount без цикла по строкам. Без NumPy используется построчный
+расчёт по моделям peewee (он же служит эталоном в benchmarks/bench_analytics.py).
+Запуск: python -m analytics [каталог] [--format csv|parquet]
+"""
+import argparse
+import csv
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from models import DB, Appointments
+
+try:
+    import numpy as np
+except ImportError:  # NumPy — необязательная зависимость
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pandas (с pyarrow) нужен только для Parquet
+    pd = None
+
+CHUNK_SIZE = 100_000
+
+# Коды статусов в колонке status_code
+PLANNED, DONE, CANCELLED = 0, 1, 2
+STATUS_CODES = {'Запланировано': PLANNED, 'Проведено': DONE, 'Отменено': CANCELLED}
+
+TRAINER_COLUMNS = ("trainer_id", "year", "bookings", "done", "cancelled", "no_show",
+                   "attendance_rate", "no_show_ratio")
+PEAK_COLUMNS = ("weekday", "hour", "bookings")
+
+COLUMNS_SQL = (
+    "SELECT COALESCE(trener_id, 0), appointment_date, "
+    "CASE status WHEN 'Проведено' THEN 1 WHEN 'Отменено' THEN 2 ELSE 0 END "
+    "FROM appointments WHERE appointment_date IS NOT NULL"
+)
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+def _trainer_row(trainer_id: int, year: int, bookings: int, done: int, cancelled: int, no_show: int) -> Dict[str, Any]:
+    attended = done + no_show
+    return {
+        "trainer_id": trainer_id or None,
+        "year": year,
+        "bookings": bookings,
+        "done": done,
+        "cancelled": cancelled,
+        "no_show": no_show,
+        "attendance_rate": _ratio(done, attended),
+        "no_show_ratio": _ratio(no_show, attended),
+    }
+
+def read_columns(db=DB, chunk_size: int = CHUNK_SIZE):
+    """Читает (trainer_id, appointment_date, status_code) пачками в массивы NumPy"""
+    cursor = db.execute_sql(COLUMNS_SQL)
+    trainers, dates, statuses = [], [], []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        t, d, s = zip(*rows)
+        trainers.append(np.array(t, dtype=np.int64))
+        # Строки 'ГГГГ-ММ-ДД ЧЧ:ММ:СС' разбираются NumPy целиком, без datetime на каждую строку
+        dates.append(np.array(d, dtype="datetime64[s]"))
+        statuses.append(np.array(s, dtype=np.int8))
+    if not trainers:
+        return (np.empty(0, np.int64), np.empty(0, "datetime64[s]"), np.empty(0, np.int8))
+    return np.concatenate(trainers), np.concatenate(dates), np.concatenate(statuses)
+
+def compute_metrics_vectorized(db=DB, as_of: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+    trainers, dates, statuses = read_columns(db)
+    now = np.datetime64(as_of or datetime.now(), "s")
+    days = dates.astype("datetime64[D]")
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    hours = ((dates - days).astype("timedelta64[h]")).astype(np.int64)
+    weekdays = (days.astype(np.int64) + 3) % 7  # 1970-01-01 — четверг; понедельник = 0
+
+    # Тренер и год
+    keys = trainers * 10000 + years
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    size = len(uniq)
+    bookings = np.bincount(inverse, minlength=size)
+    done = np.bincount(inverse, weights=(statuses == DONE), minlength=size).astype(np.int64)
+    cancelled = np.bincount(inverse, weights=(statuses == CANCELLED), minlength=size).astype(np.int64)
+    no_show = np.bincount(inverse, weights=((statuses == PLANNED) & (dates < now)), minlength=size).astype(np.int64)
+    trainer_attendance = [
+        _trainer_row(int(k // 10000), int(k % 10000), int(b), int(d), int(c), int(n))
+        for k, b, d, c, n in zip(uniq, bookings, done, cancelled, no_show)
+    ]
+
+    # День недели и час
+    active = statuses != CANCELLED
+    slots = np.bincount((weekdays * 24 + hours)[active], minlength=7 * 24)
+    peak_hours = [
+        {"weekday": int(i // 24), "hour": int(i % 24), "bookings": int(count)}
+        for i, count in enumerate(slots) if count
+    ]
+    return {"trainer_attendance": trainer_attendance, "peak_hours": peak_hours}
+
+def compute_metrics_rows(as_of: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Те же метрики построчно, перебором моделей Appointments"""
+    now = as_of or datetime.now()
+    per_trainer = defaultdict(lambda: [0, 0, 0, 0])
+    slots = defaultdict(int)
+    for appointment in Appointments.select().where(Appointments.appointment_date.is_null(False)):
+        when = appointment.appointment_date
+        if isinstance(when, str):
+            when = datetime.fromisoformat(when)
+        status = STATUS_CODES.get(appointment.status, PLANNED)
+        counts = per_trainer[(appointment.trener_id or 0, when.year)]
+        counts[0] += 1
+        if status == DONE:
+            counts[1] += 1
+        elif status == CANCELLED:
+            counts[2] += 1
+        elif when < now:
+            counts[3] += 1
+        if status != CANCELLED:
+            slots[(when.weekday(), when.hour)] += 1
+    return {
+        "trainer_attendance": [_trainer_row(t, y, *per_trainer[(t, y)]) for t, y in sorted(per_trainer)],
+        "peak_hours": [{"weekday": w, "hour": h, "bookings": slots[(w, h)]} for w, h in sorted(slots)],
+    }
+
+def compute_metrics(db=DB, as_of: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+    if np is not None:
+        return compute_metrics_vectorized(db, as_of)
+    return compute_metrics_rows(as_of)
+
+def export_metrics(metrics: Dict[str, List[Dict[str, Any]]], out_dir: str, fmt: str = "csv") -> List[str]:
+    """Записывает каждую таблицу метрик в out_dir/<таблица>.csv или .parquet"""
+    if fmt not in ("csv", "parquet"):
+        raise ValueError("Формат должен быть csv или parquet")
+    if fmt == "parquet" and pd is None:
+        raise RuntimeError("Для Parquet требуется pandas (и pyarrow)")
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {"trainer_attendance": TRAINER_COLUMNS, "peak_hours": PEAK_COLUMNS}
+    paths = []
+    for table, rows in metrics.items():
+        path = os.path.join(out_dir, f"{table}.{fmt}")
+        if fmt == "parquet":
+            pd.DataFrame(rows, columns=columns[table]).to_parquet(path, index=False)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=columns[table])
+                writer.writeheader()
+                writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка метрик посещаемости")
+    parser.add_argument("out_dir", nargs="?", default="analytics_export")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args()
+    with DB.connection_context():
+        metrics = compute_metrics()
+    for path in export_metrics(metrics, args.out_dir, args.format):
+        print(f"Записан файл {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,98 @@
-from flask import Flask
-from models import DB, Trainers, Appointments
+import time
+from flask import Flask, Response, request
+from models import DB, create_version_triggers
 from blueprints.trainers import trainers_bp
 from blueprints.appointments import appointments_bp
+from blueprints.reports import reports_bp
+from auth import reload_api_keys, require_api_key
+from cache import trainers_cache
+from utils import json_response
+from database.fitness_database import create_search_index
+from database.migrate import migrate
+from reports import create_report_triggers
+from changes import POLL_INTERVAL, changes_payload, parse_tables, parse_timeout, read_versions
+import write_behind
+import instrumentation
 
 app = Flask(__name__)
+# Профилирование подключается первым, чтобы учитывать время остальных before_request
+instrumentation.init_app(app)
 app.register_blueprint(trainers_bp)
 app.register_blueprint(appointments_bp)
+app.register_blueprint(reports_bp)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+@app.before_request
+def open_db_connection():
+    # Соединение берётся из пула при первом обращении к базе и держится до конца запроса:
+    # для чтения — из пула только для чтения, для POST/PUT/DELETE — соединение писателя
+    DB.route(request.method in READ_METHODS)
+
+@app.teardown_request
+def close_db_connection(exc):
+    # и возвращается в пул после ответа (для потоковых ответов — после выдачи последнего блока)
+    if not DB.is_closed():
+        DB.close()
+    DB.use_writer()
+
+@app.route("/db/pool", methods=["GET"])
+@require_api_key(read_only=True)
+def db_pool_stats():
+    stats = DB.pool_stats()
+    queue = write_behind.get_queue()
+    stats["write_behind"] = dict(queue.stats(), mode=write_behind.mode()) if queue is not None else {"mode": "off"}
+    return json_response(stats, status=200)
+
+@app.route("/metrics", methods=["GET"])
+@require_api_key(read_only=True)
+def prometheus_metrics():
+    queue = write_behind.get_queue()
+    body = instrumentation.render_metrics(DB.pool_stats(), {"trainers": trainers_cache.stats()},
+                                          queue.stats() if queue is not None else None)
+    return Response(body, status=200, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/cache/stats", methods=["GET"])
+@require_api_key(read_only=True)
+def cache_stats():
+    return json_response({"trainers": trainers_cache.stats()}, status=200)
+
+@app.route("/auth/reload", methods=["POST"])
+@require_api_key(read_only=False)
+def auth_reload():
+    count = reload_api_keys()
+    return json_response({"keys": count}, status=200)
+
+@app.route("/changes", methods=["GET"])
+@require_api_key(read_only=True)
+def wait_for_changes():
+    # Long-poll: в WSGI-режиме запрос занимает поток сервера на всё время ожидания
+    # (asgi.py обслуживает этот маршрут без потока), соединение с базой между опросами возвращается в пул
+    try:
+        tables = parse_tables(request.args.get("tables"))
+        timeout = parse_timeout(request.args.get("timeout"))
+        since = request.args.get("since")
+        deadline = time.monotonic() + timeout
+        while True:
+            payload = changes_payload(read_versions(), tables, since)
+            if since is None or payload["changed"] or time.monotonic() >= deadline:
+                return json_response(payload, status=200)
+            DB.close()
+            time.sleep(min(POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            DB.connect(reuse_if_open=True)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при ожидании изменений: {e}"}, status=500)
+
+def init_db():
+    # Таблицы и индексы создаются и приводятся к текущей схеме миграциями (database/migrate.py)
+    migrate()
+    with DB.connection_context():
+        create_version_triggers()
+        create_search_index(DB.connection())
+        create_report_triggers()
 
 if __name__ == "__main__":
-    DB.connect()
-    DB.create_tables([Trainers, Appointments], safe=True)
-    DB.close()
+    init_db()
     app.run(debug=True)
\ No newline at end of file
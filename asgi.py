@@ -0,0 +1,246 @@
+"""
+ASGI-режим API: те же маршруты, авторизация и JSON, что и у WSGI-приложения app.py.
+
+Обычные запросы выполняются Flask-приложением в пуле потоков (SQLite-вызовы остаются
+синхронными, но цикл событий не блокируется и число соединений ограничено размером пула).
+Long-poll GET /changes обслуживается в цикле событий без потока: ожидающие клиенты
+ждут asyncio.Event, а table_versions перечитывает одна фоновая задача, пока они есть.
+Запуск: uvicorn asgi:app (или любой ASGI-сервер)
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app import app as wsgi_app, init_db
+from auth import check_api_key
+from changes import POLL_INTERVAL, changes_payload, parse_tables, parse_timeout, read_versions
+from models import DB
+from utils import json_dumps, JSON_MIMETYPE
+
+ASGI_WORKERS = int(os.environ.get("BODY_FIT_ASGI_WORKERS", 16))
+# Сколько блоков потокового ответа может ждать отправки, прежде чем поток-генератор остановится
+STREAM_BUFFER = 8
+
+def _with_db(fn, *args):
+    """Чтение вне Flask-запроса: соединение из пула читателей на время вызова"""
+    with DB.read_only():
+        return fn(*args)
+
+def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # Тело уже прочитано целиком (в том числе при chunked-передаче)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+class AsgiApp:
+    def __init__(self, app, workers: int = ASGI_WORKERS, poll_interval: float = POLL_INTERVAL):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._versions: Dict[str, int] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._waiters = 0
+        self._poller: Optional[asyncio.Task] = None
+        self._poller_lock: Optional[asyncio.Lock] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["path"] == "/changes" and scope["method"] == "GET":
+                await self._long_poll(scope, send)
+            else:
+                await self._wsgi(scope, receive, send)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asgi")
+        return self.executor
+
+    async def _in_thread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self._in_thread(init_db)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ---- обычные маршруты: Flask в пуле потоков ----
+
+    async def _wsgi(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+        aborted = threading.Event()
+        environ = _environ(scope, bytes(body))
+        # Весь ответ, включая потоковые генераторы и teardown, выполняется в одном потоке:
+        # соединение peewee привязано к потоку
+        worker = loop.run_in_executor(self._executor(), self._run_wsgi, environ, queue, loop, aborted)
+        started = False
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == "start":
+                    status, headers = payload
+                    await send({"type": "http.response.start", "status": status, "headers": headers})
+                    started = True
+                elif kind == "body":
+                    await send({"type": "http.response.body", "body": payload, "more_body": True})
+                else:
+                    break
+            if started:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            # Клиент отключился или отправка упала: поток-генератор прекращает работу
+            aborted.set()
+        # Исключение из потока (если ответ так и не начался) поднимается здесь
+        await worker
+
+    def _run_wsgi(self, environ, queue: asyncio.Queue, loop, aborted: threading.Event) -> None:
+        def put(item) -> bool:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while not aborted.is_set():
+                try:
+                    future.result(timeout=1.0)
+                    return True
+                except FutureTimeout:
+                    continue
+            future.cancel()
+            return False
+
+        response: List[Tuple[int, list]] = []
+
+        def start_response(status, headers, exc_info=None):
+            code = int(status.split(" ", 1)[0])
+            response.append((code, [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]))
+            return lambda data: None
+
+        iterable = None
+        try:
+            iterable = self.app(environ, start_response)
+            sent_start = False
+            for chunk in iterable:
+                if not sent_start:
+                    if not put(("start", response[-1])):
+                        return
+                    sent_start = True
+                if chunk and not put(("body", chunk)):
+                    return
+            if not sent_start:
+                put(("start", response[-1]))
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+            put(("end", None))
+
+    # ---- long-poll /changes: без потока на клиента ----
+
+    async def _respond(self, send, status: int, data: Any) -> None:
+        body = json_dumps(data)
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", JSON_MIMETYPE.encode()), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _poll_versions(self) -> None:
+        # Одна задача на все ожидающие запросы: раз в poll_interval читает table_versions в потоке пула
+        try:
+            while self._waiters > 0:
+                versions = await self._in_thread(_with_db, read_versions)
+                if versions != self._versions:
+                    self._versions = versions
+                    changed, self._changed = self._changed, asyncio.Event()
+                    changed.set()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._poller = None
+
+    async def _long_poll(self, scope, send):
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+        def arg(name: str) -> Optional[str]:
+            return query.get(name, [None])[0]
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        api_key = headers.get("api_key") or arg("api_key")
+        error = await self._in_thread(_with_db, check_api_key, api_key, True)
+        if error:
+            return await self._respond(send, 403, {"error": error})
+        try:
+            tables = parse_tables(arg("tables"))
+            timeout = parse_timeout(arg("timeout"))
+        except ValueError as e:
+            return await self._respond(send, 400, {"error": str(e)})
+        since = arg("since")
+        if self._changed is None:
+            self._changed = asyncio.Event()
+            self._poller_lock = asyncio.Lock()
+        self._waiters += 1
+        try:
+            # Проверка и запуск под блокировкой: пока первый запрос читает версии,
+            # одновременно пришедшие ждут его, а не запускают свою задачу опроса
+            async with self._poller_lock:
+                if self._poller is None:
+                    self._versions = await self._in_thread(_with_db, read_versions)
+                    self._poller = asyncio.get_running_loop().create_task(self._poll_versions())
+            deadline = time.monotonic() + timeout
+            while True:
+                payload = changes_payload(self._versions, tables, since)
+                remaining = deadline - time.monotonic()
+                if since is None or payload["changed"] or remaining <= 0:
+                    break
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception as e:
+            return await self._respond(send, 500, {"error": f"Ошибка при ожидании изменений: {e}"})
+        finally:
+            self._waiters -= 1
+        await self._respond(send, 200, payload)
+
+app = AsgiApp(wsgi_app)
@@ -1,31 +1,220 @@
-# Пользователи с их API-ключами и ролями
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from instrumentation import timed
+
+# Пользователи по умолчанию: в исходном коде хранятся только SHA-256 хэши ключей
 USERS = [
-    {"username": "admin", "api_key": "admin_secret_key_123", "role": "admin"},
-    {"username": "user", "api_key": "user_readonly_key_456", "role": "user"},
+    {"username": "admin", "api_key_hash": "197447a92233aa73dc566106ee8af655328d1a45f48404d90dce26f502bb373f", "role": "admin"},
+    {"username": "user", "api_key_hash": "9a59bc1aeff553a46dca20dba2320aa929922e05b9c67df93dbc7666383e0342", "role": "user"},
 ]
 
+# Дополнительные ключи: JSON-файл со списком {"username", "role", "api_key_hash" | "api_key"}
+API_KEYS_FILE = os.environ.get("BODY_FIT_API_KEYS_FILE")
+# Как часто (в секундах) проверять, не изменились ли файл ключей и таблица api_keys
+API_KEYS_RECHECK_SECONDS = float(os.environ.get("BODY_FIT_API_KEYS_RECHECK", 5))
+
+def hash_api_key(api_key: str) -> str:
+    # Ключи - случайные строки высокой энтропии, поэтому достаточно быстрого SHA-256:
+    # медленная KDF сделала бы каждую проверку дорогой и не добавила бы стойкости
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+def _add_users(index: Dict[str, Dict[str, str]], users: List[Dict[str, Any]]) -> None:
+    for user in users:
+        key_hash = user.get("api_key_hash") or hash_api_key(user["api_key"])
+        index[key_hash] = {"username": user["username"], "role": user["role"]}
+
+def _read_keys_file(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def _keys_file_mtime() -> Optional[float]:
+    if not API_KEYS_FILE:
+        return None
+    try:
+        return os.path.getmtime(API_KEYS_FILE)
+    except OSError:
+        return None
+
+def _api_keys_version() -> Optional[int]:
+    from peewee import DatabaseError
+    from models import TableVersions
+    try:
+        versions = TableVersions.current(["api_keys"])
+    except DatabaseError:
+        return None
+    return versions[0][1] if versions else None
+
+def load_api_keys() -> Dict[str, Dict[str, str]]:
+    """Строит индекс хэш ключа -> пользователь из USERS, файла ключей и таблицы api_keys"""
+    from peewee import DatabaseError
+    from models import ApiKeys
+    index: Dict[str, Dict[str, str]] = {}
+    _add_users(index, USERS)
+    if API_KEYS_FILE and os.path.exists(API_KEYS_FILE):
+        _add_users(index, _read_keys_file(API_KEYS_FILE))
+    try:
+        rows = list(ApiKeys.select(ApiKeys.username, ApiKeys.key_hash.alias("api_key_hash"), ApiKeys.role).dicts())
+    except DatabaseError:
+        rows = []
+    _add_users(index, rows)
+    return index
+
+_KEY_INDEX: Optional[Dict[str, Dict[str, str]]] = None
+_KEY_SOURCES: tuple = (None, None)
+_KEY_CHECKED_AT = 0.0
+_KEY_LOCK = threading.Lock()
+
+def reload_api_keys() -> int:
+    """Перечитывает ключи без перезапуска приложения; возвращает их количество"""
+    global _KEY_INDEX, _KEY_SOURCES, _KEY_CHECKED_AT
+    with _KEY_LOCK:
+        sources = (_keys_file_mtime(), _api_keys_version())
+        # Индекс подменяется целиком, поэтому читатели без блокировки видят либо старый, либо новый
+        _KEY_INDEX = load_api_keys()
+        _KEY_SOURCES = sources
+        _KEY_CHECKED_AT = time.monotonic()
+        return len(_KEY_INDEX)
+
+def _key_index() -> Dict[str, Dict[str, str]]:
+    global _KEY_CHECKED_AT
+    if _KEY_INDEX is None:
+        reload_api_keys()
+    elif time.monotonic() - _KEY_CHECKED_AT > API_KEYS_RECHECK_SECONDS and _KEY_LOCK.acquire(blocking=False):
+        # Не чаще раза в API_KEYS_RECHECK_SECONDS: mtime файла и версия таблицы api_keys
+        try:
+            _KEY_CHECKED_AT = time.monotonic()
+            changed = (_keys_file_mtime(), _api_keys_version()) != _KEY_SOURCES
+        finally:
+            _KEY_LOCK.release()
+        if changed:
+            reload_api_keys()
+    return _KEY_INDEX
+
+def get_user(api_key: str) -> Optional[Dict[str, str]]:
+    """Один поиск в словаре по хэшу ключа, независимо от количества ключей"""
+    if not api_key:
+        return None
+    return _key_index().get(hash_api_key(api_key))
+
+def create_api_key(username: str, role: str = "user") -> str:
+    """Создаёт ключ в таблице api_keys и возвращает его; в базе хранится только хэш"""
+    from models import ApiKeys
+    api_key = secrets.token_urlsafe(32)
+    ApiKeys.create(username=username, key_hash=hash_api_key(api_key), role=role)
+    reload_api_keys()
+    return api_key
+
 def is_valid_api_key(api_key: str) -> bool:
-    return any(user["api_key"] == api_key for user in USERS)
+    return get_user(api_key) is not None
 
 def is_admin(api_key: str) -> bool:
-    return any(user["api_key"] == api_key and user["role"] == "admin" for user in USERS)
+    user = get_user(api_key)
+    return user is not None and user["role"] == "admin"
+
+@timed("auth")
+def check_api_key(api_key: Optional[str], read_only: bool = True) -> Optional[str]:
+    """Текст ошибки доступа (ответ 403) или None, если ключ подходит"""
+    if not api_key:
+        return "API-ключ не предоставлен"
+    user = get_user(api_key)
+    if user is None:
+        return "Неверный API-ключ"
+    if not read_only and user["role"] != "admin":
+        return "Отказано в доступе. Требуются права администратора"
+    return None
 
 def require_api_key(read_only: bool = True):
     from functools import wraps
-    from flask import request, Response
-    import json
+    from flask import request
+    from utils import json_response
 
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             # Пробуем получить ключ из заголовков или параметров
             api_key = request.headers.get("api_key") or request.args.get("api_key")
-            if not api_key:
-                return Response(json.dumps({"error": "API-ключ не предоставлен"}, ensure_ascii=False), status=403, mimetype="application/json; charset=utf-8")
-            if not is_valid_api_key(api_key):
-                return Response(json.dumps({"error": "Неверный API-ключ"}, ensure_ascii=False), status=403, mimetype="application/json; charset=utf-8")
-            if not read_only and not is_admin(api_key):
-                return Response(json.dumps({"error": "Отказано в доступе. Требуются права администратора"}, ensure_ascii=False), status=403, mimetype="application/json; charset=utf-8")
+            error = check_api_key(api_key, read_only)
+            if error:
+                return json_response({"error": error}, status=403)
             return fn(*args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def table_version(table: str) -> Optional[int]:
+    """Версия таблицы для ключа кэша: прочитанная conditional_get в этом запросе или текущая"""
+    from flask import g, has_app_context
+    from peewee import DatabaseError
+    from models import TableVersions
+
+    known = getattr(g, "table_versions", None) if has_app_context() else None
+    if known and table in known:
+        return known[table]
+    try:
+        rows = TableVersions.current([table])
+    except DatabaseError:
+        return None
+    return rows[0][1] if rows else None
+
+def conditional_get(*tables: str, vary: Optional[Callable[[], Any]] = None):
+    """
+    Условный GET: ETag и Last-Modified строятся по версиям таблиц (table_versions),
+    поэтому на If-None-Match / If-Modified-Since без изменений отвечаем 304,
+    не выполняя выборку строк и сериализацию.
+
+    vary() — то, от чего ответ зависит помимо таблиц и параметров запроса (например,
+    период по умолчанию от текущего времени); оно входит в ETag, а Last-Modified
+    для таких ответов не отдаётся: время изменения таблиц их свежесть не определяет.
+    """
+    from functools import wraps
+    from hashlib import sha1
+    from flask import g, request, Response
+    from datetime import datetime, timedelta, timezone
+    from peewee import DatabaseError
+    from models import TableVersions
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                versions = TableVersions.current(tables)
+            except DatabaseError:
+                # Таблица версий ещё не создана (init_db не выполнялся) - отвечаем без кэширования
+                return fn(*args, **kwargs)
+            if len(versions) != len(tables):
+                return fn(*args, **kwargs)
+            # Те же версии используют кэши ответов (table_version): тело и ETag не расходятся
+            g.table_versions = {name: version for name, version, _ in versions}
+            # Разные параметры запроса дают разные представления, поэтому они входят в ETag
+            query = sorted((k, v) for k, v in request.args.items(multi=True) if k != "api_key")
+            accept = request.headers.get("Accept", "")
+            extra = vary() if vary is not None else None
+            etag = sha1(repr((request.path, query, accept, versions, extra)).encode("utf-8")).hexdigest()
+            last_modified = max(v[2] for v in versions).replace(tzinfo=timezone.utc, microsecond=0)
+            # Last-Modified точен до секунды: пока секунда последней записи не прошла, в ней
+            # возможна ещё одна запись с тем же значением, и If-Modified-Since её бы не заметил.
+            # Поэтому до конца этой секунды Last-Modified не отдаётся и If-Modified-Since не учитывается
+            settled = vary is None and datetime.now(timezone.utc) >= last_modified + timedelta(seconds=1)
+
+            not_modified = False
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since and settled:
+                not_modified = last_modified <= request.if_modified_since
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = fn(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if settled:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+"""
+Сравнение построчного расчёта метрик посещаемости (перебор моделей Appointments)
+с колоночным чтением в NumPy и векторными группировками (analytics.compute_metrics_vectorized).
+
+База создаётся во временном файле, N записей (по умолчанию 1 000 000) за 2015–2025 годы.
+Запуск: python -m benchmarks.bench_analytics [количество_записей]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# База для models.DB задаётся до импорта моделей
+DB_DIR = tempfile.mkdtemp()
+os.environ["BODY_FIT_DB_PATH"] = os.path.join(DB_DIR, "analytics.db")
+
+from models import DB, Appointments, Trainers  # noqa: E402
+import analytics  # noqa: E402
+
+STATUSES = ("Запланировано", "Проведено", "Проведено", "Проведено", "Отменено")
+AS_OF = datetime(2024, 6, 1)
+
+def build(rows: int) -> None:
+    with DB.connection_context():
+        DB.create_tables([Trainers, Appointments])
+    conn = sqlite3.connect(os.environ["BODY_FIT_DB_PATH"])
+    conn.executemany("INSERT INTO trainers (last_name, first_name, middle_name, name_of_training_session, experience_years, created_at) "
+                     "VALUES (?, ?, ?, ?, 0, '2015-01-01 00:00:00')",
+                     [("Иванов", "Александр", f"Петрович{i}", "Йога") for i in range(30)])
+    rnd = random.Random(42)
+    conn.executemany(
+        "INSERT INTO appointments (last_name, first_name, phone, date, trener_id, name_of_training_session, status, appointment_date, created_at) "
+        "VALUES ('Смирнова', 'Анна', '+7(999)123-45-67', ?, ?, 'Йога', ?, ?, ?)",
+        ((d, rnd.randint(1, 30), rnd.choice(STATUSES), d, d)
+         for d in (f"{rnd.randint(2015, 2025)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} "
+                   f"{rnd.randint(7, 21):02d}:00:00" for _ in range(rows))))
+    conn.commit()
+    conn.close()
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    if analytics.np is None:
+        sys.exit("Для сравнения требуется NumPy")
+    build(rows)
+    with DB.connection_context():
+        vector_time, vector = timed(lambda: analytics.compute_metrics_vectorized(as_of=AS_OF))
+        rows_time, by_rows = timed(lambda: analytics.compute_metrics_rows(as_of=AS_OF))
+    print(f"Записей: {rows}")
+    print(f"Построчно (модели peewee):  {rows_time:8.2f} с")
+    print(f"NumPy (колонки + bincount): {vector_time:8.2f} с  (x{rows_time / vector_time:.1f})")
+    print(f"Результаты совпадают: {vector == by_rows}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Нагрузочное сравнение WSGI-приложения (app.py) и ASGI-режима (asgi.py).
+
+Оба режима получают одинаковое число рабочих потоков (модель потокового WSGI-сервера
+против asgi.AsgiApp с пулом того же размера). Одновременно работают:
+  - long-poll клиенты: GET /changes с таймаутом, изменений нет, поэтому каждый запрос ждёт до конца;
+  - обычные клиенты: GET /appointments?limit=50 в цикле; для них считаются RPS и перцентили задержки.
+Запросы подаются в процессе, без сети: измеряется именно занятость рабочих потоков.
+Запуск: python -m benchmarks.bench_asgi [секунд] [long_poll_клиентов]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# База для models.DB задаётся до импорта приложения
+os.environ["BODY_FIT_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_asgi.db")
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+from app import app as wsgi_app, init_db  # noqa: E402
+from asgi import AsgiApp  # noqa: E402
+from models import DB, Appointments, Trainers  # noqa: E402
+from changes import read_versions  # noqa: E402
+
+WORKERS = 8
+CLIENTS = 8
+LONG_POLL_TIMEOUT = 2
+HEADERS = {"api_key": "admin_secret_key_123"}
+SHORT_PATH, SHORT_QUERY = "/appointments", "limit=50"
+
+def seed() -> str:
+    init_db()
+    with DB.connection_context():
+        with DB.atomic():
+            Trainers.insert_many([{"first_name": "Александр", "last_name": "Иванов", "middle_name": f"Петрович{i}",
+                                   "name_of_training_session": "Йога"} for i in range(30)]).execute()
+            for start in range(0, 5000, 500):
+                Appointments.insert_many([{"first_name": "Анна", "last_name": "Смирнова", "phone": f"+7{n:010d}",
+                                           "name_of_training_session": "Йога", "trener": n % 30 + 1}
+                                          for n in range(start, start + 500)]).execute()
+        versions = read_versions()
+    return f"appointments:{versions['appointments']}"
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000 if ordered else 0.0
+
+def report(name: str, latencies, seconds: float, polls: int) -> None:
+    print(f"{name:5}: {len(latencies) / seconds:8.1f} запр/с  p50 {percentile(latencies, 0.50):7.1f} мс  "
+          f"p95 {percentile(latencies, 0.95):7.1f} мс  p99 {percentile(latencies, 0.99):7.1f} мс  long-poll ответов: {polls}")
+
+def run_wsgi(seconds: float, long_polls: int, token: str) -> None:
+    server = ThreadPoolExecutor(max_workers=WORKERS)
+
+    def handle(path, query):
+        environ = EnvironBuilder(path=path, query_string=query, headers=HEADERS).get_environ()
+        result = wsgi_app(environ, lambda status, headers, exc_info=None: None)
+        try:
+            return b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+    latencies, polls = [], [0]
+    deadline = time.monotonic() + seconds
+
+    def short_client():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            server.submit(handle, SHORT_PATH, SHORT_QUERY).result()
+            latencies.append(time.perf_counter() - started)
+
+    def poll_client():
+        while time.monotonic() < deadline:
+            server.submit(handle, "/changes", f"tables=appointments&timeout={LONG_POLL_TIMEOUT}&since={token}").result()
+            polls[0] += 1
+
+    threads = [threading.Thread(target=poll_client) for _ in range(long_polls)]
+    threads += [threading.Thread(target=short_client) for _ in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    report("WSGI", latencies, seconds, polls[0])
+
+def run_asgi(seconds: float, long_polls: int, token: str) -> None:
+    app = AsgiApp(wsgi_app, workers=WORKERS)
+    headers = [(k.encode(), v.encode()) for k, v in HEADERS.items()]
+
+    async def call(path, query):
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+                 "headers": headers, "http_version": "1.1", "server": ("localhost", 80)}
+        await app(scope, receive, send)
+
+    async def main():
+        latencies, polls = [], [0]
+        deadline = time.monotonic() + seconds
+
+        async def short_client():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                await call(SHORT_PATH, SHORT_QUERY)
+                latencies.append(time.perf_counter() - started)
+
+        async def poll_client():
+            while time.monotonic() < deadline:
+                await call("/changes", f"tables=appointments&timeout={LONG_POLL_TIMEOUT}&since={token}")
+                polls[0] += 1
+
+        await asyncio.gather(*[poll_client() for _ in range(long_polls)], *[short_client() for _ in range(CLIENTS)])
+        app.executor.shutdown()
+        report("ASGI", latencies, seconds, polls[0])
+
+    asyncio.run(main())
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    long_polls = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    token = seed()
+    print(f"Потоков: {WORKERS}, обычных клиентов: {CLIENTS}, long-poll клиентов: {long_polls}, {seconds:g} с")
+    run_wsgi(seconds, long_polls, token)
+    run_asgi(seconds, long_polls, token)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Время создания новой базы: выполнение complete_database.sql и init_db() против клонирования
+шаблона (database/bootstrap.py) копированием файла и через SQLite backup API.
+
+Каждый способ повторяется ROUNDS раз в новый файл во временном каталоге; выводится медиана.
+Время клонирования включает сверку контрольных сумм шаблона и исходников.
+Запуск: python -m benchmarks.bench_bootstrap [повторов]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from database import bootstrap
+
+ROUNDS = 20
+
+def median_ms(fn, rounds: int) -> float:
+    timings = []
+    for n in range(rounds):
+        started = time.perf_counter()
+        fn(n)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+    directory = tempfile.mkdtemp()
+    bootstrap.ensure_template()
+    scripts = median_ms(lambda n: bootstrap.build_from_scripts(os.path.join(directory, f"scripts{n}.db")), rounds)
+    copy = median_ms(lambda n: bootstrap.clone(os.path.join(directory, f"copy{n}.db")), rounds)
+    backup = median_ms(lambda n: bootstrap.clone(os.path.join(directory, f"backup{n}.db"), method="backup"), rounds)
+    print(f"SQL-скрипты + init_db: {scripts:8.1f} мс")
+    print(f"клон (copy):           {copy:8.1f} мс  (в {scripts / copy:.0f} раз быстрее)")
+    print(f"клон (backup):         {backup:8.1f} мс  (в {scripts / backup:.0f} раз быстрее)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Сравнение 1000 одиночных find_appointment_by_phone с одним вызовом find_appointments_by_phones.
+
+База создаётся во временном файле: 30 тренеров, N записей на тренировки
+(по умолчанию 200 000) и покрывающий индекс appointments(phone, appointment_date, trener_id).
+Запуск: python -m benchmarks.bench_phone_lookup [количество_записей]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from database.fitness_database import find_appointment_by_phone, find_appointments_by_phones
+
+SCHEMA = """
+CREATE TABLE trainers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    middle_name TEXT NOT NULL
+);
+CREATE TABLE appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    trener_id INTEGER,
+    name_of_training_session TEXT NOT NULL,
+    comment TEXT,
+    status TEXT DEFAULT 'Запланировано',
+    appointment_date DATETIME
+);
+CREATE INDEX idx_appointments_phone_date_trener ON appointments(phone, appointment_date, trener_id);
+"""
+
+LOOKUPS = 1000
+
+def phone(n: int) -> str:
+    return f"+7(9{n // 10000000 % 100:02d}){n // 10000 % 1000:03d}-{n // 100 % 100:02d}-{n % 100:02d}"
+
+def build(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO trainers (last_name, first_name, middle_name) VALUES (?, ?, ?)",
+                     [("Иванов", "Александр", f"Петрович{i}") for i in range(30)])
+    rnd = random.Random(42)
+    conn.executemany(
+        "INSERT INTO appointments (last_name, first_name, phone, trener_id, name_of_training_session, comment, appointment_date) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (("Смирнова", "Анна", phone(rnd.randrange(rows // 4)), rnd.randint(1, 30), "Йога",
+          "Регулярные занятия", f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 10:00:00")
+         for _ in range(rows)))
+    conn.commit()
+    conn.close()
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+def main(rows: int = 200000) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    build(path, rows)
+    conn = sqlite3.connect(path)
+    phones = [phone(n) for n in random.Random(7).sample(range(rows // 4), LOOKUPS)]
+
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT a.id, a.appointment_date, a.trener_id FROM appointments a "
+                        "WHERE a.phone IN (?, ?)", phones[:2]).fetchall()
+    print(f"Записей: {rows}, номеров для поиска: {LOOKUPS}")
+    print("План краткого запроса:", "; ".join(row[-1] for row in plan))
+
+    single = timed(lambda: [find_appointment_by_phone(conn, p) for p in phones])
+    batched = timed(lambda: find_appointments_by_phones(conn, phones))
+    brief = timed(lambda: find_appointments_by_phones(conn, phones, brief=True))
+    print(f"  {LOOKUPS} вызовов find_appointment_by_phone      {single:8.1f} мс")
+    print(f"  find_appointments_by_phones                 {batched:8.1f} мс  x{single / batched:.1f}")
+    print(f"  find_appointments_by_phones(brief=True)     {brief:8.1f} мс  x{single / brief:.1f}")
+    conn.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,120 @@
+"""
+Сравнение конкурентного чтения/записи SQLite для профилей PRAGMA из peewee_models.DB_PROFILES.
+
+Для каждого профиля создаётся временная база, после чего писатели вставляют записи
+(по одному коммиту на запись), а читатели параллельно выбирают последние записи.
+Запуск: python -m benchmarks.bench_pragmas [секунд_на_профиль]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from database.peewee_models import DB_PROFILES
+
+WRITERS = 2
+READERS = 6
+SEED_ROWS = 5000
+
+SCHEMA = """
+CREATE TABLE appointments (
+    id INTEGER PRIMARY KEY,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    name_of_training_session TEXT NOT NULL,
+    comment TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX appointments_created_at ON appointments(created_at);
+"""
+
+ROW = ("Смирнова", "Анна", "+7(999)123-45-67", "Йога для начинающих", "Первый раз на йоге")
+
+def connect(path: str, pragmas: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for key, value in pragmas.items():
+        conn.execute(f"PRAGMA {key} = {value}")
+    return conn
+
+def run_profile(name: str, pragmas: dict, duration: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = connect(path, pragmas)
+    conn.executescript(SCHEMA)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO appointments (last_name, first_name, phone, name_of_training_session, comment) VALUES (?, ?, ?, ?, ?)",
+        [ROW] * SEED_ROWS,
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+    stop = time.perf_counter() + duration
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "locked": 0, "read_max_ms": 0.0, "write_max_ms": 0.0}
+
+    def writer():
+        c = connect(path, pragmas)
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                c.execute(
+                    "INSERT INTO appointments (last_name, first_name, phone, name_of_training_session, comment) VALUES (?, ?, ?, ?, ?)",
+                    ROW,
+                )
+            except sqlite3.OperationalError:
+                with lock:
+                    stats["locked"] += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                stats["writes"] += 1
+                stats["write_max_ms"] = max(stats["write_max_ms"], elapsed)
+        c.close()
+
+    def reader():
+        c = connect(path, pragmas)
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                c.execute("SELECT * FROM appointments ORDER BY created_at DESC LIMIT 50").fetchall()
+            except sqlite3.OperationalError:
+                with lock:
+                    stats["locked"] += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                stats["reads"] += 1
+                stats["read_max_ms"] = max(stats["read_max_ms"], elapsed)
+        c.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "profile": name,
+        "writes_per_sec": round(stats["writes"] / duration),
+        "reads_per_sec": round(stats["reads"] / duration),
+        "locked_errors": stats["locked"],
+        "write_max_ms": round(stats["write_max_ms"], 1),
+        "read_max_ms": round(stats["read_max_ms"], 1),
+    }
+
+def main(duration: float = 3.0) -> None:
+    # "default" - исходная конфигурация: журнал отката и настройки SQLite по умолчанию
+    profiles = {"default": {"busy_timeout": 5000}}
+    profiles.update(DB_PROFILES)
+    print(f"Писателей: {WRITERS}, читателей: {READERS}, длительность: {duration} с на профиль")
+    print(f"{'профиль':<12}{'запись/с':>10}{'чтение/с':>10}{'locked':>8}{'max запись, мс':>16}{'max чтение, мс':>16}")
+    for name, pragmas in profiles.items():
+        r = run_profile(name, pragmas, duration)
+        print(f"{r['profile']:<12}{r['writes_per_sec']:>10}{r['reads_per_sec']:>10}{r['locked_errors']:>8}"
+              f"{r['write_max_ms']:>16}{r['read_max_ms']:>16}")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,72 @@
+"""
+Микробенчмарк сериализации списка записей на тренировки (10 000 строк).
+
+Сравниваются исходный путь (isoformat() в сериализаторе + json.dumps),
+utils.json_dumps на стандартном json и utils.json_dumps на orjson (если установлен).
+Запуск: python -m benchmarks.bench_serializers [количество_строк]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import utils
+from utils import appointment_row_to_dict
+
+def make_rows(count: int) -> list:
+    base = datetime(2024, 9, 1, 10, 0)
+    return [
+        {
+            "id": i,
+            "last_name": "Смирнова",
+            "first_name": "Анна",
+            "phone": "+7(999)123-45-67",
+            "date": base + timedelta(minutes=i),
+            "appointment_date": base + timedelta(hours=i),
+            "name_of_training_session": "Йога для начинающих",
+            "comment": "Первый раз на йоге, нужна помощь",
+            "created_at": base + timedelta(seconds=i),
+            "trainer_id": i % 30 + 1,
+            "trainer_first_name": "Александр",
+            "trainer_last_name": "Иванов",
+            "trainer_middle_name": "Петрович",
+        }
+        for i in range(count)
+    ]
+
+def legacy_row_to_dict(row: dict) -> dict:
+    # Сериализатор до появления json_response: даты переводятся в строки вручную
+    data = appointment_row_to_dict(row)
+    for key in ("date", "appointment_date", "created_at"):
+        data[key] = data[key].isoformat() if data[key] else None
+    return data
+
+def legacy(rows: list) -> bytes:
+    return json.dumps({"appointments": [legacy_row_to_dict(r) for r in rows]}, ensure_ascii=False).encode("utf-8")
+
+def with_stdlib(rows: list) -> bytes:
+    orjson, utils.orjson = utils.orjson, None
+    try:
+        return utils.json_dumps({"appointments": [appointment_row_to_dict(r) for r in rows]})
+    finally:
+        utils.orjson = orjson
+
+def with_orjson(rows: list) -> bytes:
+    return utils.json_dumps({"appointments": [appointment_row_to_dict(r) for r in rows]})
+
+def main(count: int = 10000) -> None:
+    rows = make_rows(count)
+    cases = [("исходный (isoformat + json.dumps)", legacy), ("json_dumps, стандартный json", with_stdlib)]
+    if utils.orjson is not None:
+        cases.append(("json_dumps, orjson", with_orjson))
+    else:
+        print("orjson не установлен - вариант с orjson пропущен")
+    print(f"Сериализация {count} записей, лучшее из 5 повторов:")
+    baseline = None
+    for name, fn in cases:
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=5))
+        baseline = baseline or best
+        print(f"  {name:<36} {best * 1000:8.1f} мс  x{baseline / best:.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,65 @@
+"""
+Пропускная способность POST /appointments без очереди и с отложенной записью (write_behind).
+
+Профиль базы 'safe' (synchronous=FULL): каждый коммит — fsync, поэтому именно число коммитов
+ограничивает скорость записи. Сколько коммитов приходится на запись, показывает выигрыш
+на диске с медленным fsync, даже если здесь fsync дешёв и всё упирается в обработку запроса. Несколько потоков-клиентов заданное время создают записи;
+в режиме off каждый запрос коммитит сам, в режиме commit запрос ждёт общего коммита пачки.
+Запуск: python -m benchmarks.bench_write_behind [секунд] [клиентов]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# База и профиль для models.DB задаются до импорта приложения
+os.environ["BODY_FIT_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_write_behind.db")
+os.environ.setdefault("BODY_FIT_DB_PROFILE", "safe")
+
+import write_behind  # noqa: E402
+from app import app, init_db  # noqa: E402
+
+HEADERS = {"api_key": "admin_secret_key_123"}
+
+def run(mode: str, seconds: float, clients: int) -> None:
+    queue = write_behind.configure(mode)
+    created, errors = [0], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(n: int):
+        http = app.test_client()
+        i = 0
+        while time.monotonic() < deadline:
+            i += 1
+            response = http.post("/appointments", headers=HEADERS, json={
+                "first_name": "Анна", "last_name": "Смирнова", "phone": f"+7{n:03d}{i:07d}",
+                "name_of_training_session": "Йога"})
+            with lock:
+                if response.status_code == 201:
+                    created[0] += 1
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Без очереди каждая запись — отдельный коммит (и fsync)
+    commits = queue.stats()["batches"] if queue is not None else created[0]
+    print(f"{mode:7}: {created[0] / seconds:8.1f} записей/с  коммитов на запись: {commits / max(created[0], 1):.3f}  "
+          f"ошибок: {errors[0]}")
+    write_behind.configure("off")
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    init_db()
+    print(f"Профиль базы: {os.environ['BODY_FIT_DB_PROFILE']}, клиентов: {clients}, {seconds:g} с")
+    for mode in ("off", "commit"):
+        run(mode, seconds, clients)
+
+if __name__ == "__main__":
+    main()
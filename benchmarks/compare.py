@@ -0,0 +1,80 @@
+"""
+Сравнение двух результатов benchmarks/run.py: было (base) и стало (head).
+
+Для микробенчмарков сравнивается медиана времени вызова, для маршрутов — p95 и запросы в секунду.
+Изменение хуже порога (по умолчанию 10%) считается регрессией; при хотя бы одной регрессии
+скрипт завершается с кодом 1, так что его можно ставить в CI после прогона на обоих коммитах.
+Появление ошибок у маршрута, где их не было, тоже регрессия. Сравнение файлов с разным
+размером базы или seed бессмысленно — об этом выводится предупреждение.
+Запуск: python -m benchmarks.compare base.json head.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+THRESHOLD = 0.10
+
+# (раздел, метрика, True — если больше значит лучше)
+METRICS = [
+    ("micro", "median_us", False),
+    ("load", "p95_ms", False),
+    ("load", "rps", True),
+]
+
+Row = Tuple[str, str, float, float, float, bool]
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = THRESHOLD) -> Tuple[List[Row], List[str]]:
+    """Строки (имя, метрика, было, стало, изменение, регрессия) и список регрессий ошибок"""
+    rows: List[Row] = []
+    error_regressions: List[str] = []
+    for section, metric, higher_is_better in METRICS:
+        for name, old in base.get(section, {}).items():
+            new = head.get(section, {}).get(name)
+            if new is None or metric not in old or metric not in new:
+                continue
+            before, after = old[metric], new[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            regression = -change > threshold if higher_is_better else change > threshold
+            rows.append((name, metric, before, after, change, regression))
+    for name, old in base.get("load", {}).items():
+        new = head.get("load", {}).get(name, {})
+        if not old.get("errors") and new.get("errors"):
+            error_regressions.append(f"{name}: ошибок {new['errors']} ({new.get('statuses')})")
+    return rows, error_regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение двух результатов бенчмарков")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="допустимое ухудшение, доля")
+    parser.add_argument("--all", action="store_true", help="показывать и метрики без регрессии")
+    args = parser.parse_args()
+    base, head = _load(args.base), _load(args.head)
+    base_meta, head_meta = base.get("meta", {}), head.get("meta", {})
+    for key in ("scale", "seed"):
+        if base_meta.get(key) != head_meta.get(key):
+            print(f"Внимание: {key} различается ({base_meta.get(key)} и {head_meta.get(key)})")
+    print(f"было:  {base_meta.get('commit')}  стало: {head_meta.get('commit')}")
+
+    rows, error_regressions = compare(base, head, args.threshold)
+    regressions = 0
+    for name, metric, before, after, change, regression in rows:
+        regressions += regression
+        if regression or args.all:
+            mark = "РЕГРЕССИЯ" if regression else ""
+            print(f"{name:48} {metric:10} {before:12.2f} -> {after:12.2f}  {change:+8.1%}  {mark}")
+    for line in error_regressions:
+        print(f"{line}  РЕГРЕССИЯ")
+    regressions += len(error_regressions)
+    print(f"Сравнено метрик: {len(rows)}, регрессий: {regressions} (порог {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
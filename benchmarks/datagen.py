@@ -0,0 +1,286 @@
+"""
+Синтетические данные для бенчмарков: тренеры, тренировки, клиенты, записи и связующие таблицы.
+
+Масштаб задаётся числом записей на тренировки (10k, 1m, 10m или любое число), остальные
+таблицы растут пропорционально. Генерация детерминирована (random.Random(seed)), статусы
+считаются относительно фиксированной даты REFERENCE_DATE, поэтому одни и те же масштаб и seed
+дают одинаковую базу на любой машине и в любой день.
+
+Основные таблицы создаются операторами CREATE TABLE из sql_scripts/complete_database.sql
+(эту схему ожидает database/fitness_database.py), остальные таблицы и индексы — моделями
+peewee, как делает init_db. Связи с тренировками заполняются в appointments_workouts и
+trainers_workouts из скрипта; таблицы связей моделей peewee остаются пустыми, как на новой
+установке (в них только места групповых занятий).
+Строки вставляются пачками через sqlite3.executemany в пустые таблицы, а уже потом
+init_db создаёт триггеры версий, полнотекстовый индекс и агрегаты отчётов — так же, как при
+первом запуске приложения на существующей базе.
+Готовая база кэшируется в BODY_FIT_BENCH_DATA (по умолчанию во временном каталоге).
+Запуск: python -m benchmarks.datagen 10k|1m|10m|<число> [--seed 42] [--out файл.db]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple, Union
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SEED = 42
+DATA_DIR = os.environ.get("BODY_FIT_BENCH_DATA", os.path.join(tempfile.gettempdir(), "body_fit_bench"))
+CHUNK_SIZE = 100_000
+
+# Записи распределены по двум годам; всё, что раньше REFERENCE_DATE, считается прошедшим
+START_DATE = datetime(2025, 1, 1)
+REFERENCE_DATE = datetime(2026, 1, 1)
+DAYS = 730
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов",
+              "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов",
+              "Егоров", "Павлов", "Козлов", "Степанов"]
+FIRST_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+               "Кирилл", "Михаил", "Анна", "Мария", "Елена", "Ольга", "Наталья"]
+MIDDLE_NAMES = ["Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", "Игоревич",
+                "Петрович", "Иванович", "Николаевич", "Владимирович", "Олегович", "Юрьевич",
+                "Викторович", "Павлович", "Евгеньевич"]
+SESSIONS = ["Йога", "Пилатес", "Кроссфит", "Стретчинг", "Бодибилдинг", "Кардио", "Бокс", "Танцы",
+            "Плавание", "Аэробика"]
+LEVELS = ["Начинающий", "Средний", "Продвинутый"]
+MEMBERSHIPS = ["Разовый", "Месячный", "Годовой"]
+# Половина записей без комментария; остальные — из небольшого словаря (для поиска по подстроке и FTS)
+COMMENTS = [None] * 8 + ["Первое занятие", "Нужна помощь инструктора", "Йога для спины",
+                         "Принести коврик", "После травмы колена", "Хочу в утреннюю группу",
+                         "Подготовка к соревнованиям", "Йога и дыхательные практики"]
+
+def row_counts(appointments: int) -> Dict[str, int]:
+    """Число строк каждой таблицы для заданного числа записей"""
+    trainers = min(len(LAST_NAMES) * len(FIRST_NAMES) * len(MIDDLE_NAMES), max(30, appointments // 2000))
+    return {
+        "trainers": trainers,
+        "workouts": max(len(SESSIONS), min(500, appointments // 20_000)),
+        "clients": max(100, appointments // 10),
+        "trainers_workouts": trainers * 3,
+        "appointments": appointments,
+        "appointments_workouts": appointments,
+    }
+
+def resolve_scale(scale: Union[str, int]) -> int:
+    if isinstance(scale, int):
+        return scale
+    if scale in SCALES:
+        return SCALES[scale]
+    try:
+        return int(scale)
+    except ValueError:
+        raise ValueError(f"Масштаб должен быть одним из {', '.join(SCALES)} или числом записей")
+
+def _phone(n: int) -> str:
+    d = f"{9_000_000_000 + n:010d}"
+    return f"+7({d[0:3]}){d[3:6]}-{d[6:8]}-{d[8:10]}"
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def _trainer_name(i: int) -> Tuple[str, str, str]:
+    # Все ФИО различны: кэш имён fitness_database ищет тренера по полному ФИО
+    return (LAST_NAMES[i % len(LAST_NAMES)],
+            FIRST_NAMES[(i // len(LAST_NAMES)) % len(FIRST_NAMES)],
+            MIDDLE_NAMES[(i // (len(LAST_NAMES) * len(FIRST_NAMES))) % len(MIDDLE_NAMES)])
+
+def _client_name(c: int) -> Tuple[str, str]:
+    # Фамилия и имя клиента выводятся из номера: записи не хранят список всех клиентов
+    return LAST_NAMES[c % len(LAST_NAMES)], FIRST_NAMES[(c // len(LAST_NAMES)) % len(FIRST_NAMES)]
+
+def _workout_name(i: int) -> str:
+    base = SESSIONS[i % len(SESSIONS)]
+    return base if i < len(SESSIONS) else f"{base} {i // len(SESSIONS) + 1}"
+
+def _chunks(rows: Iterator[tuple], size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class _Generator:
+    def __init__(self, appointments: int, seed: int):
+        self.rnd = random.Random(seed)
+        self.counts = row_counts(appointments)
+        self.created = _timestamp(START_DATE)
+        self.trainers = [_trainer_name(i) for i in range(self.counts["trainers"])]
+        # У каждого тренера три тренировки; запись идёт на одну из них
+        workouts = self.counts["workouts"]
+        self.trainer_workouts = [sorted({(t * 7 + k * 13) % workouts + 1 for k in range(3)})
+                                 for t in range(self.counts["trainers"])]
+        self.workout_trainer = {}
+        for t, ids in enumerate(self.trainer_workouts):
+            for w in ids:
+                self.workout_trainer.setdefault(w, t)
+
+    def trainers_rows(self) -> Iterator[tuple]:
+        rnd = self.rnd
+        for i, (last, first, middle) in enumerate(self.trainers):
+            yield (i + 1, last, first, middle, SESSIONS[i % len(SESSIONS)], _phone(900_000_000 + i),
+                   f"trainer{i + 1}@fitness.ru", f"{SESSIONS[i % len(SESSIONS)]} и ОФП", rnd.randint(1, 20),
+                   self.created)
+
+    def workouts_rows(self) -> Iterator[tuple]:
+        rnd = self.rnd
+        for w in range(1, self.counts["workouts"] + 1):
+            last, first, middle = self.trainers[self.workout_trainer.get(w, 0)]
+            yield (w, _workout_name(w - 1), last, first, middle, f"Занятие «{_workout_name(w - 1)}»",
+                   rnd.choice((45, 60, 90)), rnd.choice((1, 8, 10, 15, 20)), rnd.choice(LEVELS), self.created)
+
+    def clients_rows(self) -> Iterator[tuple]:
+        rnd = self.rnd
+        for c in range(1, self.counts["clients"] + 1):
+            yield (c, *_client_name(c), rnd.choice(MIDDLE_NAMES), _phone(c),
+                   rnd.choice(SESSIONS), None, None, rnd.choice(MEMBERSHIPS), self.created)
+
+    def trainers_workouts_rows(self) -> Iterator[tuple]:
+        for t, ids in enumerate(self.trainer_workouts):
+            for w in ids:
+                yield (t + 1, w)
+
+    def appointments_rows(self) -> Iterator[tuple]:
+        rnd = self.rnd
+        trainers = self.counts["trainers"]
+        clients = self.counts["clients"]
+        for a in range(1, self.counts["appointments"] + 1):
+            c = rnd.randint(1, clients)
+            t = rnd.randrange(trainers)
+            w = rnd.choice(self.trainer_workouts[t])
+            when = START_DATE + timedelta(days=rnd.randrange(DAYS), hours=rnd.randint(7, 21),
+                                          minutes=rnd.choice((0, 30)))
+            booked = when - timedelta(days=rnd.randint(1, 30))
+            roll = rnd.random()
+            if when < REFERENCE_DATE:
+                status = "Проведено" if roll < 0.7 else ("Отменено" if roll < 0.85 else "Запланировано")
+            else:
+                status = "Отменено" if roll < 0.1 else "Запланировано"
+            yield (a, *_client_name(c), _phone(c),
+                   _timestamp(booked), t + 1, _workout_name(w - 1), rnd.choice(COMMENTS), status,
+                   _timestamp(when), _timestamp(booked), w)
+
+INSERTS = {
+    "trainers": "INSERT INTO trainers (id, last_name, first_name, middle_name, name_of_training_session, phone, "
+                "email, specialization, experience_years, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "workouts": "INSERT INTO workouts (id, name_of_training_session, last_name, first_name, middle_name, "
+                "description, duration_minutes, max_participants, difficulty_level, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "clients": "INSERT INTO clients (id, last_name, first_name, middle_name, phone, name_of_training_session, "
+               "email, birth_date, membership_type, registration_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "trainers_workouts": "INSERT INTO trainers_workouts (trener_id, workout_id) VALUES (?, ?)",
+    "appointments": "INSERT INTO appointments (id, last_name, first_name, phone, date, trener_id, "
+                    "name_of_training_session, comment, status, appointment_date, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "appointments_workouts": "INSERT INTO appointments_workouts (appointment_id, workout_id) VALUES (?, ?)",
+}
+
+SQL_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "sql_scripts", "complete_database.sql")
+
+def script_tables(path: str = SQL_SCRIPT) -> List[str]:
+    """Операторы CREATE TABLE из SQL-скрипта (без удаления таблиц, данных и индексов)"""
+    statements, buffer = [], ""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.lstrip().startswith("--"):
+                continue
+            buffer += line
+            if sqlite3.complete_statement(buffer):
+                statement, buffer = buffer.strip(), ""
+                if statement.upper().startswith("CREATE TABLE"):
+                    statements.append(statement)
+    return statements
+
+def _load(path: str, gen: _Generator) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -256000")
+        for table in ("trainers", "workouts", "clients", "trainers_workouts"):
+            with conn:
+                conn.executemany(INSERTS[table], getattr(gen, f"{table}_rows")())
+        for chunk in _chunks(gen.appointments_rows()):
+            with conn:
+                conn.executemany(INSERTS["appointments"], (row[:-1] for row in chunk))
+                conn.executemany(INSERTS["appointments_workouts"], ((row[0], row[-1]) for row in chunk))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+def generate(path: str, scale: Union[str, int] = "10k", seed: int = DEFAULT_SEED) -> Dict[str, int]:
+    """Создаёт базу path (перезаписывая существующую) и возвращает число строк по таблицам.
+
+    models.DB после вызова указывает на path.
+    """
+    from app import init_db
+    from models import DB, MODELS
+
+    appointments = resolve_scale(scale)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    try:
+        for statement in script_tables():
+            conn.execute(statement)
+    finally:
+        conn.close()
+    DB.init(path)
+    try:
+        with DB.connection_context():
+            # Существующие таблицы пропускаются, но индексы моделей создаются
+            DB.create_tables(MODELS, safe=True)
+        gen = _Generator(appointments, seed)
+        _load(path, gen)
+        # Триггеры, FTS-индекс и агрегаты — по уже загруженным строкам
+        init_db()
+    finally:
+        DB.writer.close_all()
+        DB.reader.close_all()
+    return gen.counts
+
+def dataset(scale: Union[str, int] = "10k", seed: int = DEFAULT_SEED) -> str:
+    """Путь к кэшированной эталонной базе (создаётся при первом обращении). Её нельзя изменять"""
+    appointments = resolve_scale(scale)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"body_fit_{appointments}_seed{seed}.db")
+    if not os.path.exists(path):
+        # Сначала во временный файл: прерванная генерация не оставит неполную базу в кэше
+        partial = path + ".partial"
+        generate(partial, appointments, seed)
+        os.replace(partial, path)
+    return path
+
+def working_copy(scale: Union[str, int] = "10k", seed: int = DEFAULT_SEED, directory: str = None) -> str:
+    """Копия эталонной базы для прогона, который пишет в базу"""
+    source = dataset(scale, seed)
+    target = os.path.join(directory or tempfile.mkdtemp(), os.path.basename(source))
+    shutil.copyfile(source, target)
+    return target
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Генерация синтетической базы для бенчмарков")
+    parser.add_argument("scale", nargs="?", default="10k", help=f"{', '.join(SCALES)} или число записей")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="файл базы (по умолчанию — кэш в BODY_FIT_BENCH_DATA)")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.out:
+        counts = generate(args.out, args.scale, args.seed)
+        path = args.out
+    else:
+        path = dataset(args.scale, args.seed)
+        counts = row_counts(resolve_scale(args.scale))
+    for table, count in counts.items():
+        print(f"{table:22} {count:>12,}")
+    print(f"База {path} готова за {time.perf_counter() - started:.1f} с")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Нагрузочный прогон всех маршрутов blueprint'ов в процессе, без сети (Flask test client).
+
+Для каждого маршрута есть сценарий, строящий запрос по синтетической базе (benchmarks/datagen.py).
+Сценарий выполняют CLIENTS потоков в течение заданного времени; считаются пропускная
+способность, перцентили задержки p50/p95/p99 и ответы с неожиданным статусом. Маршрут
+без сценария попадает в отчёт как пропущенный, чтобы новые маршруты не выпадали из замеров.
+Создающие сценарии идут первыми: удаление и отмена работают с созданными ими записями,
+а не с данными эталонной базы. Прогон изменяет базу, поэтому идёт на рабочей копии.
+Запуск: python -m benchmarks.load [10k|1m|10m] [--duration 2] [--clients 4] [--json файл]
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import datagen
+
+HEADERS = {"api_key": "admin_secret_key_123"}
+CLIENTS = 4
+DURATION = 2.0
+# Новые записи создаются после данных эталонной базы; у тренера записи идут через BOOKING_STEP
+# (тренировки длятся до 90 минут), а сдвиг на номер тренера в минутах делает начало каждой
+# записи уникальным, чтобы не заполнять места одного слота тренировки: ответов 409 не бывает
+BOOKING_START = datagen.START_DATE + timedelta(days=datagen.DAYS + 1)
+BOOKING_STEP = timedelta(hours=2)
+
+Request = Tuple[str, str, Optional[Any]]
+
+class Context:
+    """Состояние прогона, общее для потоков: размеры базы и созданные сценариями записи"""
+
+    def __init__(self, counts: Dict[str, int]):
+        self.counts = counts
+        self.bookings = itertools.count()
+        self.lock = threading.Lock()
+        self.created: Dict[str, List[int]] = {"appointments": [], "trainers": []}
+        self.cancellable: List[int] = []
+
+    def add(self, kind: str, object_id: int) -> None:
+        with self.lock:
+            self.created[kind].append(object_id)
+            if kind == "appointments":
+                self.cancellable.append(object_id)
+
+    def take(self, kind: str) -> Optional[int]:
+        with self.lock:
+            items = self.cancellable if kind == "cancel" else self.created[kind]
+            return items.pop() if items else None
+
+def _appointment(ctx: Context, rnd: random.Random) -> Dict[str, Any]:
+    n = next(ctx.bookings)
+    trainers = ctx.counts["trainers"]
+    client = rnd.randint(1, ctx.counts["clients"])
+    last, first = datagen._client_name(client)
+    return {
+        "first_name": first,
+        "last_name": last,
+        "phone": datagen._phone(client),
+        "name_of_training_session": datagen.SESSIONS[n % len(datagen.SESSIONS)],
+        "trainer_id": n % trainers + 1,
+        "appointment_date": (BOOKING_START + BOOKING_STEP * (n // trainers)
+                             + timedelta(minutes=n % trainers)).isoformat(),
+        "comment": "Нагрузочный тест",
+    }
+
+def _trainer(n: int) -> Dict[str, Any]:
+    return {"first_name": "Нагрузка", "last_name": f"Тестов{n}", "middle_name": "Тестович",
+            "name_of_training_session": "Йога"}
+
+def _day(rnd: random.Random) -> datetime:
+    return datagen.START_DATE + timedelta(days=rnd.randrange(datagen.DAYS))
+
+def _period(rnd: random.Random, path: str, days: int, fmt: str) -> Request:
+    start = _day(rnd)
+    return "GET", f"{path}?from={start:{fmt}}&to={start + timedelta(days=days):{fmt}}", None
+
+def _random_id(ctx: Context, table: str, rnd: random.Random) -> int:
+    return rnd.randint(1, ctx.counts[table])
+
+# Сценарии: эндпоинт Flask -> функция (контекст, генератор) -> (метод, URL, JSON) или None, если делать нечего
+SCENARIOS: Dict[str, Callable[[Context, random.Random], Optional[Request]]] = {
+    "trainers.create_trainer": lambda ctx, rnd: ("POST", "/trainers", _trainer(next(ctx.bookings))),
+    "trainers.bulk_create_trainers": lambda ctx, rnd: (
+        "POST", "/trainers/bulk", {"trainers": [_trainer(next(ctx.bookings)) for _ in range(50)]}),
+    "appointments.create_appointment": lambda ctx, rnd: ("POST", "/appointments", _appointment(ctx, rnd)),
+    "appointments.bulk_create_appointments": lambda ctx, rnd: (
+        "POST", "/appointments/bulk",
+        {"appointments": [dict(_appointment(ctx, rnd), trainer_id=None) for _ in range(50)]}),
+    "trainers.get_trainers": lambda ctx, rnd: ("GET", "/trainers?limit=50", None),
+    "trainers.get_trainer": lambda ctx, rnd: ("GET", f"/trainers/{_random_id(ctx, 'trainers', rnd)}", None),
+    "trainers.get_trainer_availability": lambda ctx, rnd: _period(
+        rnd, f"/trainers/{_random_id(ctx, 'trainers', rnd)}/availability", 7, "%Y-%m-%dT%H:%M:%S"),
+    "appointments.get_appointments": lambda ctx, rnd: ("GET", "/appointments?limit=50", None),
+    "appointments.get_appointment": lambda ctx, rnd: (
+        "GET", f"/appointments/{_random_id(ctx, 'appointments', rnd)}", None),
+    "appointments.get_appointments_by_trainer": lambda ctx, rnd: (
+        "GET", f"/appointments/trainers/{_random_id(ctx, 'trainers', rnd)}?limit=50", None),
+    "appointments.search_appointments_by_text": lambda ctx, rnd: (
+        "GET", f"/appointments/search?q={rnd.choice(['йога', 'травм колен', 'коврик', 'инструктор'])}", None),
+    "appointments.get_capacity": lambda ctx, rnd: (
+        "GET", f"/appointments/capacity?from={_day(rnd):%Y-%m-%d}T00:00:00", None),
+    "reports.get_trainer_daily": lambda ctx, rnd: _period(rnd, "/reports/trainers/daily", 30, "%Y-%m-%d"),
+    "reports.get_workout_popularity": lambda ctx, rnd: ("GET", "/reports/workouts?limit=20", None),
+    "reports.get_status_breakdown": lambda ctx, rnd: ("GET", "/reports/statuses", None),
+    "trainers.update_trainer": lambda ctx, rnd: (
+        "PUT", f"/trainers/{_random_id(ctx, 'trainers', rnd)}",
+        dict(_trainer(next(ctx.bookings)), phone=datagen._phone(rnd.randint(1, 10 ** 6)))),
+    "appointments.update_appointment": lambda ctx, rnd: (
+        "PUT", f"/appointments/{_random_id(ctx, 'appointments', rnd)}",
+        {"first_name": "Анна", "last_name": "Смирнова", "phone": datagen._phone(rnd.randint(1, 10 ** 6)),
+         "name_of_training_session": "Йога", "comment": "Изменено нагрузочным тестом"}),
+    "appointments.cancel_appointment": lambda ctx, rnd: _consume(ctx, "cancel", "POST", "/appointments/{}/cancel"),
+    "appointments.delete_appointment": lambda ctx, rnd: _consume(ctx, "appointments", "DELETE", "/appointments/{}"),
+    "trainers.delete_trainer": lambda ctx, rnd: _consume(ctx, "trainers", "DELETE", "/trainers/{}"),
+    "reports.rebuild": lambda ctx, rnd: ("POST", "/reports/rebuild", None),
+}
+
+# Маршруты, которые сознательно не нагружаются
+SKIPPED = {
+    "appointments.get_queued_appointment": "требует включённой очереди отложенной записи (write_behind)",
+}
+
+def _consume(ctx: Context, kind: str, method: str, template: str) -> Optional[Request]:
+    object_id = ctx.take(kind)
+    return None if object_id is None else (method, template.format(object_id), None)
+
+def _remember(ctx: Context, endpoint: str, body: Any) -> None:
+    # Созданные записи и тренеры потом отменяются и удаляются соответствующими сценариями
+    if endpoint == "appointments.create_appointment" and isinstance(body, dict) and "id" in body:
+        ctx.add("appointments", body["id"])
+    elif endpoint == "trainers.create_trainer" and isinstance(body, dict) and "id" in body:
+        ctx.add("trainers", body["id"])
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+def run_scenario(app, endpoint: str, ctx: Context, duration: float, clients: int, seed: int) -> Dict[str, Any]:
+    scenario = SCENARIOS[endpoint]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(n: int) -> None:
+        http = app.test_client()
+        rnd = random.Random(f"{seed}:{endpoint}:{n}")
+        local, codes = [], {}
+        while time.monotonic() < deadline:
+            request = scenario(ctx, rnd)
+            if request is None:
+                break
+            method, url, body = request
+            started = time.perf_counter()
+            response = http.open(url, method=method, headers=HEADERS, json=body)
+            local.append(time.perf_counter() - started)
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+            if response.status_code in (200, 201):
+                _remember(ctx, endpoint, response.get_json(silent=True))
+        with lock:
+            latencies.extend(local)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+def route_name(app, endpoint: str) -> str:
+    for rule in app.url_map.iter_rules(endpoint):
+        methods = sorted(rule.methods - {"HEAD", "OPTIONS"})
+        return f"{' '.join(methods)} {rule.rule}"
+    return endpoint
+
+def run(path: str, duration: float = DURATION, clients: int = CLIENTS, only: Optional[List[str]] = None,
+        seed: int = datagen.DEFAULT_SEED, log: Callable[[str], None] = print) -> Dict[str, Dict[str, Any]]:
+    """Прогон по базе path (она изменяется); ключи результата — 'МЕТОД /маршрут'"""
+    from app import app
+    from models import DB, Appointments, Clients, Trainers
+
+    DB.init(path)
+    with DB.connection_context():
+        counts = {"trainers": Trainers.select().count(), "clients": Clients.select().count(),
+                  "appointments": Appointments.select().count()}
+    ctx = Context(counts)
+    endpoints = [rule.endpoint for rule in app.url_map.iter_rules() if "." in rule.endpoint
+                 and not rule.endpoint.startswith("static")]
+    results: Dict[str, Dict[str, Any]] = {}
+    # Порядок сценариев: создание, чтение, изменение, отмена и удаление созданного
+    for endpoint in list(SCENARIOS) + sorted(set(endpoints) - set(SCENARIOS)):
+        if only and endpoint not in only:
+            continue
+        name = route_name(app, endpoint)
+        if endpoint not in SCENARIOS:
+            reason = SKIPPED.get(endpoint, "нет сценария")
+            results[name] = {"skipped": reason}
+            log(f"{name:48} пропущен: {reason}")
+            continue
+        r = results[name] = run_scenario(app, endpoint, ctx, duration, clients, seed)
+        log(f"{name:48} {r['rps']:8.1f} запр/с  p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  "
+            f"p99 {r['p99_ms']:8.2f} мс  ошибок {r['errors']}")
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон маршрутов API")
+    parser.add_argument("scale", nargs="?", default="10k")
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--duration", type=float, default=DURATION, help="секунд на маршрут")
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--only", help="эндпоинты через запятую, например appointments.get_appointments")
+    parser.add_argument("--json", help="записать результаты в файл")
+    args = parser.parse_args()
+    path = datagen.working_copy(args.scale, args.seed)
+    results = run(path, args.duration, args.clients, args.only.split(",") if args.only else None, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
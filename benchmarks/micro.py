@@ -0,0 +1,143 @@
+"""
+Микробенчмарки слоя данных и сериализаторов на синтетической базе (benchmarks/datagen.py).
+
+Каждая функция замеряется через timeit: число вызовов подбирается autorange (не меньше 0,2 с
+на повтор), затем выполняется REPEAT повторов; в результат попадают минимум, медиана, среднее
+и разброс времени одного вызова. Аргументы (телефоны, имена) берутся по кругу из заранее
+выбранного детерминированного списка, чтобы не измерять одну и ту же закэшированную страницу.
+create_appointment пишет в базу, поэтому прогон идёт на рабочей копии эталонной базы.
+Запуск: python -m benchmarks.micro [10k|1m|10m] [--only имя,...] [--json файл]
+Те же замеры через pytest-benchmark (сравнение прогонов, --benchmark-autosave и т. п.):
+python -m pytest tests/test_micro_benchmarks.py --benchmark-only
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import random
+import sqlite3
+import statistics
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import datagen
+
+REPEAT = 5
+# Сколько различных аргументов перебирается по кругу
+ARGUMENTS = 1000
+
+def measure(fn: Callable[[], Any], repeat: int = REPEAT) -> Dict[str, Any]:
+    """Время одного вызова fn: number подбирается timeit.autorange, затем repeat повторов"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [total / number for total in timer.repeat(repeat, number)]
+    median = statistics.median(per_call)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.fmean(per_call) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(per_call) * 1e6, 3) if repeat > 1 else 0.0,
+        "ops_per_sec": round(1 / median, 1) if median else None,
+    }
+
+def _cycle(values: List[Any]) -> Callable[[], Any]:
+    return itertools.cycle(values).__next__
+
+def _sqlite_cases(conn: sqlite3.Connection, rnd: random.Random) -> Dict[str, Callable[[], Any]]:
+    from database.fitness_database import (create_appointment, find_appointment_by_comment,
+                                           find_appointment_by_phone, find_appointments_by_phones,
+                                           search_appointments)
+
+    clients = conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+    phones = [datagen._phone(rnd.randint(1, clients)) for _ in range(ARGUMENTS)]
+    next_phone = _cycle(phones)
+    batches = [phones[i:i + 100] for i in range(0, len(phones), 100)]
+    next_batch = _cycle(batches)
+    trainers = [" ".join(row) for row in conn.execute(
+        "SELECT last_name, first_name, middle_name FROM trainers ORDER BY id LIMIT ?", (ARGUMENTS,))]
+    workouts = [row[0] for row in conn.execute("SELECT name_of_training_session FROM workouts ORDER BY id")]
+    bookings = [(f"{last} {first}", phone, rnd.choice(trainers), [rnd.choice(workouts)])
+                for (last, first), phone in zip((datagen._client_name(rnd.randint(1, clients))
+                                                 for _ in range(ARGUMENTS)), phones)]
+    next_booking = _cycle(bookings)
+
+    def create():
+        client, phone, trainer, workout_list = next_booking()
+        # create_appointment печатает ID созданной записи
+        with contextlib.redirect_stdout(io.StringIO()):
+            appointment_id = create_appointment(conn, client, phone, trainer, workout_list, "Бенчмарк")
+        if appointment_id < 0:
+            raise RuntimeError("create_appointment вернула ошибку")
+
+    return {
+        "find_appointment_by_phone": lambda: find_appointment_by_phone(conn, next_phone()),
+        "find_appointments_by_phones_100": lambda: find_appointments_by_phones(conn, next_batch()),
+        "find_appointment_by_comment": lambda: find_appointment_by_comment(conn, "травмы колена"),
+        "search_appointments_fts": lambda: search_appointments(conn, "травм колен"),
+        "create_appointment": create,
+    }
+
+def _serializer_cases() -> Dict[str, Callable[[], Any]]:
+    from models import Appointments, Trainers
+    from utils import (appointment_row_to_dict, appointments_to_dict, json_dumps, select_appointments,
+                       select_trainers, trainer_row_to_dict, trainers_to_dict)
+
+    appointments = list(Appointments.select(Appointments, Trainers)
+                        .join(Trainers, on=(Appointments.trener == Trainers.id))
+                        .order_by(Appointments.id).limit(50))
+    trainer = Trainers.select().order_by(Trainers.id).get()
+    appointment_rows = list(select_appointments().order_by(Appointments.id).limit(50).dicts())
+    trainer_rows = list(select_trainers().order_by(Trainers.id).limit(50).dicts())
+    page = {"appointments": [appointment_row_to_dict(row) for row in appointment_rows], "next_cursor": None}
+    return {
+        "appointments_to_dict": lambda: appointments_to_dict(appointments[0]),
+        "appointments_to_dict_x50": lambda: [appointments_to_dict(a) for a in appointments],
+        "trainers_to_dict": lambda: trainers_to_dict(trainer),
+        "appointment_row_to_dict_x50": lambda: [appointment_row_to_dict(row) for row in appointment_rows],
+        "trainer_row_to_dict_x50": lambda: [trainer_row_to_dict(row) for row in trainer_rows],
+        "json_dumps_page_50": lambda: json_dumps(page),
+    }
+
+def run(path: str, only: Optional[List[str]] = None, seed: int = datagen.DEFAULT_SEED,
+        log: Callable[[str], None] = print) -> Dict[str, Dict[str, Any]]:
+    """Замеры на базе path (она изменяется: create_appointment добавляет записи)"""
+    from database.fitness_database import connect
+    from models import DB
+
+    rnd = random.Random(seed)
+    results = {}
+    DB.init(path)
+    # connect() сохраняет кэш имён create_appointment между вызовами
+    conn = connect(path)
+    try:
+        with DB.connection_context():
+            cases = {**_sqlite_cases(conn, rnd), **_serializer_cases()}
+            for name, fn in cases.items():
+                if only and name not in only:
+                    continue
+                results[name] = measure(fn)
+                r = results[name]
+                log(f"{name:34} median {r['median_us']:12.1f} мкс  min {r['min_us']:12.1f} мкс  "
+                    f"{r['ops_per_sec'] or 0:10.1f} оп/с")
+    finally:
+        conn.close()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарки слоя данных и сериализаторов")
+    parser.add_argument("scale", nargs="?", default="10k")
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--only", help="имена замеров через запятую")
+    parser.add_argument("--json", help="записать результаты в файл")
+    args = parser.parse_args()
+    path = datagen.working_copy(args.scale, args.seed)
+    results = run(path, args.only.split(",") if args.only else None, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Полный прогон: микробенчмарки (benchmarks/micro.py) и нагрузка на маршруты (benchmarks/load.py)
+на синтетической базе заданного размера; результат — один JSON с описанием окружения.
+
+Каждая часть получает свою рабочую копию эталонной базы, поэтому записи микробенчмарков
+не влияют на нагрузочный прогон. В meta попадают коммит git (и есть ли незакоммиченные
+изменения), версии Python и SQLite, размер, seed и время запуска — этого достаточно,
+чтобы сравнить два файла через benchmarks/compare.py.
+Запуск: python -m benchmarks.run [10k|1m|10m] [--out файл] [--duration сек] [--skip-micro|--skip-load]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from benchmarks import datagen, load, micro
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment(scale: str, seed: int) -> Dict[str, Any]:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "scale": scale,
+        "rows": datagen.row_counts(datagen.resolve_scale(scale)),
+        "seed": seed,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def run(scale: str = "10k", seed: int = datagen.DEFAULT_SEED, duration: float = load.DURATION,
+        clients: int = load.CLIENTS, micro_enabled: bool = True, load_enabled: bool = True) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"meta": environment(scale, seed)}
+    if micro_enabled:
+        print(f"== Микробенчмарки ({scale})")
+        results["micro"] = micro.run(datagen.working_copy(scale, seed), seed=seed)
+    if load_enabled:
+        print(f"== Нагрузка на маршруты ({scale}, {clients} клиентов, {duration} с на маршрут)")
+        results["load"] = load.run(datagen.working_copy(scale, seed), duration, clients, seed=seed)
+        results["meta"].update(duration=duration, clients=clients)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарки и нагрузочный прогон с записью в JSON")
+    parser.add_argument("scale", nargs="?", default="10k")
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--duration", type=float, default=load.DURATION, help="секунд на маршрут")
+    parser.add_argument("--clients", type=int, default=load.CLIENTS)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--out", help="файл результата (по умолчанию benchmarks/results/<коммит>-<размер>.json)")
+    args = parser.parse_args()
+    results = run(args.scale, args.seed, args.duration, args.clients,
+                  not args.skip_micro, not args.skip_load)
+    out = args.out
+    if out is None:
+        commit = (results["meta"]["commit"] or "nogit")[:10]
+        suffix = "-dirty" if results["meta"]["dirty"] else ""
+        out = os.path.join(RESULTS_DIR, f"{commit}{suffix}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,116 +1,368 @@
-from flask import Blueprint, request, Response
-from models import Appointments, Trainers
-from utils import appointments_to_dict, validate_appointments_data
-from auth import require_api_key
-import json
+from datetime import datetime, timedelta
+from flask import Blueprint, request, Response, stream_with_context
+from models import DB, Appointments, Trainers
+from utils import (
+    APPOINTMENT_COLUMNS,
+    JSON_MIMETYPE,
+    KeysetStream,
+    appointment_row_to_dict,
+    appointments_to_dict,
+    json_array_stream,
+    json_response,
+    keyset_paginate,
+    keyset_query,
+    ndjson_stream,
+    parse_fields,
+    parse_limit,
+    select_appointments,
+    validate_appointments_data,
+)
+from auth import conditional_get, require_api_key
+from database.bulk_load import load_appointments
+from database.fitness_database import query_appointments_fts
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial
+from typing import Tuple
+from scheduling import booking_transaction, parse_datetime, schedule_index
+import capacity
+import write_behind
+
+# Допустимые значения sort_by для GET /appointments
+SORT_FIELDS = ("id", "last_name", "first_name", "phone", "date", "appointment_date", "created_at")
 
 appointments_bp = Blueprint("appointments", __name__, url_prefix="/appointments")
 
+def _appointment_date(data):
+    """Разбирает appointment_date из запроса; ValueError при некорректном формате"""
+    value = data.get("appointment_date")
+    if value in (None, ""):
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError("Дата должна быть в формате ISO 8601 (ГГГГ-ММ-ДД ЧЧ:ММ:СС)")
+    return parsed
+
+def _slot_conflict(trainer, appointment_date, session_name, exclude_id=None, group=False):
+    """Ответ 409, если время уже занято у тренера; вызывается внутри booking_transaction"""
+    if trainer is None or appointment_date is None:
+        return None
+    conflicts = schedule_index.booking_conflicts(trainer.id, appointment_date, session_name,
+                                                 exclude_id=exclude_id, group=group)
+    if not conflicts:
+        return None
+    return json_response({
+        "error": "У тренера уже есть запись на это время",
+        "conflicts": [{"appointment_id": i, "start": s, "end": e} for s, e, i, _ in conflicts],
+    }, status=409)
+
+def _class_full(workout, slot_start):
+    return json_response({
+        "error": "На тренировку нет свободных мест",
+        "workout_id": workout.id,
+        "slot_start": slot_start,
+        "waitlist": "Повторите запрос с \"waitlist\": true, чтобы встать в лист ожидания",
+    }, status=409)
+
+def _book_appointment(data, trainer, appointment_date):
+    """Проверка расписания и вместимости и создание записи; вызывается внутри транзакции записи"""
+    workout = capacity.find_workout(data["name_of_training_session"]) if appointment_date else None
+    conflict = _slot_conflict(trainer, appointment_date, data["name_of_training_session"],
+                              group=workout is not None)
+    if conflict:
+        return conflict
+    if workout is not None and not capacity.reserve_seat(workout, appointment_date):
+        if not data.get("waitlist"):
+            return _class_full(workout, appointment_date)
+        entry, position = capacity.join_waitlist(workout, appointment_date, data,
+                                                 trainer.id if trainer else None)
+        return json_response({"waitlist_id": entry.id, "position": position,
+                              "workout_id": workout.id, "slot_start": appointment_date}, status=202)
+    a = Appointments.create(
+        first_name=data["first_name"],
+        last_name=data["last_name"],
+        phone=data["phone"],
+        name_of_training_session=data["name_of_training_session"],
+        trener=trainer,
+        comment=data.get("comment"),
+        appointment_date=appointment_date,
+    )
+    schedule_index.record(a.id, trainer.id if trainer else None, a.appointment_date,
+                          a.name_of_training_session, a.status)
+    if workout is not None:
+        capacity.link_seat(a.id, workout.id)
+    return json_response(appointments_to_dict(a), status=201)
+
 @appointments_bp.route("", methods=["GET"])
 @require_api_key(read_only=True)
+@conditional_get("appointments", "trainers")
 def get_appointments():
     try:
         sort_by = request.args.get("sort_by", "created_at")
         direction = request.args.get("direction", "asc")
-        valid = {"id", "last_name", "first_name", "phone", "date", "appointment_date", "created_at"}
-        if sort_by not in valid:
+        if sort_by not in SORT_FIELDS:
             sort_by = "created_at"
+        fields = parse_fields(request.args.get("fields"), APPOINTMENT_COLUMNS)
+        limit = parse_limit(request.args.get("limit"))
         field = getattr(Appointments, sort_by)
-        query = Appointments.select().order_by(field.desc() if direction == "desc" else field)
-        data = {"appointments": [appointments_to_dict(a) for a in query]}
-        return Response(json.dumps(data, ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+        query = select_appointments(fields, extra=(Appointments.id, field))
+        ndjson = request.accept_mimetypes.best == "application/x-ndjson"
+        if ndjson or request.args.get("stream") == "1":
+            # Потоковая выгрузка: строки читаются курсором без кэширования
+            # и кодируются по одной, память не растёт с размером таблицы
+            query = keyset_query(query, field, Appointments.id, direction, request.args.get("cursor"))
+            if limit is not None:
+                query = query.limit(limit + 1)
+            rows = KeysetStream(query.iterator(), field, Appointments.id, limit)
+            serialize = partial(appointment_row_to_dict, fields=fields)
+            if ndjson:
+                return Response(stream_with_context(ndjson_stream(rows, serialize)), status=200, mimetype="application/x-ndjson; charset=utf-8")
+            return Response(stream_with_context(json_array_stream("appointments", rows, serialize)), status=200, mimetype=JSON_MIMETYPE)
+        rows, next_cursor = keyset_paginate(query, field, Appointments.id, direction, request.args.get("cursor"), limit)
+        data = {"appointments": [appointment_row_to_dict(row, fields) for row in rows], "next_cursor": next_cursor}
+        return json_response(data, status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при получении записей: {e}"}, status=500)
+
+@appointments_bp.route("/search", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("appointments", "trainers")
+def search_appointments_by_text():
+    try:
+        q = request.args.get("q", "").strip()
+        if not q:
+            return json_response({"error": "Параметр 'q' обязателен"}, status=400)
+        limit = parse_limit(request.args.get("limit")) or 50
+        columns = ("id", "client_name", "client_phone", "trainer_name", "name_of_training_session",
+                   "comment", "status", "appointment_date", "rank")
+        rows = query_appointments_fts(DB.connection(), q, limit)
+        appointments = [dict(zip(columns, row)) for row in rows]
+        for appointment in appointments:
+            # Слой sqlite3 отдаёт дату строкой из базы; в ответе она в ISO 8601, как в других списках
+            appointment["appointment_date"] = parse_datetime(appointment["appointment_date"])
+        data = {"appointments": appointments}
+        return json_response(data, status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при поиске записей: {e}"}, status=500)
+
+def _capacity_start() -> datetime:
+    # Начало периода по умолчанию — начало текущих суток
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+@appointments_bp.route("/capacity", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("workout_slots", vary=lambda: None if request.args.get("from") else _capacity_start())
+def get_capacity():
+    try:
+        raw_from, raw_to = request.args.get("from"), request.args.get("to")
+        start = parse_datetime(raw_from) if raw_from else _capacity_start()
+        end = parse_datetime(raw_to) if raw_to else (start + timedelta(days=7) if start else None)
+        if start is None or end is None:
+            return json_response({"error": "Параметры 'from' и 'to' должны быть в формате ISO 8601"}, status=400)
+        workout_id = request.args.get("workout_id", type=int)
+        return json_response({"slots": capacity.list_slots(start, end, workout_id)}, status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при получении записей: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при получении вместимости: {e}"}, status=500)
+
+def _stored(booking) -> Tuple[bytes, int, str]:
+    # Результат заявки хранится телом ответа, а не объектом Response: хуки after_request
+    # меняют отданный объект, и каждый запрос по номеру заявки собирает ответ заново
+    response = booking()
+    return response.get_data(), response.status_code, response.content_type
+
+def _response(stored: Tuple[bytes, int, str]) -> Response:
+    body, status, content_type = stored
+    return Response(body, status=status, content_type=content_type)
+
+@appointments_bp.route("/queue/<int:ticket>", methods=["GET"])
+@require_api_key(read_only=True)
+def get_queued_appointment(ticket: int):
+    queue = write_behind.get_queue()
+    future = queue.result(ticket) if queue is not None else None
+    if future is None:
+        return json_response({"error": "Заявка не найдена"}, status=404)
+    if not future.done():
+        return json_response({"ticket": ticket, "status": "queued"}, status=202)
+    error = future.exception()
+    if error is not None:
+        return json_response({"error": f"Ошибка при создании записи: {error}"}, status=500)
+    return _response(future.result())
 
 @appointments_bp.route("/<int:appointment_id>", methods=["GET"])
 @require_api_key(read_only=True)
+@conditional_get("appointments", "trainers")
 def get_appointment(appointment_id: int):
     try:
-        a = Appointments.get_or_none(Appointments.id == appointment_id)
-        if not a:
-            return Response(json.dumps({"error": "Запись не найдена"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
-        return Response(json.dumps({"appointment": appointments_to_dict(a)}, ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+        row = select_appointments().where(Appointments.id == appointment_id).first()
+        if not row:
+            return json_response({"error": "Запись не найдена"}, status=404)
+        return json_response({"appointment": appointment_row_to_dict(row)}, status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при получении записи: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при получении записи: {e}"}, status=500)
 
 @appointments_bp.route("/trainers/<int:trainer_id>", methods=["GET"])
 @require_api_key(read_only=True)
+@conditional_get("appointments", "trainers")
 def get_appointments_by_trainer(trainer_id: int):
     try:
         if not Trainers.select().where(Trainers.id == trainer_id).exists():
-            return Response(json.dumps({"error": "Тренер не найден"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
-        query = Appointments.select().where(Appointments.trener == trainer_id)
-        data = {"appointments": [appointments_to_dict(a) for a in query]}
-        return Response(json.dumps(data, ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Тренер не найден"}, status=404)
+        query = select_appointments().where(Appointments.trener == trainer_id)
+        data = {"appointments": [appointment_row_to_dict(row) for row in query]}
+        return json_response(data, status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при получении записей тренера: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при получении записей тренера: {e}"}, status=500)
 
 @appointments_bp.route("", methods=["POST"])
 @require_api_key(read_only=False)
 def create_appointment():
+    queue = write_behind.get_queue()
+    if queue is not None:
+        # Проверки читают из пула читателей: соединение писателя (если его уже взяла проверка
+        # API-ключа) возвращается в пул — оно нужно потоку отложенной записи
+        DB.close()
+        DB.use_reader()
     try:
         if not request.json:
-            return Response(json.dumps({"error": "Требуются данные в формате JSON"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Требуются данные в формате JSON"}, status=400)
         data = request.json
         ok, msg = validate_appointments_data(data)
         if not ok:
-            return Response(json.dumps({"error": msg}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": msg}, status=400)
         trainer = None
         if data.get("trainer_id"):
             trainer = Trainers.get_or_none(Trainers.id == data["trainer_id"])
             if not trainer:
-                return Response(json.dumps({"error": "Тренер с указанным ID не найден"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
-        a = Appointments.create(
-            first_name=data["first_name"],
-            last_name=data["last_name"],
-            phone=data["phone"],
-            name_of_training_session=data["name_of_training_session"],
-            trener=trainer,
-            comment=data.get("comment"),
-            appointment_date=data.get("appointment_date"),
-        )
-        return Response(json.dumps(appointments_to_dict(a), ensure_ascii=False), status=201, mimetype="application/json; charset=utf-8")
+                return json_response({"error": "Тренер с указанным ID не найден"}, status=400)
+        appointment_date = _appointment_date(data)
+        booking = partial(_book_appointment, data, trainer, appointment_date)
+        if queue is None:
+            with booking_transaction():
+                return booking()
+        # Отложенная запись: бронирование выполнит поток-писатель в общей транзакции пачки,
+        # соединение запроса на время ожидания возвращается в пул
+        DB.close()
+        ticket, future = queue.submit(partial(_stored, booking))
+        if write_behind.mode() == "enqueue":
+            return json_response({"ticket": ticket, "status": "queued"}, status=202)
+        try:
+            return _response(future.result(timeout=write_behind.WRITE_BEHIND_TIMEOUT))
+        except FutureTimeout:
+            return json_response({"error": "Запись не подтверждена вовремя, результат доступен по номеру заявки",
+                                  "ticket": ticket, "status": "queued"}, status=503)
+    except write_behind.QueueFull as e:
+        return json_response({"error": str(e)}, status=503)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при создании записи: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при создании записи: {e}"}, status=500)
+
+@appointments_bp.route("/bulk", methods=["POST"])
+@require_api_key(read_only=False)
+def bulk_create_appointments():
+    try:
+        data = request.get_json(silent=True)
+        records = data.get("appointments") if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return json_response({"error": "Требуется JSON-массив или объект с ключом 'appointments'"}, status=400)
+        report = load_appointments(records)
+        return json_response(report, status=200)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при пакетной загрузке записей: {e}"}, status=500)
 
 @appointments_bp.route("/<int:appointment_id>", methods=["PUT"])
 @require_api_key(read_only=False)
 def update_appointment(appointment_id: int):
     try:
         if not request.json:
-            return Response(json.dumps({"error": "Требуются данные в формате JSON"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
-        a = Appointments.get_or_none(Appointments.id == appointment_id)
-        if not a:
-            return Response(json.dumps({"error": "Запись не найдена"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Требуются данные в формате JSON"}, status=400)
         data = request.json
         ok, msg = validate_appointments_data(data)
         if not ok:
-            return Response(json.dumps({"error": msg}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": msg}, status=400)
         trainer = None
         if data.get("trainer_id"):
             trainer = Trainers.get_or_none(Trainers.id == data["trainer_id"])
             if not trainer:
-                return Response(json.dumps({"error": "Тренер с указанным ID не найден"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
-        a.first_name = data["first_name"]
-        a.last_name = data["last_name"]
-        a.phone = data["phone"]
-        a.name_of_training_session = data["name_of_training_session"]
-        a.trener = trainer
-        a.comment = data.get("comment")
-        a.appointment_date = data.get("appointment_date")
-        a.save()
-        return Response(json.dumps(appointments_to_dict(a), ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+                return json_response({"error": "Тренер с указанным ID не найден"}, status=400)
+        appointment_date = _appointment_date(data)
+        with booking_transaction():
+            # Запись читается под блокировкой: статус и место не могут измениться
+            # (например, отменой) между проверками и сохранением
+            a = Appointments.get_or_none(Appointments.id == appointment_id)
+            if not a:
+                return json_response({"error": "Запись не найдена"}, status=404)
+            previous_trainer_id = a.trener_id
+            workout = None
+            if a.status != "Отменено":
+                if appointment_date:
+                    workout = capacity.find_workout(data["name_of_training_session"])
+                conflict = _slot_conflict(trainer, appointment_date, data["name_of_training_session"],
+                                          exclude_id=appointment_id, group=workout is not None)
+                if conflict:
+                    return conflict
+                # Место на занятии меняется, только если сменилась тренировка или время
+                seat = capacity.seat_of(a)
+                moved = workout is None or seat != workout.id or a.appointment_date != appointment_date
+                if workout is not None and moved and not capacity.reserve_seat(workout, appointment_date):
+                    return _class_full(workout, appointment_date)
+                if seat is not None and moved:
+                    capacity.release_seat(a)
+                if not moved:
+                    workout = None
+            a.first_name = data["first_name"]
+            a.last_name = data["last_name"]
+            a.phone = data["phone"]
+            a.name_of_training_session = data["name_of_training_session"]
+            a.trener = trainer
+            a.comment = data.get("comment")
+            a.appointment_date = appointment_date
+            a.save()
+            schedule_index.record(a.id, a.trener_id, a.appointment_date, a.name_of_training_session,
+                                  a.status, previous_trainer_id=previous_trainer_id)
+            if workout is not None:
+                capacity.link_seat(a.id, workout.id)
+        return json_response(appointments_to_dict(a), status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при обновлении записи: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при обновлении записи: {e}"}, status=500)
 
 @appointments_bp.route("/<int:appointment_id>", methods=["DELETE"])
 @require_api_key(read_only=False)
 def delete_appointment(appointment_id: int):
     try:
-        a = Appointments.get_or_none(Appointments.id == appointment_id)
-        if not a:
-            return Response(json.dumps({"error": "Запись не найдена"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
-        a.delete_instance()
+        with booking_transaction():
+            a = Appointments.get_or_none(Appointments.id == appointment_id)
+            if not a:
+                return json_response({"error": "Запись не найдена"}, status=404)
+            # Место освобождается до удаления: связь appointments_workouts удалится каскадом
+            capacity.release_seat(a)
+            a.delete_instance()
+            schedule_index.forget(a.id, a.trener_id)
         return Response("", status=204)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при удалении записи: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
\ No newline at end of file
+        return json_response({"error": f"Ошибка при удалении записи: {e}"}, status=500)
+
+@appointments_bp.route("/<int:appointment_id>/cancel", methods=["POST"])
+@require_api_key(read_only=False)
+def cancel_appointment(appointment_id: int):
+    try:
+        promoted = None
+        with booking_transaction():
+            a = Appointments.get_or_none(Appointments.id == appointment_id)
+            if not a:
+                return json_response({"error": "Запись не найдена"}, status=404)
+            if a.status != "Отменено":
+                a.status = "Отменено"
+                a.save()
+                schedule_index.record(a.id, a.trener_id, a.appointment_date, a.name_of_training_session, a.status)
+                promoted = capacity.release_seat(a)
+        data = {"appointment": appointments_to_dict(a),
+                "promoted": appointments_to_dict(promoted) if promoted else None}
+        return json_response(data, status=200)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при отмене записи: {e}"}, status=500)
\ No newline at end of file
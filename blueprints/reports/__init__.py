@@ -0,0 +1 @@
+from .routes import reports_bp  # noqa
\ No newline at end of file
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+from flask import Blueprint, request
+from utils import json_response, parse_limit
+from auth import conditional_get, require_api_key
+from reports import rebuild_reports, status_breakdown, trainer_daily, workout_popularity
+
+reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
+
+def _parse_day(raw, default):
+    if not raw:
+        return default
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError("Даты должны быть в формате ГГГГ-ММ-ДД")
+
+@reports_bp.route("/trainers/daily", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("appointments", vary=lambda: None if request.args.get("to") else date.today())
+def get_trainer_daily():
+    try:
+        end = _parse_day(request.args.get("to"), date.today())
+        start = _parse_day(request.args.get("from"), end - timedelta(days=30))
+        trainer_id = request.args.get("trainer_id", type=int)
+        data = {"from": start, "to": end, "days": trainer_daily(start, end, trainer_id)}
+        return json_response(data, status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при получении отчёта по тренерам: {e}"}, status=500)
+
+@reports_bp.route("/workouts", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("appointments")
+def get_workout_popularity():
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        return json_response({"workouts": workout_popularity(limit)}, status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при получении отчёта по тренировкам: {e}"}, status=500)
+
+@reports_bp.route("/statuses", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("appointments")
+def get_status_breakdown():
+    try:
+        return json_response({"statuses": status_breakdown()}, status=200)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при получении отчёта по статусам: {e}"}, status=500)
+
+@reports_bp.route("/rebuild", methods=["POST"])
+@require_api_key(read_only=False)
+def rebuild():
+    try:
+        rebuild_reports()
+        return json_response({"rebuilt": True}, status=200)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при пересчёте отчётов: {e}"}, status=500)
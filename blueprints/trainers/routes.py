@@ -1,42 +1,116 @@
+from datetime import datetime, timedelta
 from flask import Blueprint, request, Response
 from models import Trainers
-from utils import trainers_to_dict, validate_trainers_data
-from auth import require_api_key
-import json
+from utils import (
+    TRAINER_COLUMNS,
+    json_response,
+    keyset_paginate,
+    parse_fields,
+    parse_limit,
+    select_trainers,
+    trainer_row_to_dict,
+    trainers_to_dict,
+    validate_trainers_data,
+)
+from auth import conditional_get, require_api_key, table_version
+from cache import invalidate_trainer, trainers_cache
+from database.bulk_load import load_trainers
+from scheduling import free_slots, parse_datetime, schedule_index
+
+MAX_AVAILABILITY_DAYS = 31
+# Допустимые значения sort_by для GET /trainers
+SORT_FIELDS = ("id", "last_name", "first_name", "created_at")
 
 trainers_bp = Blueprint("trainers", __name__, url_prefix="/trainers")
 
 @trainers_bp.route("", methods=["GET"])
 @require_api_key(read_only=True)
+@conditional_get("trainers")
 def get_trainers():
     try:
-        trainers = Trainers.select()
-        data = {"trainers": [trainers_to_dict(t) for t in trainers]}
-        return Response(json.dumps(data, ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+        # Версия таблицы в ключе: запись из другого процесса или соединения не вернёт старое тело под новым ETag
+        cache_key = ("trainers", table_version("trainers"),
+                     tuple(sorted((k, v) for k, v in request.args.items(multi=True) if k != "api_key")))
+        data = trainers_cache.get(cache_key)
+        if data is not None:
+            return json_response(data, status=200)
+        sort_by = request.args.get("sort_by", "id")
+        direction = request.args.get("direction", "asc")
+        if sort_by not in SORT_FIELDS:
+            sort_by = "id"
+        fields = parse_fields(request.args.get("fields"), TRAINER_COLUMNS)
+        limit = parse_limit(request.args.get("limit"))
+        field = getattr(Trainers, sort_by)
+        query = select_trainers(fields, extra=(Trainers.id, field))
+        rows, next_cursor = keyset_paginate(query, field, Trainers.id, direction, request.args.get("cursor"), limit)
+        data = {"trainers": [trainer_row_to_dict(row, fields) for row in rows], "next_cursor": next_cursor}
+        trainers_cache.set(cache_key, data)
+        return json_response(data, status=200)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при получении списка тренеров: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при получении списка тренеров: {e}"}, status=500)
 
 @trainers_bp.route("/<int:trainer_id>", methods=["GET"])
 @require_api_key(read_only=True)
+@conditional_get("trainers")
 def get_trainer(trainer_id: int):
     try:
-        trainer = Trainers.get_or_none(Trainers.id == trainer_id)
-        if not trainer:
-            return Response(json.dumps({"error": "Тренер не найден"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
-        return Response(json.dumps(trainers_to_dict(trainer), ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+        cache_key = ("trainer", trainer_id, table_version("trainers"))
+        data = trainers_cache.get(cache_key)
+        if data is None:
+            trainer = Trainers.get_or_none(Trainers.id == trainer_id)
+            if not trainer:
+                return json_response({"error": "Тренер не найден"}, status=404)
+            data = trainers_to_dict(trainer)
+            trainers_cache.set(cache_key, data)
+        return json_response(data, status=200)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при получении тренера: {e}"}, status=500)
+
+def _availability_start() -> datetime:
+    # Начало периода по умолчанию — текущая минута
+    return datetime.now().replace(second=0, microsecond=0)
+
+@trainers_bp.route("/<int:trainer_id>/availability", methods=["GET"])
+@require_api_key(read_only=True)
+@conditional_get("trainers", "appointments",
+                 vary=lambda: None if request.args.get("from") else _availability_start())
+def get_trainer_availability(trainer_id: int):
+    try:
+        if not Trainers.select().where(Trainers.id == trainer_id).exists():
+            return json_response({"error": "Тренер не найден"}, status=404)
+        raw_from, raw_to = request.args.get("from"), request.args.get("to")
+        start = parse_datetime(raw_from) if raw_from else _availability_start()
+        end = parse_datetime(raw_to) if raw_to else (start + timedelta(days=7) if start else None)
+        if start is None or end is None:
+            return json_response({"error": "Параметры 'from' и 'to' должны быть в формате ISO 8601"}, status=400)
+        if end <= start:
+            return json_response({"error": "Параметр 'to' должен быть позже 'from'"}, status=400)
+        if end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+            return json_response({"error": f"Период не может превышать {MAX_AVAILABILITY_DAYS} дней"}, status=400)
+        busy = schedule_index.conflicts(trainer_id, start, end)
+        data = {
+            "trainer_id": trainer_id,
+            "from": start,
+            "to": end,
+            "busy": [{"appointment_id": i, "start": s, "end": e} for s, e, i, _ in busy],
+            "free": [{"start": s, "end": e} for s, e in free_slots(busy, start, end)],
+        }
+        return json_response(data, status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при получении тренера: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при получении расписания тренера: {e}"}, status=500)
 
 @trainers_bp.route("", methods=["POST"])
 @require_api_key(read_only=False)
 def create_trainer():
     try:
         if not request.json:
-            return Response(json.dumps({"error": "Требуются данные в формате JSON"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Требуются данные в формате JSON"}, status=400)
         data = request.json
         ok, msg = validate_trainers_data(data)
         if not ok:
-            return Response(json.dumps({"error": msg}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": msg}, status=400)
         trainer = Trainers.create(
             first_name=data["first_name"],
             last_name=data["last_name"],
@@ -47,23 +121,38 @@ def create_trainer():
             specialization=data.get("specialization"),
             experience_years=data.get("experience_years", 0),
         )
-        return Response(json.dumps(trainers_to_dict(trainer), ensure_ascii=False), status=201, mimetype="application/json; charset=utf-8")
+        invalidate_trainer()
+        return json_response(trainers_to_dict(trainer), status=201)
+    except Exception as e:
+        return json_response({"error": f"Ошибка при создании тренера: {e}"}, status=500)
+
+@trainers_bp.route("/bulk", methods=["POST"])
+@require_api_key(read_only=False)
+def bulk_create_trainers():
+    try:
+        data = request.get_json(silent=True)
+        records = data.get("trainers") if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return json_response({"error": "Требуется JSON-массив или объект с ключом 'trainers'"}, status=400)
+        report = load_trainers(records)
+        invalidate_trainer()
+        return json_response(report, status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при создании тренера: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при пакетной загрузке тренеров: {e}"}, status=500)
 
 @trainers_bp.route("/<int:trainer_id>", methods=["PUT"])
 @require_api_key(read_only=False)
 def update_trainer(trainer_id: int):
     try:
         if not request.json:
-            return Response(json.dumps({"error": "Требуются данные в формате JSON"}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Требуются данные в формате JSON"}, status=400)
         trainer = Trainers.get_or_none(Trainers.id == trainer_id)
         if not trainer:
-            return Response(json.dumps({"error": "Тренер не найден"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Тренер не найден"}, status=404)
         data = request.json
         ok, msg = validate_trainers_data(data)
         if not ok:
-            return Response(json.dumps({"error": msg}, ensure_ascii=False), status=400, mimetype="application/json; charset=utf-8")
+            return json_response({"error": msg}, status=400)
         trainer.first_name = data["first_name"]
         trainer.last_name = data["last_name"]
         trainer.middle_name = data["middle_name"]
@@ -73,9 +162,10 @@ def update_trainer(trainer_id: int):
         trainer.specialization = data.get("specialization")
         trainer.experience_years = data.get("experience_years", 0)
         trainer.save()
-        return Response(json.dumps(trainers_to_dict(trainer), ensure_ascii=False), status=200, mimetype="application/json; charset=utf-8")
+        invalidate_trainer(trainer_id)
+        return json_response(trainers_to_dict(trainer), status=200)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при обновлении тренера: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
+        return json_response({"error": f"Ошибка при обновлении тренера: {e}"}, status=500)
 
 @trainers_bp.route("/<int:trainer_id>", methods=["DELETE"])
 @require_api_key(read_only=False)
@@ -83,8 +173,9 @@ def delete_trainer(trainer_id: int):
     try:
         trainer = Trainers.get_or_none(Trainers.id == trainer_id)
         if not trainer:
-            return Response(json.dumps({"error": "Тренер не найден"}, ensure_ascii=False), status=404, mimetype="application/json; charset=utf-8")
+            return json_response({"error": "Тренер не найден"}, status=404)
         trainer.delete_instance()
+        invalidate_trainer(trainer_id)
         return Response("", status=204)
     except Exception as e:
-        return Response(json.dumps({"error": f"Ошибка при удалении тренера: {e}"}, ensure_ascii=False), status=500, mimetype="application/json; charset=utf-8")
\ No newline at end of file
+        return json_response({"error": f"Ошибка при удалении тренера: {e}"}, status=500)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Вместимость групповых тренировок.
+
+Занятость каждого занятия (тренировка + время начала) хранится счётчиком в workout_slots.
+Место занимается условным UPDATE ... WHERE booked < capacity: при сотнях одновременных
+попыток записи счётчик не уходит за max_participants и не требует COUNT по записям.
+Все функции вызываются внутри транзакции записи (scheduling.booking_transaction,
+BEGIN IMMEDIATE), чтобы счётчик, запись и связь appointments_workouts менялись вместе.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import DB, Appointments, AppointmentsWorkouts, Waitlist, WorkoutSlots, Workouts
+from scheduling import schedule_index
+
+WAITING = "Ожидает"
+PROMOTED = "Переведено"
+
+def find_workout(session_name: Optional[str]) -> Optional[Workouts]:
+    """Тренировка по названию (при дублях — с наименьшим id); None для индивидуальных занятий"""
+    if not session_name:
+        return None
+    return (Workouts
+            .select(Workouts.id, Workouts.name_of_training_session, Workouts.max_participants)
+            .where(Workouts.name_of_training_session == session_name)
+            .order_by(Workouts.id)
+            .first())
+
+def find_workout_by_id(workout_id: int) -> Optional[Workouts]:
+    return (Workouts
+            .select(Workouts.id, Workouts.name_of_training_session, Workouts.max_participants)
+            .where(Workouts.id == workout_id)
+            .first())
+
+def _slot(workout_id: int, slot_start: datetime):
+    return (WorkoutSlots.workout == workout_id) & (WorkoutSlots.slot_start == slot_start)
+
+def reserve_seat(workout: Workouts, slot_start: datetime) -> bool:
+    """Занимает место на занятии; False, если мест нет"""
+    (WorkoutSlots
+     .insert(workout=workout.id, slot_start=slot_start, capacity=workout.max_participants, booked=0, waiting=0)
+     .on_conflict_ignore()
+     .execute())
+    updated = (WorkoutSlots
+               .update(booked=WorkoutSlots.booked + 1)
+               .where(_slot(workout.id, slot_start) & (WorkoutSlots.booked < WorkoutSlots.capacity))
+               .execute())
+    return updated == 1
+
+def link_seat(appointment_id: int, workout_id: int) -> None:
+    AppointmentsWorkouts.insert(appointment=appointment_id, workout=workout_id).on_conflict_ignore().execute()
+
+def seat_of(appointment: Appointments) -> Optional[int]:
+    """id тренировки, место на которой занимает запись, или None"""
+    if appointment.appointment_date is None:
+        return None
+    row = (AppointmentsWorkouts
+           .select(AppointmentsWorkouts.workout)
+           .join(WorkoutSlots, on=((WorkoutSlots.workout == AppointmentsWorkouts.workout)
+                                   & (WorkoutSlots.slot_start == appointment.appointment_date)))
+           .where(AppointmentsWorkouts.appointment == appointment.id)
+           .tuples()
+           .first())
+    return row[0] if row else None
+
+def release_seat(appointment: Appointments) -> Optional[Appointments]:
+    """Освобождает место записи и переводит первого из листа ожидания.
+
+    Возвращает созданную из листа ожидания запись или None.
+    """
+    workout_id = seat_of(appointment)
+    if workout_id is None:
+        return None
+    with DB.atomic():
+        (AppointmentsWorkouts
+         .delete()
+         .where((AppointmentsWorkouts.appointment == appointment.id) & (AppointmentsWorkouts.workout == workout_id))
+         .execute())
+        (WorkoutSlots
+         .update(booked=WorkoutSlots.booked - 1)
+         .where(_slot(workout_id, appointment.appointment_date) & (WorkoutSlots.booked > 0))
+         .execute())
+        return promote(workout_id, appointment.appointment_date)
+
+def promote(workout_id: int, slot_start: datetime) -> Optional[Appointments]:
+    """Переводит первую ожидающую заявку в запись, если на занятии есть место"""
+    entry = (Waitlist
+             .select()
+             .where((Waitlist.workout == workout_id) & (Waitlist.slot_start == slot_start)
+                    & (Waitlist.status == WAITING))
+             .order_by(Waitlist.id)
+             .first())
+    if entry is None:
+        return None
+    workout = find_workout_by_id(workout_id)
+    if workout is None or not reserve_seat(workout, slot_start):
+        return None
+    appointment = Appointments.create(
+        first_name=entry.first_name,
+        last_name=entry.last_name,
+        phone=entry.phone,
+        name_of_training_session=workout.name_of_training_session,
+        trener=entry.trener_id,
+        comment=entry.comment,
+        appointment_date=slot_start,
+    )
+    schedule_index.record(appointment.id, entry.trener_id, slot_start, workout.name_of_training_session,
+                          appointment.status)
+    link_seat(appointment.id, workout_id)
+    entry.status = PROMOTED
+    entry.appointment = appointment.id
+    entry.save()
+    WorkoutSlots.update(waiting=WorkoutSlots.waiting - 1).where(_slot(workout_id, slot_start)).execute()
+    return appointment
+
+def join_waitlist(workout: Workouts, slot_start: datetime, data: Dict[str, Any],
+                  trainer_id: Optional[int]) -> Tuple[Waitlist, int]:
+    """Ставит клиента в лист ожидания; возвращает заявку и её позицию (с 1)"""
+    entry = Waitlist.create(
+        workout=workout.id,
+        slot_start=slot_start,
+        first_name=data["first_name"],
+        last_name=data["last_name"],
+        phone=data["phone"],
+        trener=trainer_id,
+        comment=data.get("comment"),
+    )
+    WorkoutSlots.update(waiting=WorkoutSlots.waiting + 1).where(_slot(workout.id, slot_start)).execute()
+    position = (Waitlist
+                .select()
+                .where((Waitlist.workout == workout.id) & (Waitlist.slot_start == slot_start)
+                       & (Waitlist.status == WAITING) & (Waitlist.id <= entry.id))
+                .count())
+    return entry, position
+
+def slot_to_dict(workout_id: int, name: str, slot_start: datetime, capacity: int,
+                 booked: int, waiting: int) -> Dict[str, Any]:
+    return {
+        "workout_id": workout_id,
+        "name_of_training_session": name,
+        "slot_start": slot_start,
+        "capacity": capacity,
+        "booked": booked,
+        "remaining": max(capacity - booked, 0),
+        "waiting": waiting,
+    }
+
+def list_slots(start: datetime, end: datetime, workout_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Остаток мест по занятиям в [start, end): чтение готовых счётчиков по индексу slot_start"""
+    query = (WorkoutSlots
+             .select(WorkoutSlots.workout, Workouts.name_of_training_session, WorkoutSlots.slot_start,
+                     WorkoutSlots.capacity, WorkoutSlots.booked, WorkoutSlots.waiting)
+             .join(Workouts)
+             .where((WorkoutSlots.slot_start >= start) & (WorkoutSlots.slot_start < end)))
+    if workout_id is not None:
+        query = query.where(WorkoutSlots.workout == workout_id)
+    return [slot_to_dict(*row) for row in query.order_by(WorkoutSlots.slot_start, WorkoutSlots.workout).tuples()]
@@ -0,0 +1,46 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from models import VERSIONED_TABLES, TableVersions
+
+# Long-poll GET /changes: ответ приходит, как только изменилась одна из таблиц, или по таймауту
+LONG_POLL_TIMEOUT = float(os.environ.get("BODY_FIT_LONG_POLL_TIMEOUT", 25))
+MAX_LONG_POLL_TIMEOUT = 60.0
+# Как часто перечитывается table_versions, пока есть ожидающие клиенты
+POLL_INTERVAL = float(os.environ.get("BODY_FIT_LONG_POLL_INTERVAL", 0.25))
+
+def parse_tables(raw: Optional[str]) -> Tuple[str, ...]:
+    if not raw:
+        return tuple(VERSIONED_TABLES)
+    tables = tuple(sorted({t.strip() for t in raw.split(",") if t.strip()}))
+    unknown = [t for t in tables if t not in VERSIONED_TABLES]
+    if unknown or not tables:
+        raise ValueError(f"Параметр 'tables' может содержать только: {', '.join(VERSIONED_TABLES)}")
+    return tables
+
+def parse_timeout(raw: Optional[str]) -> float:
+    if raw is None or raw == "":
+        return LONG_POLL_TIMEOUT
+    try:
+        timeout = float(raw)
+    except ValueError:
+        raise ValueError("Параметр 'timeout' должен быть числом секунд")
+    if timeout < 0 or timeout > MAX_LONG_POLL_TIMEOUT:
+        raise ValueError(f"Параметр 'timeout' должен быть от 0 до {MAX_LONG_POLL_TIMEOUT:g}")
+    return timeout
+
+def read_versions() -> Dict[str, int]:
+    """Версии всех версионируемых таблиц одним запросом"""
+    return {name: version for name, version, _ in TableVersions.current(VERSIONED_TABLES)}
+
+def version_token(versions: Dict[str, int], tables: Tuple[str, ...]) -> str:
+    return ",".join(f"{t}:{versions.get(t, 0)}" for t in tables)
+
+def changes_payload(versions: Dict[str, int], tables: Tuple[str, ...], since: Optional[str]) -> dict:
+    """Ответ /changes: since — токен для следующего запроса"""
+    token = version_token(versions, tables)
+    return {
+        "changed": since is not None and token != since,
+        "since": token,
+        "versions": {t: versions.get(t, 0) for t in tables},
+    }
@@ -0,0 +1,195 @@
+"""
+Быстрое создание базы: клонирование заранее подготовленного шаблона вместо повторного
+выполнения SQL-скриптов.
+
+Шаблон собирается один раз так же, как база собиралась раньше: complete_database.sql
+(таблицы, тестовые данные, индексы, FTS) и затем init_db() приложения (таблицы моделей,
+триггеры версий и отчётов). После сборки шаблон переводится в режим журнала DELETE
+и сжимается VACUUM, чтобы он был одним самодостаточным файлом.
+
+Рядом с шаблоном хранится JSON с двумя контрольными суммами:
+  sources  — SHA-256 файлов, из которых строится схема (SOURCES); если хоть один изменился,
+             шаблон устарел и пересобирается из скриптов;
+  template — SHA-256 самого шаблона; при копировании файла сверяется, чтобы повреждённый
+             или изменённый шаблон не разошёлся по окружениям.
+
+Клонирование: method='copy' — копия файла (быстрее всего), method='backup' — SQLite
+backup API (безопасно, даже если шаблон в этот момент открыт другим процессом).
+
+Запуск: python -m database.bootstrap файл [--force] [--method copy|backup] [--rebuild]
+        python -m database.bootstrap --check
+Существующая база перезаписывается только с --force (overwrite=True в clone).
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL_PATH = os.path.join(ROOT, "sql_scripts", "complete_database.sql")
+TEMPLATE_DIR = os.environ.get("BODY_FIT_TEMPLATE_DIR", os.path.join(ROOT, "database", "template"))
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "body_fit_template.db")
+META_PATH = TEMPLATE_PATH + ".json"
+METHODS = ("copy", "backup")
+
+# Файлы, определяющие схему и начальные данные шаблона
+SOURCES = [
+    os.path.join("sql_scripts", "complete_database.sql"),
+    os.path.join("database", "peewee_models.py"),
+    os.path.join("database", "fitness_database.py"),
+    os.path.join("database", "migrate.py"),
+    "app.py",
+    "reports.py",
+]
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def sources_checksum() -> str:
+    """Общая контрольная сумма SOURCES: имя и содержимое каждого файла"""
+    digest = hashlib.sha256()
+    for name in SOURCES:
+        digest.update(name.replace(os.sep, "/").encode())
+        digest.update(file_checksum(os.path.join(ROOT, name)).encode())
+    return digest.hexdigest()
+
+def _remove(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def _read_meta() -> Optional[Dict[str, Any]]:
+    try:
+        with open(META_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_from_scripts(path: str) -> None:
+    """Собирает базу path выполнением SQL-скрипта и init_db() — медленный путь.
+
+    models.DB на время сборки переключается на path и затем возвращается к прежнему файлу.
+    """
+    from app import init_db
+    from models import DB
+
+    _remove(path)
+    with open(SQL_PATH, encoding="utf-8") as f:
+        script = f.read()
+    conn = sqlite3.connect(path)
+    try:
+        # Скрипт сам открывает и фиксирует транзакцию
+        conn.executescript(script)
+    finally:
+        conn.close()
+    previous = DB.database
+    DB.init(path)
+    try:
+        init_db()
+    finally:
+        DB.init(previous)
+
+def build_template() -> Dict[str, Any]:
+    """Пересобирает шаблон из скриптов и записывает его контрольные суммы"""
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    started = time.perf_counter()
+    checksum = sources_checksum()
+    # Сначала во временный файл: прерванная сборка не оставит неполный шаблон
+    partial = TEMPLATE_PATH + ".partial"
+    build_from_scripts(partial)
+    conn = sqlite3.connect(partial)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    _remove(TEMPLATE_PATH)
+    os.replace(partial, TEMPLATE_PATH)
+    meta = {
+        "sources": checksum,
+        "template": file_checksum(TEMPLATE_PATH),
+        "size": os.path.getsize(TEMPLATE_PATH),
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
+    with open(META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def template_status() -> str:
+    """'ok', 'missing', 'stale' (изменились исходники) или 'corrupt' (изменился сам шаблон)"""
+    meta = _read_meta()
+    if meta is None or not os.path.exists(TEMPLATE_PATH):
+        return "missing"
+    if meta.get("sources") != sources_checksum():
+        return "stale"
+    if meta.get("template") != file_checksum(TEMPLATE_PATH):
+        return "corrupt"
+    return "ok"
+
+def ensure_template(rebuild: bool = False) -> str:
+    """Путь к актуальному шаблону; при отсутствии или устаревании он собирается из скриптов"""
+    status = "rebuild" if rebuild else template_status()
+    if status != "ok":
+        print(f"Шаблон базы: {status}, сборка из {os.path.relpath(SQL_PATH, ROOT)}...")
+        meta = build_template()
+        print(f"Шаблон собран за {meta['build_seconds']} с ({meta['size']} байт)")
+    return TEMPLATE_PATH
+
+def clone(target: str, method: str = "copy", rebuild: bool = False, overwrite: bool = False) -> str:
+    """
+    Создаёт базу target из шаблона и возвращает путь к ней. Существующий файл
+    перезаписывается только при overwrite=True, иначе FileExistsError
+    """
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный способ клонирования '{method}', допустимые: {', '.join(METHODS)}")
+    if os.path.exists(target) and not overwrite:
+        raise FileExistsError(f"База {target} уже существует")
+    template = ensure_template(rebuild)
+    target_dir = os.path.dirname(os.path.abspath(target))
+    os.makedirs(target_dir, exist_ok=True)
+    _remove(target)
+    if method == "copy":
+        # ensure_template уже сверил контрольную сумму шаблона
+        shutil.copyfile(template, target)
+    else:
+        source = sqlite3.connect(f"file:{template}?mode=ro", uri=True)
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+    return target
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Создание базы из подготовленного шаблона")
+    parser.add_argument("target", nargs="?", help="файл создаваемой базы")
+    parser.add_argument("--force", action="store_true", help="перезаписать существующий файл")
+    parser.add_argument("--method", choices=METHODS, default="copy")
+    parser.add_argument("--rebuild", action="store_true", help="пересобрать шаблон из SQL-скриптов")
+    parser.add_argument("--check", action="store_true", help="только проверить актуальность шаблона")
+    args = parser.parse_args()
+    if args.check:
+        status = template_status()
+        print(f"Шаблон {TEMPLATE_PATH}: {status}")
+        sys.exit(0 if status == "ok" else 1)
+    if args.target is None:
+        parser.error("укажите файл создаваемой базы")
+    started = time.perf_counter()
+    try:
+        clone(args.target, args.method, args.rebuild, overwrite=args.force)
+    except FileExistsError as e:
+        sys.exit(f"{e}; для перезаписи укажите --force")
+    print(f"База {args.target} создана за {(time.perf_counter() - started) * 1000:.1f} мс ({args.method})")
+
+if __name__ == "__main__":
+    main()
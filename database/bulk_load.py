@@ -0,0 +1,204 @@
+"""
+Пакетная загрузка тренеров и записей на тренировки.
+
+Строки проверяются теми же правилами, что и в API (validate_*_data), и вставляются
+пачками через insert_many; каждая пачка выполняется в своей транзакции DB.atomic(),
+чтобы долгая загрузка не держала блокировку записи целиком.
+
+Запуск: python -m database.bulk_load файл.csv|файл.jsonl --table trainers|appointments
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from peewee import DatabaseError, chunked
+
+from database.migrate import migrate
+from database.peewee_models import DB, Appointments, Trainers
+from utils import validate_appointments_data, validate_trainers_data
+
+# 8-10 колонок на строку: пачка укладывается в лимит переменных SQLite (32766)
+BATCH_SIZE = 500
+
+APPOINTMENT_STATUSES = {choice[0] for choice in Appointments.status.choices}
+
+def _clean(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Пустые ячейки CSV считаем отсутствующими значениями
+    return {key: (None if value == "" else value) for key, value in data.items()}
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    # Время со смещением приводится к местному без смещения, как в scheduling.parse_datetime
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo is not None else parsed
+
+def trainer_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    ok, msg = validate_trainers_data(data)
+    if not ok:
+        raise ValueError(msg)
+    try:
+        experience_years = int(data.get("experience_years") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Поле 'experience_years' должно быть целым числом")
+    return {
+        "first_name": data["first_name"],
+        "last_name": data["last_name"],
+        "middle_name": data["middle_name"],
+        "name_of_training_session": data["name_of_training_session"],
+        "phone": data.get("phone"),
+        "email": data.get("email"),
+        "specialization": data.get("specialization"),
+        "experience_years": experience_years,
+        "created_at": datetime.now(),
+    }
+
+def appointment_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    ok, msg = validate_appointments_data(data)
+    if not ok:
+        raise ValueError(msg)
+    status = data.get("status") or "Запланировано"
+    if status not in APPOINTMENT_STATUSES:
+        raise ValueError(f"Недопустимый статус '{status}'")
+    try:
+        trainer_id = int(data["trainer_id"]) if data.get("trainer_id") else None
+    except (TypeError, ValueError):
+        raise ValueError("Поле 'trainer_id' должно быть целым числом")
+    try:
+        appointment_date = _parse_datetime(data.get("appointment_date"))
+        created_at = _parse_datetime(data.get("created_at")) or datetime.now()
+    except ValueError:
+        raise ValueError("Дата должна быть в формате ISO 8601 (ГГГГ-ММ-ДД ЧЧ:ММ:СС)")
+    return {
+        "first_name": data["first_name"],
+        "last_name": data["last_name"],
+        "phone": data["phone"],
+        "name_of_training_session": data["name_of_training_session"],
+        "trener": trainer_id,
+        "comment": data.get("comment"),
+        "status": status,
+        "appointment_date": appointment_date,
+        "date": created_at,
+        "created_at": created_at,
+    }
+
+def _check_trainers(rows: List[Tuple[int, Dict[str, Any]]], errors: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+    # Один запрос на пачку вместо проверки тренера для каждой строки
+    ids = {row["trener"] for _, row in rows if row["trener"] is not None}
+    if not ids:
+        return rows
+    existing = {t for (t,) in Trainers.select(Trainers.id).where(Trainers.id.in_(list(ids))).tuples()}
+    valid = []
+    for number, row in rows:
+        if row["trener"] is not None and row["trener"] not in existing:
+            errors.append({"row": number, "error": "Тренер с указанным ID не найден"})
+        else:
+            valid.append((number, row))
+    return valid
+
+def _insert_batch(model, rows: List[Tuple[int, Dict[str, Any]]], errors: List[Dict[str, Any]]) -> int:
+    if not rows:
+        return 0
+    try:
+        with DB.atomic():
+            model.insert_many([row for _, row in rows]).execute()
+        return len(rows)
+    except DatabaseError:
+        pass
+    # Пачка не вставилась целиком - повторяем построчно в точках сохранения,
+    # чтобы указать, какие именно строки ошибочны
+    inserted = 0
+    with DB.atomic():
+        for number, row in rows:
+            try:
+                with DB.atomic():
+                    model.insert(row).execute()
+                inserted += 1
+            except DatabaseError as e:
+                errors.append({"row": number, "error": str(e)})
+    return inserted
+
+def bulk_insert(model, records: Iterable[Dict[str, Any]], to_row: Callable[[Dict[str, Any]], Dict[str, Any]],
+                batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Проверяет и вставляет записи пачками по batch_size строк.
+
+    Args:
+        model: Модель peewee (Trainers или Appointments)
+        records: Итерируемый источник словарей с данными (читается лениво)
+        to_row: Функция проверки и преобразования словаря в строку таблицы
+        batch_size: Размер пачки
+
+    Returns:
+        Отчёт: общее количество строк, вставленные/ошибочные и ошибки по каждой пачке
+    """
+    report = {"table": model._meta.table_name, "total": 0, "inserted": 0, "failed": 0, "batches": []}
+    numbered = enumerate(records, start=1)
+    for index, batch in enumerate(chunked(numbered, batch_size), start=1):
+        errors: List[Dict[str, Any]] = []
+        rows = []
+        for number, data in batch:
+            try:
+                rows.append((number, to_row(_clean(data))))
+            except (ValueError, KeyError, TypeError) as e:
+                errors.append({"row": number, "error": str(e)})
+        if model is Appointments:
+            rows = _check_trainers(rows, errors)
+        inserted = _insert_batch(model, rows, errors)
+        errors.sort(key=lambda e: e["row"])
+        report["batches"].append({
+            "batch": index,
+            "rows": [batch[0][0], batch[-1][0]],
+            "inserted": inserted,
+            "errors": errors,
+        })
+        report["total"] += len(batch)
+        report["inserted"] += inserted
+        report["failed"] += len(errors)
+    return report
+
+def load_trainers(records: Iterable[Dict[str, Any]], batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    return bulk_insert(Trainers, records, trainer_row, batch_size)
+
+def load_appointments(records: Iterable[Dict[str, Any]], batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    return bulk_insert(Appointments, records, appointment_row, batch_size)
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Построчно читает CSV (с заголовком) или JSONL файл"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8-sig", newline="") as file:
+        if extension == ".csv":
+            yield from csv.DictReader(file)
+        elif extension in (".jsonl", ".ndjson"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {extension} (ожидается .csv или .jsonl)")
+
+LOADERS = {"trainers": load_trainers, "appointments": load_appointments}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетная загрузка данных в базу BODY_FIT")
+    parser.add_argument("path", help="Путь к файлу .csv или .jsonl")
+    parser.add_argument("--table", choices=sorted(LOADERS), required=True, help="Таблица для загрузки")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Размер пачки insert_many")
+    args = parser.parse_args(argv)
+
+    # Загрузка может идти в новую базу: схема создаётся и обновляется миграциями
+    migrate()
+    with DB.connection_context():
+        report = LOADERS[args.table](read_records(args.path), args.batch_size)
+
+    for batch in report["batches"]:
+        for error in batch["errors"]:
+            print(f"Строка {error['row']}: {error['error']}")
+    print(f"Загружено {report['inserted']} из {report['total']} строк в таблицу {report['table']}, ошибок: {report['failed']}")
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
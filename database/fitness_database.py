@@ -1,6 +1,8 @@
 import sqlite3
 import os
-from typing import List, Tuple, Optional
+import re
+import weakref
+from typing import Dict, Iterable, List, Tuple, Optional
 
 # Константы для путей к файлам
 DB_PATH = os.path.join(os.path.dirname(__file__), 'fitness_club.db')
@@ -79,6 +81,61 @@ def find_appointment_by_phone(conn, phone: str) -> List[Tuple]:
         print(f"Ошибка при поиске по телефону: {e}")
         return []
     
+# Не больше 500 параметров в одном IN (...): укладывается в лимит переменных SQLite
+PHONE_CHUNK_SIZE = 500
+
+def find_appointments_by_phones(conn, phones: Iterable[str], brief: bool = False,
+                                chunk_size: int = PHONE_CHUNK_SIZE) -> Dict[str, List[Tuple]]:
+    """
+    Пакетный поиск записей по списку телефонов: вместо запроса на каждый номер
+    выполняется по одному запросу WHERE phone IN (...) на chunk_size номеров.
+    
+    Args:
+        conn: Соединение с базой данных
+        phones: Номера телефонов
+        brief: Вернуть только (id, appointment_date, trener_id) - такой запрос
+               полностью обслуживается покрывающим индексом без чтения таблицы
+        chunk_size: Количество номеров в одном запросе
+        
+    Returns:
+        Словарь телефон -> список записей (в порядке даты записи); для номеров
+        без записей - пустой список
+    """
+    unique_phones = list(dict.fromkeys(phones))
+    result: Dict[str, List[Tuple]] = {phone: [] for phone in unique_phones}
+    if brief:
+        columns = "a.phone, a.id, a.appointment_date, a.trener_id"
+        joins = ""
+    else:
+        columns = """a.phone,
+            a.id,
+            a.last_name || ' ' || a.first_name as client_name,
+            a.phone,
+            t.last_name || ' ' || t.first_name || ' ' || t.middle_name as trainer_name,
+            a.name_of_training_session,
+            a.comment,
+            a.status,
+            a.appointment_date"""
+        joins = "LEFT JOIN trainers t ON a.trener_id = t.id"
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(unique_phones), chunk_size):
+            chunk = unique_phones[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"""
+            SELECT {columns}
+            FROM appointments a
+            {joins}
+            WHERE a.phone IN ({placeholders})
+            ORDER BY a.phone, a.appointment_date
+            """, chunk)
+            for row in cursor.fetchall():
+                result[row[0]].append(row[1:])
+        return result
+    except Exception as e:
+        print(f"Ошибка при пакетном поиске по телефонам: {e}")
+        return result
+    
 def find_appointment_by_comment(conn, comment_part: str) -> List[Tuple]:
     """
     Принимает соединение и часть комментария, ищет записи, где комментарий 
@@ -114,12 +171,298 @@ def find_appointment_by_comment(conn, comment_part: str) -> List[Tuple]:
         print(f"Ошибка при поиске по комментарию: {e}")
         return []
     
+# Полнотекстовый индекс по комментарию и названию тренировки.
+# unicode61 приводит кириллицу к нижнему регистру; «ё» дополнительно заменяется на «е»
+# и в индексе, и в запросе. Индекс хранит нормализованный текст сам, а триггеры
+# поддерживают его в актуальном состоянии при любых изменениях appointments.
+_FTS_NORMALIZE = "replace(replace({0}, 'ё', 'е'), 'Ё', 'Е')"
+
+SEARCH_INDEX_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS appointments_fts USING fts5(
+    comment,
+    name_of_training_session,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TRIGGER IF NOT EXISTS appointments_fts_ai AFTER INSERT ON appointments BEGIN
+    INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+    VALUES (new.id, {_FTS_NORMALIZE.format('new.comment')}, {_FTS_NORMALIZE.format('new.name_of_training_session')});
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_fts_ad AFTER DELETE ON appointments BEGIN
+    DELETE FROM appointments_fts WHERE rowid = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_fts_au AFTER UPDATE OF comment, name_of_training_session ON appointments BEGIN
+    DELETE FROM appointments_fts WHERE rowid = old.id;
+    INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+    VALUES (new.id, {_FTS_NORMALIZE.format('new.comment')}, {_FTS_NORMALIZE.format('new.name_of_training_session')});
+END;
+"""
+
+REBUILD_SEARCH_INDEX_SQL = f"""
+DELETE FROM appointments_fts;
+INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+SELECT id, {_FTS_NORMALIZE.format('comment')}, {_FTS_NORMALIZE.format('name_of_training_session')} FROM appointments;
+"""
+
+def create_search_index(conn, rebuild: bool = False) -> None:
+    """
+    Создаёт FTS5-индекс appointments_fts и триггеры синхронизации.
+    Если индекс создаётся впервые (или rebuild=True), заполняет его из appointments.
+    
+    Args:
+        conn: Соединение с базой данных
+        rebuild: Перестроить индекс, даже если он уже существует
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'appointments_fts'"
+    ).fetchone()
+    script = SEARCH_INDEX_SQL
+    if rebuild or not exists:
+        script += REBUILD_SEARCH_INDEX_SQL
+    conn.executescript("BEGIN;" + script + "COMMIT;")
+
+def build_match_query(text: str) -> str:
+    """
+    Превращает пользовательскую строку в выражение MATCH: каждое слово ищется
+    по префиксу («йог» находит «йога», «йоге»), все слова должны присутствовать.
+    """
+    words = re.findall(r"\w+", text.lower().replace("ё", "е"))
+    return " ".join(f'"{word}"*' for word in words)
+
+# Сообщения FTS5 о разборе выражения MATCH (в отличие от ошибок самой базы)
+FTS_SYNTAX_ERRORS = ("syntax error", "unterminated string", "malformed MATCH", "unknown special query",
+                     "no such column")
+
+def query_appointments_fts(conn, text: str, limit: int = 50) -> List[Tuple]:
+    """
+    Полнотекстовый поиск записей по комментарию и названию тренировки через FTS5
+    вместо сканирования таблицы по LIKE '%...%'. Результаты упорядочены по
+    релевантности (bm25, совпадения в комментарии весят больше).
+    Ошибки не перехватываются: некорректное выражение MATCH - ValueError,
+    остальные ошибки базы (например, нет appointments_fts) - sqlite3.Error.
+    
+    Args:
+        conn: Соединение с базой данных
+        text: Строка поиска
+        limit: Максимальное количество результатов
+        
+    Returns:
+        Список найденных записей; последний элемент кортежа - ранг (меньше - релевантнее)
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    cursor = conn.cursor()
+    query = """
+    SELECT 
+        a.id,
+        a.last_name || ' ' || a.first_name as client_name,
+        a.phone,
+        t.last_name || ' ' || t.first_name || ' ' || t.middle_name as trainer_name,
+        a.name_of_training_session,
+        a.comment,
+        a.status,
+        a.appointment_date,
+        bm25(appointments_fts, 2.0, 1.0) as rank
+    FROM appointments_fts
+    JOIN appointments a ON a.id = appointments_fts.rowid
+    LEFT JOIN trainers t ON a.trener_id = t.id
+    WHERE appointments_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+    """
+    try:
+        cursor.execute(query, (match, limit))
+    except sqlite3.OperationalError as e:
+        if any(message in str(e) for message in FTS_SYNTAX_ERRORS):
+            raise ValueError(f"Некорректный поисковый запрос: {e}") from e
+        raise
+    return cursor.fetchall()
+
+def search_appointments(conn, text: str, limit: int = 50) -> List[Tuple]:
+    """
+    То же, что query_appointments_fts, но ошибка выводится и возвращается пустой список.
+    
+    Args:
+        conn: Соединение с базой данных
+        text: Строка поиска
+        limit: Максимальное количество результатов
+        
+    Returns:
+        Список найденных записей; последний элемент кортежа - ранг (меньше - релевантнее)
+    """
+    try:
+        return query_appointments_fts(conn, text, limit)
+    except Exception as e:
+        print(f"Ошибка при полнотекстовом поиске: {e}")
+        return []
+    
+class NameCache:
+    """
+    Соответствие «ФИО тренера -> id» и «название тренировки -> id» для одного соединения.
+    Перечитывается целиком (две небольшие таблицы), если другое соединение
+    зафиксировало изменения (PRAGMA data_version). Ненайденное имя перечитывает
+    таблицы, только если с прошлой загрузки база менялась (data_version или
+    total_changes своего соединения), иначе промах отвечается из кэша.
+    """
+
+    def __init__(self):
+        self.trainers: Dict[Tuple[str, str, str], int] = {}
+        self.workouts: Dict[str, int] = {}
+        self.data_version: Optional[int] = None
+        self.total_changes: Optional[int] = None
+
+    def refresh(self, conn) -> None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_name, first_name, middle_name, id FROM trainers ORDER BY id DESC")
+        self.trainers = {(row[0], row[1], row[2]): row[3] for row in cursor.fetchall()}
+        cursor.execute("SELECT name_of_training_session, id FROM workouts ORDER BY id DESC")
+        # При совпадении названий остаётся тренировка с меньшим id, как и при SELECT ... LIMIT 1
+        self.workouts = {row[0]: row[1] for row in cursor.fetchall()}
+        self.data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+        self.total_changes = conn.total_changes
+
+    def ensure_fresh(self, conn) -> None:
+        if self.data_version != conn.execute("PRAGMA data_version").fetchone()[0]:
+            self.refresh(conn)
+
+    def _refresh_on_miss(self, conn) -> None:
+        # Свои изменения соединения data_version не меняют, поэтому учитываем и total_changes
+        if (self.total_changes != conn.total_changes
+                or self.data_version != conn.execute("PRAGMA data_version").fetchone()[0]):
+            self.refresh(conn)
+
+    def trainer_id(self, conn, name: Tuple[str, str, str]) -> Optional[int]:
+        if name not in self.trainers:
+            self._refresh_on_miss(conn)
+        return self.trainers.get(name)
+
+    def workout_id(self, conn, name: str) -> Optional[int]:
+        if name not in self.workouts:
+            self._refresh_on_miss(conn)
+        return self.workouts.get(name)
+
+class Connection(sqlite3.Connection):
+    """Соединение sqlite3 с поддержкой слабых ссылок: кэш имён живёт столько же, сколько соединение"""
+
+def connect(path: str = DB_PATH, **kwargs) -> sqlite3.Connection:
+    """Открывает соединение, для которого кэш имён сохраняется между вызовами"""
+    kwargs.setdefault("factory", Connection)
+    return sqlite3.connect(path, **kwargs)
+
+# Кэши по соединениям; записи исчезают вместе с соединением
+_NAME_CACHES: "weakref.WeakKeyDictionary[sqlite3.Connection, NameCache]" = weakref.WeakKeyDictionary()
+
+def get_name_cache(conn) -> NameCache:
+    """
+    Кэш имён соединения. Обычный sqlite3.Connection слабых ссылок не поддерживает —
+    для него кэш новый на каждый вызов (таблицы читаются один раз на пакет записей);
+    соединения из connect() и другие наследники sqlite3.Connection хранят кэш между вызовами
+    """
+    try:
+        return _NAME_CACHES.setdefault(conn, NameCache())
+    except TypeError:
+        return NameCache()
+
+def invalidate_name_cache(conn=None) -> None:
+    """Сбрасывает кэш имён (для соединения conn или для всех), например после переименования тренера"""
+    if conn is None:
+        _NAME_CACHES.clear()
+    else:
+        try:
+            _NAME_CACHES.pop(conn, None)
+        except TypeError:
+            pass
+
+def _prepare_booking(conn, names: NameCache, client_name: str, client_phone: str, trainer_name: str,
+                     workouts_list: List[str], comment: Optional[str]) -> Tuple[tuple, List[int]]:
+    # Разделяем имя клиента на части
+    name_parts = client_name.split()
+    if len(name_parts) < 2:
+        raise ValueError("Имя клиента должно содержать фамилию и имя")
+    
+    # Разделяем имя тренера на части
+    trainer_parts = trainer_name.split()
+    if len(trainer_parts) < 3:
+        raise ValueError("Имя тренера должно содержать фамилию, имя и отчество")
+    if not workouts_list:
+        raise ValueError("Список тренировок не должен быть пустым")
+    
+    trainer_id = names.trainer_id(conn, tuple(trainer_parts[:3]))
+    if trainer_id is None:
+        raise ValueError(f"Тренер {trainer_name} не найден")
+    
+    # Неизвестные тренировки пропускаются, повторы связываются один раз
+    workout_ids = [names.workout_id(conn, workout_name) for workout_name in workouts_list]
+    workout_ids = list(dict.fromkeys(w for w in workout_ids if w is not None))
+    row = (name_parts[0], name_parts[1], client_phone, trainer_id, workouts_list[0], comment or "")
+    return row, workout_ids
+
+def create_appointments(conn, bookings: List[dict]) -> List[int]:
+    """
+    Создаёт несколько записей одной транзакцией. Каждая запись - словарь с ключами
+    client_name, client_phone, trainer_name, workouts_list и необязательным comment.
+    Тренеры и тренировки ищутся по кэшу имён, связи с тренировками вставляются
+    одним executemany.
+    
+    Args:
+        conn: Соединение с базой данных
+        bookings: Список записей
+        
+    Returns:
+        Список ID созданных записей в порядке bookings; -1 для записей с ошибкой
+        (при ошибке базы данных откатываются все записи)
+    """
+    names = get_name_cache(conn)
+    ids = [-1] * len(bookings)
+    try:
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            # IMMEDIATE сразу берёт блокировку записи и не упирается в SQLITE_BUSY при повышении блокировки.
+            # Имена разрешаются уже под блокировкой: удалённый за это время тренер не попадёт в trener_id
+            cursor.execute("BEGIN IMMEDIATE")
+        names.ensure_fresh(conn)
+        prepared = []
+        for index, booking in enumerate(bookings):
+            try:
+                prepared.append((index, *_prepare_booking(
+                    conn, names, booking["client_name"], booking["client_phone"], booking["trainer_name"],
+                    booking["workouts_list"], booking.get("comment"))))
+            except (ValueError, KeyError) as e:
+                print(f"Запись {index + 1} не создана: {e}")
+        if not prepared:
+            conn.commit()
+            return ids
+        
+        links = []
+        for index, row, workout_ids in prepared:
+            cursor.execute("""
+                INSERT INTO appointments (last_name, first_name, phone, trener_id, name_of_training_session, comment)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, row)
+            ids[index] = cursor.lastrowid
+            links.extend((cursor.lastrowid, workout_id) for workout_id in workout_ids)
+        
+        # Связываем записи с тренировками
+        cursor.executemany("""
+            INSERT INTO appointments_workouts (appointment_id, workout_id)
+            VALUES (?, ?)
+        """, links)
+        conn.commit()
+        return ids
+        
+    except Exception as e:
+        print(f"Ошибка при создании записей: {e}")
+        conn.rollback()
+        return [-1] * len(bookings)
+
 def create_appointment(conn, client_name: str, client_phone: str, trainer_name: str, 
                       workouts_list: List[str], comment: str = None) -> int:
     """
     Создаёт новую запись в таблице клиентов, принимает имя клиента, телефон, 
-    имя тренера и список тренировок. Ищет тренера и тренировки по именам, 
-    вставляет запись в базу, связывает её с тренировками. Возвращает ID созданной записи.
+    имя тренера и список тренировок. Ищет тренера и тренировки по именам 
+    (через кэш имён), вставляет запись и связи с тренировками одной транзакцией.
+    Возвращает ID созданной записи.
     
     Args:
         conn: Соединение с базой данных
@@ -132,73 +475,20 @@ def create_appointment(conn, client_name: str, client_phone: str, trainer_name:
     Returns:
         ID созданной записи или -1 при ошибке
     """
-    try:
-        cursor = conn.cursor()
-        
-        # Разделяем имя клиента на части
-        name_parts = client_name.split()
-        if len(name_parts) < 2:
-            print("Имя клиента должно содержать фамилию и имя")
-            return -1
-        
-        client_last_name = name_parts[0]
-        client_first_name = name_parts[1]
-        client_middle_name = name_parts[2] if len(name_parts) > 2 else ""
-        
-        # Разделяем имя тренера на части
-        trainer_parts = trainer_name.split()
-        if len(trainer_parts) < 3:
-            print("Имя тренера должно содержать фамилию, имя и отчество")
-            return -1
-        
-        trainer_last_name = trainer_parts[0]
-        trainer_first_name = trainer_parts[1]
-        trainer_middle_name = trainer_parts[2]
-        
-        # Ищем тренера по имени
-        cursor.execute("""
-            SELECT id FROM trainers 
-            WHERE last_name = ? AND first_name = ? AND middle_name = ?
-        """, (trainer_last_name, trainer_first_name, trainer_middle_name))
-        
-        trainer_result = cursor.fetchone()
-        if not trainer_result:
-            print(f"Тренер {trainer_name} не найден")
-            return -1
-        
-        trainer_id = trainer_result[0]
-        
-        # Создаем запись в таблице appointments
-        cursor.execute("""
-            INSERT INTO appointments (last_name, first_name, phone, trener_id, name_of_training_session, comment)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (client_last_name, client_first_name, client_phone, trainer_id, workouts_list[0], comment or ""))
-        
-        appointment_id = cursor.lastrowid
-        
-        # Связываем запись с тренировками
-        for workout_name in workouts_list:
-            cursor.execute("SELECT id FROM workouts WHERE name_of_training_session = ?", (workout_name,))
-            workout_result = cursor.fetchone()
-            if workout_result:
-                workout_id = workout_result[0]
-                cursor.execute("""
-                    INSERT INTO appointments_workouts (appointment_id, workout_id)
-                    VALUES (?, ?)
-                """, (appointment_id, workout_id))
-        
-        conn.commit()
+    appointment_id = create_appointments(conn, [{
+        "client_name": client_name,
+        "client_phone": client_phone,
+        "trainer_name": trainer_name,
+        "workouts_list": workouts_list,
+        "comment": comment,
+    }])[0]
+    if appointment_id > 0:
         print(f"Запись создана с ID: {appointment_id}")
-        return appointment_id
-        
-    except Exception as e:
-        print(f"Ошибка при создании записи: {e}")
-        conn.rollback()
-        return -1
+    return appointment_id
     
 if __name__ == "__main__":
     # Создание соединения с базой данных
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     
     try:
         print("=" * 60)
@@ -229,6 +519,14 @@ if __name__ == "__main__":
         for appointment in appointments_by_comment:
             print(f"  - ID: {appointment[0]}, Клиент: {appointment[1]}, Комментарий: {appointment[5]}")
         
+        # Тест 3.1: Полнотекстовый поиск
+        print("\n3.1. Тест полнотекстового поиска:")
+        create_search_index(conn)
+        found = search_appointments(conn, "ЙОГ помощь")
+        print(f"Найдено записей по запросу 'ЙОГ помощь': {len(found)}")
+        for appointment in found:
+            print(f"  - ID: {appointment[0]}, Клиент: {appointment[1]}, Комментарий: {appointment[5]}")
+        
         # Тест 4: Создание новой записи
         print("\n4. Тест создания новой записи:")
         new_appointment_id = create_appointment(
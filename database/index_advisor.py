@@ -0,0 +1,610 @@
+"""
+Советник по индексам: EXPLAIN QUERY PLAN по настоящим запросам приложения.
+
+Запросы собираются прогоном на временной копии базы, приведённой к текущей схеме через init_db():
+  - сценарии benchmarks/load.py (ROUNDS запросов на маршрут) и все варианты sort_by/direction
+    у списков записей и тренеров — через Flask test client; SQL с параметрами берётся из журнала
+    peewee (логгер 'peewee'), время — из query_hook пула;
+  - функции слоя sqlite3 (database/fitness_database.py) из benchmarks/micro.py — через соединение,
+    которое записывает выполненные операторы.
+
+Для каждого различного оператора SELECT/UPDATE/DELETE строится план и отмечаются полные
+просмотры таблиц (SCAN) и временные B-деревья (USE TEMP B-TREE для ORDER BY, GROUP BY,
+DISTINCT). Таблицы меньше MIN_ROWS строк не рассматриваются. Для отмеченных таблиц из
+условий WHERE/ON (равенства, затем диапазон) и ORDER BY составляются индексы-кандидаты.
+Каждый кандидат создаётся на копии, план строится заново, время оператора измеряется с
+индексом и без него (медиана REPEAT выполнений). Кандидат принимается, если из плана ушла
+отмеченная операция и измеренное ускорение не меньше MIN_SPEEDUP.
+
+Оценка ускорения — модель в строках: поиск по индексу log2(N) плюс просмотренные строки
+(N при SCAN, N / число различных значений колонок равенства при SEARCH, /4 на каждую границу
+диапазона), сортировка m·log2(m) (m·log2(LIMIT) при LIMIT); при LIMIT без сортировки просмотр
+заканчивается, когда набрано LIMIT подходящих строк. Постоянные затраты (разбор, выдача строк
+в Python, соединения) модель не учитывает, поэтому для быстрых после индекса операторов оценка
+выше измеренной; расхождение в разы при медленном операторе значит, что модель не учла фильтр
+или порядок данных.
+
+--apply создаёт принятые индексы в самой базе, каждый в своей транзакции. Чтобы индекс
+остался в схеме, его нужно добавить в миграции (database/migrate.py) и модели: для этого
+выводятся строки ensure_indexes(...).
+Запуск: python -m database.index_advisor [10k|1m|10m|файл.db] [--rounds 3] [--repeat 15] [--apply] [--json файл]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ROUNDS = 3
+REPEAT = 15
+MIN_ROWS = 1000
+MIN_SPEEDUP = 1.2
+# Колонок в индексе-кандидате не больше
+MAX_COLUMNS = 4
+SQL_PREVIEW = 160
+
+Log = Callable[[str], None]
+
+# ---- сбор запросов ----
+
+class Workload:
+    """Различные операторы прогона: пример параметров, число выполнений и суммарное время"""
+
+    def __init__(self):
+        self.statements: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def key(sql: str) -> str:
+        # Списки IN (?, ?, ...) разной длины — один и тот же оператор
+        return re.sub(r"\(\?(?:\s*,\s*\?)+\)", "(?, ...)", " ".join(sql.split()))
+
+    def add(self, sql: str, params: Any, source: str, seconds: Optional[float] = None) -> None:
+        if not re.match(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", sql, re.IGNORECASE):
+            return
+        entry = self.statements.get(self.key(sql))
+        if entry is None:
+            entry = self.statements[self.key(sql)] = {"sql": sql, "params": params, "source": source,
+                                                      "calls": 0, "seconds": 0.0}
+        entry["calls"] += 1
+        if seconds is not None:
+            entry["seconds"] += seconds
+
+    def timed(self, sql: str, seconds: float) -> None:
+        entry = self.statements.get(self.key(sql))
+        if entry is not None:
+            entry["seconds"] += seconds
+
+class _PeeweeLog(logging.Handler):
+    """Журнал peewee: каждое сообщение — кортеж (sql, параметры)"""
+
+    def __init__(self, workload: Workload):
+        super().__init__(logging.DEBUG)
+        self.workload = workload
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, tuple) and len(record.msg) == 2:
+            self.workload.add(record.msg[0], record.msg[1], "peewee")
+
+class _TracingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        workload = self.connection.workload
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            if workload is not None:
+                workload.add(sql, parameters, "sqlite3", time.perf_counter() - started)
+
+class _TracingConnection(sqlite3.Connection):
+    """Соединение слоя sqlite3, записывающее выполненные операторы в workload"""
+    workload: Optional[Workload] = None
+
+    def cursor(self, factory=_TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+def _requests(ctx, rnd: random.Random, rounds: int, skipped: List[str]) -> Iterable[Tuple[str, str, str, Any]]:
+    from benchmarks import load
+    from blueprints.appointments.routes import SORT_FIELDS as APPOINTMENT_SORT_FIELDS
+    from blueprints.trainers.routes import SORT_FIELDS as TRAINER_SORT_FIELDS
+
+    for endpoint, scenario in load.SCENARIOS.items():
+        for _ in range(rounds):
+            try:
+                request = scenario(ctx, rnd)
+            except ValueError:
+                # Сценарию не из чего строить запрос: например, в базе нет клиентов
+                skipped.append(endpoint)
+                break
+            if request is None:
+                break
+            yield (endpoint,) + request
+    for path, fields in (("/appointments", APPOINTMENT_SORT_FIELDS), ("/trainers", TRAINER_SORT_FIELDS)):
+        for field in fields:
+            for direction in ("asc", "desc"):
+                yield "sort", "GET", f"{path}?limit=50&sort_by={field}&direction={direction}", None
+
+def capture(path: str, rounds: int = ROUNDS, seed: int = 42, log: Log = print) -> Workload:
+    """Прогоняет сценарии API и функции слоя sqlite3 по базе path (она изменяется)"""
+    from app import app, init_db
+    from benchmarks import load, micro
+    from database.peewee_models import InstrumentedPooledSqliteDatabase
+    from models import DB, Appointments, Clients, Trainers
+
+    workload = Workload()
+    rnd = random.Random(seed)
+    DB.init(path)
+    # Схема приводится к текущей так же, как при запуске приложения (миграции, триггеры, FTS)
+    init_db()
+    with DB.connection_context():
+        counts = {"trainers": Trainers.select().count(), "clients": Clients.select().count(),
+                  "appointments": Appointments.select().count()}
+    ctx = load.Context(counts)
+    client = app.test_client()
+
+    logger = logging.getLogger("peewee")
+    handler, level = _PeeweeLog(workload), logger.level
+    previous_hook = InstrumentedPooledSqliteDatabase.query_hook
+
+    def hook(sql: str, seconds: float) -> None:
+        workload.timed(sql, seconds)
+        if previous_hook is not None:
+            previous_hook(sql, seconds)
+
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    InstrumentedPooledSqliteDatabase.query_hook = hook
+    unexpected: Dict[str, int] = {}
+    skipped: List[str] = []
+    try:
+        for endpoint, method, url, body in _requests(ctx, rnd, rounds, skipped):
+            response = client.open(url, method=method, headers=load.HEADERS, json=body)
+            if response.status_code in (200, 201):
+                load._remember(ctx, endpoint, response.get_json(silent=True))
+            elif response.status_code >= 400:
+                key = f"{endpoint} {response.status_code}"
+                unexpected[key] = unexpected.get(key, 0) + 1
+    finally:
+        InstrumentedPooledSqliteDatabase.query_hook = previous_hook
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+    if skipped:
+        log(f"Сценарии пропущены (нет данных для запросов): {', '.join(skipped)}")
+    if unexpected:
+        log(f"Внимание: ответы с неожиданным статусом: {', '.join(f'{k} ×{n}' for k, n in unexpected.items())}")
+
+    conn = sqlite3.connect(path, factory=_TracingConnection)
+    try:
+        cases = micro._sqlite_cases(conn, rnd)
+        conn.workload = workload
+        for fn in cases.values():
+            for _ in range(rounds):
+                fn()
+    except (ValueError, sqlite3.Error) as e:
+        # Например, в базе нет клиентов, из которых micro строит аргументы
+        log(f"Запросы слоя sqlite3 пропущены: {e}")
+    finally:
+        conn.close()
+    return workload
+
+
+# ---- схема, разбор SQL и планов ----
+
+class Schema:
+    """Таблицы базы: колонки, псевдоним rowid, число строк, индексы; кэш числа различных значений"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.columns: Dict[str, List[str]] = {}
+        self.rowid: Dict[str, Optional[str]] = {}
+        self.sizes: Dict[str, int] = {}
+        self._distinct: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                     "AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'"):
+            info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self.columns[table] = [row[1] for row in info]
+            keys = [row for row in info if row[5]]
+            # Единственная колонка INTEGER PRIMARY KEY — это rowid, она есть в конце любого индекса
+            self.rowid[table] = keys[0][1] if len(keys) == 1 and keys[0][2].upper() == "INTEGER" else None
+            self.sizes[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    def indexes(self, table: str) -> List[Tuple[str, ...]]:
+        return [tuple(row[2] for row in self.conn.execute(f'PRAGMA index_info("{name}")'))
+                for _, name, *_ in self.conn.execute(f'PRAGMA index_list("{table}")')]
+
+    def distinct(self, table: str, columns: Sequence[str]) -> int:
+        key = (table, tuple(columns))
+        if key not in self._distinct:
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            self._distinct[key] = self.conn.execute(
+                f'SELECT COUNT(*) FROM (SELECT DISTINCT {quoted} FROM "{table}")').fetchone()[0]
+        return self._distinct[key]
+
+_IDENT = r'"?([A-Za-z_]\w*)"?'
+_REF = _IDENT + r"\." + _IDENT
+_BARE = r'(?<![.\w"])' + _IDENT + r'(?!"?\.)'
+_KEYWORDS = {"WHERE", "ON", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "NATURAL", "JOIN", "ORDER", "GROUP",
+             "LIMIT", "SET", "USING", "HAVING", "UNION", "VALUES", "SELECT", "AS", "INDEXED", "NOT"}
+_TABLE = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+" + _IDENT + r"(?:\s+(?:AS\s+)?" + _IDENT + ")?", re.IGNORECASE)
+# {ref} — место ссылки на колонку
+_EQUALITY = (r"{ref}\s*=", r"(?<![!<>=])=\s*{ref}", r"{ref}\s+IN\s*\(", r"{ref}\s+IS\s+(?!NOT\b)")
+_RANGE = (r"{ref}\s*(?:<=|>=|<(?!>)|>)", r"(?:<=|>=|(?<!<)>|<(?!>))\s*{ref}", r"{ref}\s+BETWEEN\b")
+_ACCESS = re.compile(r"^(SCAN|SEARCH) (\S+)(.*)$")
+
+def _aliases(sql: str, schema: Schema) -> Dict[str, str]:
+    """Псевдоним (или имя) -> таблица для таблиц оператора, существующих в базе"""
+    aliases = {}
+    for table, alias in _TABLE.findall(sql):
+        if table not in schema.columns:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+def _single(aliases: Dict[str, str]) -> Optional[str]:
+    # Колонки без псевдонима разбираются, только если таблица в операторе одна
+    return next(iter(aliases)) if len(set(aliases.values())) == 1 else None
+
+def _predicates(sql: str, aliases: Dict[str, str]) -> str:
+    """Часть оператора с условиями: от первого JOIN или WHERE до ORDER BY/GROUP BY/LIMIT.
+
+    Условие соединения a.x = b.y ограничивает только присоединяемую таблицу, поэтому
+    сторона первой таблицы FROM в нём заменяется параметром.
+    """
+    start = re.search(r"\b(?:JOIN|WHERE)\b", sql, re.IGNORECASE)
+    if start is None:
+        return ""
+    text = sql[start.start():]
+    end = re.search(r"\b(?:ORDER\s+BY|GROUP\s+BY|LIMIT)\b(?![^(]*\))", text, re.IGNORECASE)
+    text = text[:end.start()] if end else text
+    first = next(iter(aliases.values()), None)
+
+    def inner_side(match: re.Match) -> str:
+        sides = [side for side in (match.group(1, 2), match.group(3, 4)) if aliases.get(side[0]) != first]
+        return " AND ".join(f'"{alias}"."{column}" = ?' for alias, column in sides) or "1"
+
+    return re.sub(_REF + r"\s*=\s*" + _REF, inner_side, text)
+
+def _columns(text: str, patterns: Sequence[str], aliases: Dict[str, str], schema: Schema) -> List[Tuple[str, str]]:
+    """(псевдоним, колонка) для ссылок на колонки, совпавших с одним из patterns"""
+    found: List[Tuple[str, str]] = []
+    single = _single(aliases)
+    for pattern in patterns:
+        refs = re.findall(pattern.format(ref=_REF), text, re.IGNORECASE)
+        if single:
+            refs += [(single, column) for column in re.findall(pattern.format(ref=_BARE), text, re.IGNORECASE)]
+        for alias, column in refs:
+            if alias in aliases and column in schema.columns[aliases[alias]] and (alias, column) not in found:
+                found.append((alias, column))
+    return found
+
+def _order_by(sql: str, aliases: Dict[str, str], schema: Schema) -> List[Tuple[str, str]]:
+    """Колонки ORDER BY верхнего уровня; пусто, если там выражения или подзапрос"""
+    match = re.search(r"\bORDER\s+BY\s+([^()]*?)\s*(?:\bLIMIT\b|\bOFFSET\b|$)", sql, re.IGNORECASE)
+    if not match:
+        return []
+    refs = []
+    for part in match.group(1).split(","):
+        ref = re.fullmatch(r"\s*(?:" + _IDENT + r"\.)?" + _IDENT + r"(?:\s+(?:ASC|DESC))?\s*", part, re.IGNORECASE)
+        if ref is None:
+            return []
+        alias, column = ref.group(1) or _single(aliases), ref.group(2)
+        if alias not in aliases or column not in schema.columns[aliases[alias]]:
+            return []
+        refs.append((alias, column))
+    return refs
+
+def _limit(sql: str, params: Any) -> Optional[int]:
+    match = re.search(r"\bLIMIT\s+(\?|\d+)", sql, re.IGNORECASE)
+    if not match:
+        return None
+    if match.group(1) != "?":
+        return int(match.group(1))
+    position = sql[:match.start()].count("?")
+    value = params[position] if isinstance(params, (list, tuple)) and position < len(params) else None
+    return value if isinstance(value, int) else None
+
+def _params(params: Any) -> Any:
+    # Те же преобразования, что sqlite3 выполняет для параметров peewee
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return params
+    return [value.isoformat(" ") if isinstance(value, datetime) else
+            value.isoformat() if isinstance(value, date) else value for value in params]
+
+def plan(conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, _params(params))]
+
+def measure(conn: sqlite3.Connection, sql: str, params: Any, repeat: int = REPEAT) -> float:
+    """Медиана времени выполнения с выборкой всех строк, секунды; изменения откатываются"""
+    write = not re.match(r"\s*(SELECT|WITH)\b", sql, re.IGNORECASE)
+    params = _params(params)
+    timings = []
+    # Первое выполнение прогревает кэш страниц и не учитывается
+    for n in range(repeat + 1):
+        if write:
+            conn.execute("BEGIN")
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - started
+        if write:
+            conn.execute("ROLLBACK")
+        if n:
+            timings.append(elapsed)
+    return statistics.median(timings)
+
+def problems(details: List[str], statement: Dict[str, Any], schema: Schema) -> List[Dict[str, Any]]:
+    """Полные просмотры и временные B-деревья в плане (только таблицы от MIN_ROWS строк).
+
+    Просмотр без условий на таблицу при LIMIT и без сортировки не отмечается: строки уже идут
+    в нужном порядке и чтение заканчивается на LIMIT строках.
+    """
+    aliases, order = statement["aliases"], statement["order"]
+    sorting = any(detail.startswith("USE TEMP B-TREE") for detail in details)
+    filtered = {alias for alias, _ in statement["equality"] + statement["range"]}
+    found = []
+    for detail in details:
+        access = _ACCESS.match(detail)
+        if access and access.group(1) == "SCAN":
+            alias = access.group(2)
+            if alias not in aliases or "VIRTUAL TABLE" in detail:
+                continue
+            if statement["limit"] and not sorting and alias not in filtered:
+                continue
+            found.append({"kind": "scan", "alias": alias, "table": aliases[alias], "detail": detail})
+        elif detail.startswith("USE TEMP B-TREE"):
+            # Сортировка относится к таблице первой колонки ORDER BY (для GROUP BY и DISTINCT неизвестна)
+            alias = order[0][0] if order and "ORDER BY" in detail else None
+            found.append({"kind": "temp_btree", "alias": alias, "table": aliases.get(alias), "detail": detail})
+    return [p for p in found if p["table"] is None or schema.sizes[p["table"]] >= MIN_ROWS]
+
+def analyze(conn: sqlite3.Connection, schema: Schema, entry: Dict[str, Any]) -> Dict[str, Any]:
+    sql, params = entry["sql"], entry["params"]
+    aliases = _aliases(sql, schema)
+    predicates = _predicates(sql, aliases)
+    statement = dict(entry, aliases=aliases, order=_order_by(sql, aliases, schema), limit=_limit(sql, params),
+                     equality=_columns(predicates, _EQUALITY, aliases, schema),
+                     range=_columns(predicates, _RANGE, aliases, schema))
+    statement["plan"] = plan(conn, sql, params)
+    statement["problems"] = problems(statement["plan"], statement, schema)
+    statement["trials"] = []
+    return statement
+
+# ---- кандидаты, оценка и проверка ----
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    return f"idx_{table}_{'_'.join(columns)}"
+
+def candidates(statement: Dict[str, Any], alias: str, schema: Schema) -> List[Tuple[str, ...]]:
+    """Наборы колонок индекса для таблицы alias: равенства + ORDER BY, равенства + диапазон, ..."""
+    table = statement["aliases"][alias]
+    rowid = schema.rowid[table]
+    equality = [c for a, c in statement["equality"] if a == alias]
+    if rowid in equality:
+        return []
+    ranges = [c for a, c in statement["range"] if a == alias and c not in equality]
+    order = statement["order"]
+    order = [c for a, c in order] if order and all(a == alias for a, _ in order) else []
+    if rowid in order:
+        # Всё после rowid в порядке уже не влияет, а сам rowid есть в каждом индексе
+        order = order[:order.index(rowid)]
+    order = [c for c in order if c not in equality]
+    existing = schema.indexes(table)
+    result = []
+    for columns in (equality + order, equality + ranges[:1], equality, order):
+        columns = tuple(dict.fromkeys(columns))[:MAX_COLUMNS]
+        if not columns or columns in result:
+            continue
+        if any(index[:len(columns)] == columns for index in existing):
+            continue
+        result.append(columns)
+    return result
+
+def _access(details: List[str], alias: str) -> Tuple[Optional[str], List[str], int]:
+    """Способ доступа к alias в плане: SCAN/SEARCH, колонки равенства и число границ диапазона"""
+    for detail in details:
+        access = _ACCESS.match(detail)
+        if access and access.group(2) == alias:
+            terms = re.search(r"\((.*)\)\s*$", access.group(3))
+            equality, ranges = [], 0
+            for term in terms.group(1).split(" AND ") if terms else []:
+                column = re.match(r"(\w+)(=|>|<)", term)
+                if column and column.group(2) == "=":
+                    equality.append(column.group(1))
+                elif column:
+                    ranges += 1
+            return access.group(1), equality, ranges
+    return None, [], 0
+
+def _rows(schema: Schema, table: str, equality: Sequence[str], ranges: int) -> float:
+    if "rowid" in equality or schema.rowid[table] in equality:
+        return 1.0
+    size = schema.sizes[table]
+    rows = size / max(1, schema.distinct(table, equality)) if equality else float(size)
+    return max(1.0, rows / 4 ** ranges)
+
+def cost(details: List[str], statement: Dict[str, Any], alias: str, schema: Schema) -> float:
+    """Оценка работы с таблицей alias в строках (см. описание модуля)"""
+    table = statement["aliases"][alias]
+    size = schema.sizes[table]
+    kind, equality, ranges = _access(details, alias)
+    visited = _rows(schema, table, equality, ranges) if kind == "SEARCH" else float(size)
+    matched = min(visited, _rows(schema, table, [c for a, c in statement["equality"] if a == alias],
+                                 len([c for a, c in statement["range"] if a == alias])))
+    sorting = any(p["kind"] == "temp_btree" and p["alias"] in (alias, None)
+                  for p in problems(details, statement, schema))
+    if statement["limit"] and not sorting:
+        # Строки идут в нужном порядке: просмотр заканчивается на LIMIT подходящих строках
+        visited = min(visited, statement["limit"] * visited / matched)
+    # При LIMIT сортировщик SQLite держит только LIMIT строк: m·log2(LIMIT) вместо m·log2(m)
+    kept = min(matched, statement["limit"] or matched)
+    return math.log2(max(size, 2)) + visited + (matched * math.log2(max(kept, 2)) if sorting else 0.0)
+
+def advise(path: str, workload: Workload, repeat: int = REPEAT, log: Log = print) -> Dict[str, Any]:
+    """Планы операторов workload на базе path, проверка кандидатов на ней же и предложения"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        schema = Schema(conn)
+        statements = []
+        for entry in workload.statements.values():
+            try:
+                statements.append(analyze(conn, schema, entry))
+            except sqlite3.Error as e:
+                log(f"Оператор пропущен ({e}): {preview(entry['sql'])}")
+        flagged = [s for s in statements if s["problems"]]
+        pending: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[Dict[str, Any], str]]] = {}
+        for statement in flagged:
+            statement["base_seconds"] = measure(conn, statement["sql"], statement["params"], repeat)
+            for alias in dict.fromkeys(p["alias"] for p in statement["problems"] if p["alias"]):
+                for columns in candidates(statement, alias, schema):
+                    pending.setdefault((statement["aliases"][alias], columns), []).append((statement, alias))
+
+        built: Dict[str, float] = {}
+        for (table, columns), uses in pending.items():
+            name = index_name(table, columns)
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            started = time.perf_counter()
+            conn.execute(f'CREATE INDEX "{name}" ON "{table}" ({quoted})')
+            built[name] = (time.perf_counter() - started) * 1000
+            try:
+                for statement, alias in uses:
+                    details = plan(conn, statement["sql"], statement["params"])
+                    seconds = measure(conn, statement["sql"], statement["params"], repeat)
+                    before = [p for p in statement["problems"] if p["table"] in (table, None)]
+                    after = [p for p in problems(details, statement, schema) if p["table"] in (table, None)]
+                    measured = statement["base_seconds"] / seconds if seconds else float("inf")
+                    statement["trials"].append({
+                        "index": name, "table": table, "columns": list(columns), "plan": details,
+                        "seconds": seconds, "measured": measured,
+                        "estimated": cost(statement["plan"], statement, alias, schema)
+                        / cost(details, statement, alias, schema),
+                        "accepted": len(after) < len(before) and measured >= MIN_SPEEDUP,
+                    })
+            finally:
+                conn.execute(f'DROP INDEX "{name}"')
+
+        proposals: Dict[str, Dict[str, Any]] = {}
+        for statement in flagged:
+            accepted = [t for t in statement["trials"] if t["accepted"]]
+            if not accepted:
+                continue
+            best = max(accepted, key=lambda t: t["measured"])
+            statement["chosen"] = best["index"]
+            proposal = proposals.setdefault(best["index"], {
+                "index": best["index"], "table": best["table"], "columns": best["columns"],
+                "build_ms": built[best["index"]], "statements": 0, "calls": 0, "saved_ms": 0.0})
+            proposal["statements"] += 1
+            proposal["calls"] += statement["calls"]
+            proposal["saved_ms"] += statement["calls"] * (statement["base_seconds"] - best["seconds"]) * 1000
+    finally:
+        conn.close()
+    return {
+        "statements": len(statements),
+        "flagged": [{key: s.get(key) for key in ("sql", "source", "calls", "seconds", "plan", "problems",
+                                                  "base_seconds", "trials", "chosen")} for s in flagged],
+        "proposals": sorted(proposals.values(), key=lambda p: p["saved_ms"], reverse=True),
+    }
+
+def apply(path: str, proposals: List[Dict[str, Any]], log: Log = print) -> None:
+    """Создаёт предложенные индексы в базе path, каждый в своей транзакции"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        for proposal in proposals:
+            quoted = ", ".join(f'"{c}"' for c in proposal["columns"])
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{proposal["index"]}" ON "{proposal["table"]}" ({quoted})')
+            conn.execute("COMMIT")
+            log(f"создан {proposal['index']}: {(time.perf_counter() - started) * 1000:.1f} мс")
+    finally:
+        conn.close()
+
+# ---- отчёт ----
+
+def preview(sql: str) -> str:
+    sql = re.sub(r"^\s*SELECT\s+.*?\s+FROM\b", "SELECT … FROM", " ".join(sql.split()), count=1)
+    if len(sql) <= SQL_PREVIEW:
+        return sql
+    half = SQL_PREVIEW // 2
+    return f"{sql[:half]} … {sql[-half:]}"
+
+def print_report(report: Dict[str, Any], log: Log = print) -> None:
+    log(f"Операторов: {report['statements']}, с полным просмотром или временным B-деревом: {len(report['flagged'])}")
+    for statement in report["flagged"]:
+        log("")
+        log(f"{preview(statement['sql'])}")
+        log(f"  {statement['source']}, вызовов {statement['calls']}, "
+            f"{statement['base_seconds'] * 1000:.3f} мс на вызов; план: {'; '.join(statement['plan'])}")
+        if not statement["trials"]:
+            log("  кандидатов нет: условия и порядок не разобраны или уже покрыты индексами")
+        for trial in statement["trials"]:
+            mark = "принят" if trial["accepted"] else ""
+            if trial["index"] == statement["chosen"]:
+                mark = "выбран"
+            log(f"  {trial['index']:48} оценка ×{trial['estimated']:<9.1f} измерено ×{trial['measured']:<9.1f} {mark}")
+    log("")
+    if not report["proposals"]:
+        log("Предложений нет")
+        return
+    log("Предложения (по сэкономленному за прогон времени):")
+    for p in report["proposals"]:
+        log(f"  {p['index']} ON {p['table']} ({', '.join(p['columns'])}): операторов {p['statements']}, "
+            f"вызовов {p['calls']}, экономия {p['saved_ms']:.1f} мс, сборка {p['build_ms']:.1f} мс")
+    log("Для database/migrate.py:")
+    for table in dict.fromkeys(p["table"] for p in report["proposals"]):
+        indexes = ", ".join(f'("{p["index"]}", {json.dumps(p["columns"])})'
+                            for p in report["proposals"] if p["table"] == table)
+        log(f'  ensure_indexes("{table}", [{indexes}]),')
+
+def main() -> None:
+    from benchmarks import datagen
+
+    parser = argparse.ArgumentParser(description="Поиск недостающих индексов по планам запросов приложения")
+    parser.add_argument("target", nargs="?", default="10k", help="размер синтетической базы или файл базы")
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="запросов на сценарий при сборе")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="выполнений оператора при замере")
+    parser.add_argument("--apply", action="store_true", help="создать предложенные индексы в файле базы")
+    parser.add_argument("--json", help="записать отчёт в файл")
+    args = parser.parse_args()
+    is_file = os.path.exists(args.target)
+    if args.apply and not is_file:
+        parser.error("--apply применяется только к файлу базы, а не к синтетическому набору")
+    source = args.target if is_file else datagen.dataset(args.target, args.seed)
+
+    # Сбор изменяет базу (сценарии создают и удаляют записи), поэтому всё идёт на копии
+    directory = tempfile.mkdtemp(prefix="body_fit_advisor")
+    scratch = os.path.join(directory, "advisor.db")
+    try:
+        with sqlite3.connect(f"file:{source}?mode=ro", uri=True) as src, sqlite3.connect(scratch) as dst:
+            src.backup(dst)
+        print(f"Сбор запросов на копии {source}...")
+        workload = capture(scratch, args.rounds, args.seed)
+        report = advise(scratch, workload, args.repeat)
+    finally:
+        from models import DB
+        DB.writer.close_all()
+        DB.reader.close_all()
+        shutil.rmtree(directory, ignore_errors=True)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.apply and report["proposals"]:
+        apply(args.target, report["proposals"])
+
+if __name__ == "__main__":
+    main()
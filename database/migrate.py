@@ -0,0 +1,475 @@
+"""
+Версионные миграции схемы: одна база для SQL-скриптов (complete_database.sql, слой sqlite3)
+и моделей peewee.
+
+Миграции пронумерованы и применяются по порядку; номер применённой записывается в таблицу
+schema_version вместе со временем и длительностью. Шаги идемпотентны: каждый сначала
+проверяет схему (needed) и пропускается, если изменение уже есть, поэтому миграции
+безопасно применять и к базе из скрипта, и к базе из моделей, и к старой BODY_FIT.db,
+а прерванную миграцию — просто запустить заново.
+
+Чтобы выкладка не блокировала запись на минуты, тяжёлые шаги разбиты на короткие транзакции:
+  - каждый индекс строится в своей транзакции, а не все сразу (SQLite строит один индекс
+    одним оператором; читатели в WAL при этом не ждут);
+  - пересборка таблицы — копирование с подменой: новая таблица заполняется пачками
+    по BATCH_SIZE строк, изменения, сделанные приложением во время копирования,
+    переносятся триггерами, а под блокировкой выполняется только сама подмена
+    (DROP + RENAME + триггеры); неуникальные индексы затем строятся по одному.
+
+Несколько процессов (например, экземпляры приложения, вызывающие init_db() при старте)
+выполняют migrate() по очереди: на время прогона берётся блокировка файла <база>-migrate.lock,
+а после её получения и перед записью каждой миграции schema_version перечитывается —
+миграции, уже записанные другим процессом, пропускаются.
+
+Запуск: python -m database.migrate [--db файл] [--dry-run] [--to N] [--batch N] [--status]
+"""
+import argparse
+import contextlib
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from database.peewee_models import DB, MODELS
+
+BATCH_SIZE = int(os.environ.get("BODY_FIT_MIGRATE_BATCH", 5000))
+
+SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    duration_ms REAL NOT NULL
+)
+"""
+
+Log = Callable[[str], None]
+
+class Step:
+    """Шаг миграции: needed(db) — нужен ли он для текущей схемы, apply(db, batch_size, log) — выполнение"""
+
+    def __init__(self, description: str, apply: Callable[[Any, int, Log], None],
+                 needed: Callable[[Any], bool] = lambda db: True):
+        self.description = description
+        self.apply = apply
+        self.needed = needed
+
+# Номер -> (имя, функция, возвращающая шаги)
+MIGRATIONS: Dict[int, Tuple[str, Callable[[], List[Step]]]] = {}
+
+def migration(version: int, name: str):
+    """Регистрирует миграцию; номера не переиспользуются и не меняются после выкладки"""
+    def register(fn: Callable[[], List[Step]]) -> Callable[[], List[Step]]:
+        if version in MIGRATIONS:
+            raise ValueError(f"Миграция {version} уже объявлена")
+        MIGRATIONS[version] = (name, fn)
+        return fn
+    return register
+
+# --- Сведения о схеме ---
+
+def table_exists(db, table: str) -> bool:
+    return db.execute_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+def index_exists(db, name: str) -> bool:
+    return db.execute_sql("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone() is not None
+
+def table_columns(db, table: str) -> List[Tuple[str, Optional[str], int]]:
+    """(имя, значение по умолчанию, позиция в первичном ключе) для каждой колонки"""
+    return [(row[1], row[4], row[5]) for row in db.execute_sql(f'PRAGMA table_info("{table}")').fetchall()]
+
+def row_count(db, table: str) -> int:
+    return db.execute_sql(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+def _max_rowid(db, table: str) -> int:
+    return db.execute_sql(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"').fetchone()[0]
+
+def _ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+def copy_rows(db, source: str, target: str, columns: Sequence[str], target_columns: Sequence[str] = None,
+              batch_size: int = BATCH_SIZE, log: Log = print) -> int:
+    """Копирует строки source в target пачками по rowid, каждая пачка — своя транзакция.
+
+    Уже существующие в target строки (по ключу) не перезаписываются.
+    """
+    select = ", ".join(f'"{c}"' for c in columns)
+    insert = ", ".join(f'"{c}"' for c in (target_columns or columns))
+    sql = (f'INSERT OR IGNORE INTO "{target}" ({insert}) SELECT {select} FROM "{source}" '
+           f'WHERE rowid > ? AND rowid <= ? ORDER BY rowid')
+    last, end, copied, batches = 0, _max_rowid(db, source), 0, 0
+    started = time.perf_counter()
+    while last < end:
+        # IMMEDIATE: блокировка записи берётся сразу (с ожиданием busy_timeout), а не при
+        # первой записи, где при параллельном писателе SQLite сразу вернул бы SQLITE_BUSY
+        with db.atomic(lock_type="IMMEDIATE"):
+            copied += db.execute_sql(sql, (last, last + batch_size)).rowcount
+        last += batch_size
+        batches += 1
+    log(f"      скопировано строк: {copied} ({batches} пачек по {batch_size}, {_ms(started):.1f} мс)")
+    return copied
+
+# --- Пересборка таблицы копированием с подменой ---
+
+def _mirror_triggers(table: str, new: str, columns: Sequence[str], key: Sequence[str]) -> Dict[str, str]:
+    names = ", ".join(f'"{c}"' for c in columns)
+    values = ", ".join(f'NEW."{c}"' for c in columns)
+    match = " AND ".join(f'"{c}" = OLD."{c}"' for c in key)
+    upsert = f'INSERT OR REPLACE INTO "{new}" ({names}) VALUES ({values});'
+    return {
+        f"{table}__migrate_ai": f'AFTER INSERT ON "{table}" BEGIN {upsert} END',
+        f"{table}__migrate_au": f'AFTER UPDATE ON "{table}" BEGIN DELETE FROM "{new}" WHERE {match}; {upsert} END',
+        f"{table}__migrate_ad": f'AFTER DELETE ON "{table}" BEGIN DELETE FROM "{new}" WHERE {match}; END',
+    }
+
+def rebuild_table(db, table: str, definition: str, batch_size: int = BATCH_SIZE, log: Log = print) -> None:
+    """Пересоздаёт table по definition (CREATE TABLE с {table} вместо имени), сохраняя строки.
+
+    Индексы и триггеры старой таблицы создаются заново; колонки, которых нет в новой
+    таблице, отбрасываются, новые получают значения по умолчанию.
+    """
+    new, old = f"{table}__new", f"{table}__old"
+    drop_table_in_batches(db, old, batch_size, log)
+    old_columns = table_columns(db, table)
+    key = [name for name, _, pk in sorted(old_columns, key=lambda c: c[2]) if pk] or ["rowid"]
+    saved = db.execute_sql(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL AND name NOT LIKE ?", (table, f"{table}__migrate_%")).fetchall()
+    triggers = [(name, sql) for kind, name, sql in saved if kind == "trigger"]
+    indexes = [(name, sql) for kind, name, sql in saved if kind == "index"]
+
+    started = time.perf_counter()
+    with db.atomic(lock_type="IMMEDIATE"):
+        # Остатки прерванной пересборки
+        for name in _mirror_triggers(table, new, [], key):
+            db.execute_sql(f'DROP TRIGGER IF EXISTS "{name}"')
+        db.execute_sql(f'DROP TABLE IF EXISTS "{new}"')
+        db.execute_sql(definition.format(table=new))
+        new_names = {name for name, _, _ in table_columns(db, new)}
+        columns = [name for name, _, _ in old_columns if name in new_names]
+        for name, body in _mirror_triggers(table, new, columns, key).items():
+            db.execute_sql(f'CREATE TRIGGER "{name}" {body}')
+    log(f"      новая таблица {new} и триггеры переноса изменений: {_ms(started):.1f} мс")
+
+    copy_rows(db, table, new, columns, batch_size=batch_size, log=log)
+
+    sequence = None
+    if table_exists(db, "sqlite_sequence"):
+        row = db.execute_sql("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        sequence = row[0] if row else None
+    foreign_keys = db.execute_sql("PRAGMA foreign_keys").fetchone()[0]
+    # Внешние ключи дочерних таблиц (appointments_workouts, waitlist) должны по-прежнему
+    # ссылаться на имя table, а не переехать вслед за старой таблицей на table__old
+    db.execute_sql("PRAGMA foreign_keys = OFF")
+    db.execute_sql("PRAGMA legacy_alter_table = ON")
+    try:
+        started = time.perf_counter()
+        # Старая таблица не удаляется под блокировкой (DROP освобождает все её страницы),
+        # а переименовывается и очищается пачками после подмены
+        with db.atomic(lock_type="IMMEDIATE"):
+            for name in _mirror_triggers(table, new, columns, key):
+                db.execute_sql(f'DROP TRIGGER IF EXISTS "{name}"')
+            for name, _ in triggers:
+                db.execute_sql(f'DROP TRIGGER "{name}"')
+            for name, _ in indexes:
+                db.execute_sql(f'DROP INDEX "{name}"')
+            db.execute_sql(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+            db.execute_sql(f'ALTER TABLE "{new}" RENAME TO "{table}"')
+            if sequence is not None:
+                # Номера удалённых строк не выдаются повторно (AUTOINCREMENT)
+                db.execute_sql("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence, table))
+            for name, sql in triggers:
+                db.execute_sql(sql)
+            for name, sql in indexes:
+                # Уникальные индексы — ограничения, без них таблицу нельзя отдавать приложению
+                if re.match(r"\s*CREATE\s+UNIQUE", sql, re.IGNORECASE):
+                    db.execute_sql(sql)
+        log(f"      подмена таблицы (под блокировкой записи): {_ms(started):.1f} мс")
+    finally:
+        db.execute_sql("PRAGMA legacy_alter_table = OFF")
+        db.execute_sql(f"PRAGMA foreign_keys = {int(foreign_keys)}")
+    for name, sql in indexes:
+        if not re.match(r"\s*CREATE\s+UNIQUE", sql, re.IGNORECASE):
+            _create_index(db, name, sql, log)
+    drop_table_in_batches(db, old, batch_size, log)
+    violations = db.execute_sql(f'PRAGMA foreign_key_check("{table}")').fetchall()
+    if violations:
+        log(f"      внимание: строк с нарушенными внешними ключами в {table}: {len(violations)}")
+
+def drop_table_in_batches(db, table: str, batch_size: int = BATCH_SIZE, log: Log = print) -> None:
+    """Удаляет таблицу, сначала очищая её пачками, чтобы не держать блокировку записи долго"""
+    if not table_exists(db, table):
+        return
+    started, deleted = time.perf_counter(), 0
+    while True:
+        with db.atomic(lock_type="IMMEDIATE"):
+            count = db.execute_sql(f'DELETE FROM "{table}" WHERE rowid IN '
+                                   f'(SELECT rowid FROM "{table}" LIMIT ?)', (batch_size,)).rowcount
+        deleted += count
+        if count < batch_size:
+            break
+    with db.atomic(lock_type="IMMEDIATE"):
+        db.execute_sql(f'DROP TABLE "{table}"')
+    log(f"      удалена {table} ({deleted} строк пачками по {batch_size}, {_ms(started):.1f} мс)")
+
+def _create_index(db, name: str, sql: str, log: Log) -> None:
+    started = time.perf_counter()
+    with db.atomic(lock_type="IMMEDIATE"):
+        db.execute_sql(sql)
+    log(f"      индекс {name}: {_ms(started):.1f} мс")
+
+# --- Типовые шаги ---
+
+def ensure_indexes(table: str, indexes: Sequence[Tuple[str, Sequence[str]]]) -> Step:
+    """Создаёт недостающие индексы (имя, колонки) — каждый в своей транзакции"""
+    def missing(db) -> List[Tuple[str, Sequence[str]]]:
+        if not table_exists(db, table):
+            return []
+        return [(name, columns) for name, columns in indexes if not index_exists(db, name)]
+
+    def apply(db, batch_size: int, log: Log) -> None:
+        for name, columns in missing(db):
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            _create_index(db, name, f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})', log)
+
+    names = ", ".join(name for name, _ in indexes)
+    return Step(f"индексы {table}: {names}", apply, lambda db: bool(missing(db)))
+
+def drop_indexes(names: Sequence[str], reason: str) -> Step:
+    def apply(db, batch_size: int, log: Log) -> None:
+        with db.atomic(lock_type="IMMEDIATE"):
+            for name in names:
+                db.execute_sql(f'DROP INDEX IF EXISTS "{name}"')
+
+    return Step(f"удаление индексов {', '.join(names)}: {reason}", apply,
+                lambda db: any(index_exists(db, name) for name in names))
+
+def merge_table(old: str, new: str, renamed_columns: Dict[str, str] = None) -> Step:
+    """Старая таблица old становится new: переименованием или, если new уже есть, переносом строк"""
+    renamed_columns = renamed_columns or {}
+
+    def apply(db, batch_size: int, log: Log) -> None:
+        old_indexes = [name for (name,) in db.execute_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (old,)).fetchall()]
+        if not table_exists(db, new):
+            with db.atomic(lock_type="IMMEDIATE"):
+                db.execute_sql(f'ALTER TABLE "{old}" RENAME TO "{new}"')
+                for column, renamed in renamed_columns.items():
+                    db.execute_sql(f'ALTER TABLE "{new}" RENAME COLUMN "{column}" TO "{renamed}"')
+                # Индексы с прежними именами заменит шаг создания индексов
+                for name in old_indexes:
+                    db.execute_sql(f'DROP INDEX IF EXISTS "{name}"')
+            log(f"      {old} переименована в {new}")
+            return
+        columns = [name for name, _, _ in table_columns(db, old)]
+        copy_rows(db, old, new, columns, [renamed_columns.get(c, c) for c in columns], batch_size, log)
+        with db.atomic(lock_type="IMMEDIATE"):
+            db.execute_sql(f'DROP TABLE "{old}"')
+
+    return Step(f"{old} -> {new}", apply, lambda db: table_exists(db, old))
+
+# --- Миграции ---
+
+@migration(1, "join_tables")
+def _join_tables() -> List[Step]:
+    # Модели создавали appointmentsworkouts/trainersworkouts, скрипты и слой sqlite3 —
+    # appointments_workouts/trainers_workouts; в базе из шаблона были обе пары таблиц
+    return [
+        merge_table("appointmentsworkouts", "appointments_workouts"),
+        merge_table("trainersworkouts", "trainers_workouts", {"trainer_id": "trener_id"}),
+    ]
+
+@migration(2, "model_tables")
+def _model_tables() -> List[Step]:
+    def missing(db) -> List[Any]:
+        return [model for model in MODELS if not table_exists(db, model._meta.table_name)]
+
+    def apply(db, batch_size: int, log: Log) -> None:
+        for model in missing(db):
+            with db.atomic(lock_type="IMMEDIATE"):
+                model.create_table(safe=True)
+            log(f"      создана таблица {model._meta.table_name}")
+
+    return [Step("недостающие таблицы моделей (вместе с их индексами)", apply, lambda db: bool(missing(db)))]
+
+# Схема appointments со значениями по умолчанию (как у модели Appointments на момент миграции 3)
+APPOINTMENTS_V3 = (
+    'CREATE TABLE "{table}" ("id" INTEGER NOT NULL PRIMARY KEY, "last_name" VARCHAR(100) NOT NULL, '
+    '"first_name" VARCHAR(100) NOT NULL, "phone" VARCHAR(20) NOT NULL, '
+    '"date" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "trener_id" INTEGER, '
+    '"name_of_training_session" VARCHAR(200) NOT NULL, "comment" TEXT, '
+    '"status" VARCHAR(20) NOT NULL DEFAULT \'Запланировано\', "appointment_date" DATETIME, '
+    '"created_at" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+    'FOREIGN KEY ("trener_id") REFERENCES "trainers" ("id") ON DELETE SET NULL)'
+)
+
+@migration(3, "appointments_defaults")
+def _appointments_defaults() -> List[Step]:
+    # Таблица из моделей не имела значений по умолчанию в схеме, и INSERT слоя sqlite3
+    # (без date, status, created_at) падал на NOT NULL; добавить DEFAULT можно только пересборкой
+    def needed(db) -> bool:
+        defaults = {name: default for name, default, _ in table_columns(db, "appointments")}
+        return any(defaults.get(column) is None for column in ("date", "status", "created_at"))
+
+    def apply(db, batch_size: int, log: Log) -> None:
+        if needed(db):
+            rebuild_table(db, "appointments", APPOINTMENTS_V3, batch_size, log)
+        else:
+            # Пересборка прервалась после подмены: осталось удалить старую таблицу
+            drop_table_in_batches(db, "appointments__old", batch_size, log)
+
+    return [Step("пересборка appointments: DEFAULT для date, status, created_at", apply,
+                 lambda db: needed(db) or table_exists(db, "appointments__old"))]
+
+@migration(4, "indexes")
+def _indexes() -> List[Step]:
+    # Единый набор индексов: из complete_database.sql и из моделей, под одними именами
+    return [
+        ensure_indexes("trainers", [("idx_trainers_last_name", ["last_name"]),
+                                    ("idx_trainers_specialization", ["specialization"]),
+                                    ("trainers_created_at", ["created_at"])]),
+        ensure_indexes("workouts", [("idx_workouts_difficulty_duration", ["difficulty_level", "duration_minutes"])]),
+        ensure_indexes("appointments", [("idx_appointments_phone_date_trener", ["phone", "appointment_date", "trener_id"]),
+                                        ("idx_appointments_status", ["status"]),
+                                        ("appointments_trener_id", ["trener_id"]),
+                                        ("appointments_appointment_date", ["appointment_date"]),
+                                        ("appointments_created_at", ["created_at"])]),
+        ensure_indexes("appointments_workouts", [("appointments_workouts_appointment_id", ["appointment_id"]),
+                                                 ("appointments_workouts_workout_id", ["workout_id"])]),
+        ensure_indexes("trainers_workouts", [("trainers_workouts_trener_id", ["trener_id"]),
+                                             ("trainers_workouts_workout_id", ["workout_id"])]),
+        drop_indexes(["appointments_phone_appointment_date_trener_id"],
+                     "дублирует idx_appointments_phone_date_trener"),
+    ]
+
+@migration(5, "sort_indexes")
+def _sort_indexes() -> List[Step]:
+    # sort_by=last_name, first_name и date в GET /appointments сортировали всю таблицу
+    # во временном B-дереве (database/index_advisor.py); phone покрыт составным индексом,
+    # appointment_date и created_at — своими
+    return [
+        ensure_indexes("appointments", [("idx_appointments_last_name", ["last_name"]),
+                                        ("idx_appointments_first_name", ["first_name"]),
+                                        ("idx_appointments_date", ["date"])]),
+    ]
+
+# --- Выполнение ---
+
+@contextlib.contextmanager
+def migration_lock(db=DB):
+    """Межпроцессная блокировка прогона миграций; ОС снимает её и при аварийном завершении процесса"""
+    path = getattr(db, "database", None)
+    if not path or path == ":memory:" or str(path).startswith("file:"):
+        yield
+        return
+    with open(f"{path}-migrate.lock", "a+b") as lock:
+        if os.name == "nt":
+            import msvcrt
+            lock.seek(0)
+            while True:
+                try:
+                    # LK_LOCK ждёт около 10 секунд и сообщает об ошибке, поэтому повторяем
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+def is_applied(db, version: int) -> bool:
+    return db.execute_sql("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone() is not None
+
+def applied_versions(db=DB) -> Dict[int, Dict[str, Any]]:
+    if not table_exists(db, "schema_version"):
+        return {}
+    rows = db.execute_sql("SELECT version, name, applied_at, duration_ms FROM schema_version").fetchall()
+    return {version: {"name": name, "applied_at": applied_at, "duration_ms": duration}
+            for version, name, applied_at, duration in rows}
+
+def migrate(db=DB, target: Optional[int] = None, dry_run: bool = False, batch_size: int = BATCH_SIZE,
+            log: Log = print) -> List[Dict[str, Any]]:
+    """Применяет ожидающие миграции (до target включительно) и возвращает отчёт по ним.
+
+    При dry_run ничего не меняется: выводятся шаги и нужен ли каждый для текущей схемы
+    (шаги следующих миграций оцениваются без учёта изменений предыдущих).
+    """
+    report = []
+    with migration_lock(db) if not dry_run else contextlib.nullcontext(), db.connection_context():
+        if not dry_run:
+            db.execute_sql(SCHEMA_VERSION_SQL)
+        # Читается уже под блокировкой: миграции предыдущего процесса здесь видны
+        applied = applied_versions(db)
+        for version in sorted(MIGRATIONS):
+            if version in applied or (target is not None and version > target):
+                continue
+            if not dry_run and is_applied(db, version):
+                log(f"{version:04d} уже применена другим процессом")
+                continue
+            name, steps = MIGRATIONS[version]
+            log(f"{version:04d} {name}{' (пробный прогон)' if dry_run else ''}")
+            started = time.perf_counter()
+            results = []
+            for step in steps():
+                needed = step.needed(db)
+                if dry_run or not needed:
+                    log(f"  {'+' if needed else '='} {step.description}{'' if needed else ' — не требуется'}")
+                    results.append({"step": step.description, "needed": needed})
+                    continue
+                log(f"  + {step.description}")
+                step_started = time.perf_counter()
+                step.apply(db, batch_size, log)
+                results.append({"step": step.description, "needed": True, "ms": round(_ms(step_started), 1)})
+                log(f"    {_ms(step_started):.1f} мс")
+            duration = round(_ms(started), 1)
+            if not dry_run:
+                with db.atomic(lock_type="IMMEDIATE"):
+                    # Проверка и запись — одна транзакция с блокировкой записи
+                    if is_applied(db, version):
+                        log("  уже записана другим процессом")
+                        continue
+                    db.execute_sql("INSERT INTO schema_version (version, name, applied_at, duration_ms) "
+                                   "VALUES (?, ?, ?, ?)", (version, name, datetime.now().isoformat(" ", "seconds"),
+                                                           duration))
+                log(f"  применена за {duration} мс")
+            report.append({"version": version, "name": name, "steps": results, "ms": duration})
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных")
+    parser.add_argument("--db", help="файл базы (по умолчанию BODY_FIT_DB_PATH)")
+    parser.add_argument("--dry-run", action="store_true", help="показать шаги, ничего не меняя")
+    parser.add_argument("--to", type=int, help="применить миграции до этого номера включительно")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="строк в пачке при копировании")
+    parser.add_argument("--status", action="store_true", help="показать применённые и ожидающие миграции")
+    args = parser.parse_args()
+    if args.db:
+        DB.init(args.db)
+    if args.status:
+        with DB.connection_context():
+            applied = applied_versions(DB)
+        for version, (name, _) in sorted(MIGRATIONS.items()):
+            info = applied.get(version)
+            state = f"применена {info['applied_at']} за {info['duration_ms']} мс" if info else "ожидает"
+            print(f"{version:04d} {name:24} {state}")
+        return
+    started = time.perf_counter()
+    report = migrate(DB, args.to, args.dry_run, args.batch)
+    if not report:
+        print("Схема актуальна, ожидающих миграций нет")
+    else:
+        print(f"Миграций: {len(report)}, всего {_ms(started):.1f} мс")
+
+if __name__ == "__main__":
+    main()
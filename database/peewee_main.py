@@ -19,154 +19,156 @@ def insert_test_data():
     try:
         DB.connect()
         
-        # Очистка существующих данных
-        AppointmentsWorkouts.delete().execute()
-        TrainersWorkouts.delete().execute()
-        Appointments.delete().execute()
-        Clients.delete().execute()
-        Workouts.delete().execute()
-        Trainers.delete().execute()
+        # Все вставки выполняются одной транзакцией, а не отдельным коммитом на каждую строку
+        with DB.atomic():
+            # Очистка существующих данных
+            AppointmentsWorkouts.delete().execute()
+            TrainersWorkouts.delete().execute()
+            Appointments.delete().execute()
+            Clients.delete().execute()
+            Workouts.delete().execute()
+            Trainers.delete().execute()
         
-        print("Существующие данные очищены.")
+            print("Существующие данные очищены.")
         
-        # Создание тренеров
-        trainer1 = Trainers.create(
-            last_name="Иванов",
-            first_name="Александр",
-            middle_name="Петрович",
-            name_of_training_session="Йога",
-            phone="+7(999)111-11-11",
-            email="ivanov@fitness.ru",
-            specialization="Йога и медитация",
-            experience_years=5
-        )
+            # Создание тренеров
+            trainer1 = Trainers.create(
+                last_name="Иванов",
+                first_name="Александр",
+                middle_name="Петрович",
+                name_of_training_session="Йога",
+                phone="+7(999)111-11-11",
+                email="ivanov@fitness.ru",
+                specialization="Йога и медитация",
+                experience_years=5
+            )
         
-        trainer2 = Trainers.create(
-            last_name="Петрова",
-            first_name="Мария",
-            middle_name="Сергеевна",
-            name_of_training_session="Пилатес",
-            phone="+7(999)222-22-22",
-            email="petrova@fitness.ru",
-            specialization="Пилатес и растяжка",
-            experience_years=3
-        )
+            trainer2 = Trainers.create(
+                last_name="Петрова",
+                first_name="Мария",
+                middle_name="Сергеевна",
+                name_of_training_session="Пилатес",
+                phone="+7(999)222-22-22",
+                email="petrova@fitness.ru",
+                specialization="Пилатес и растяжка",
+                experience_years=3
+            )
         
-        trainer3 = Trainers.create(
-            last_name="Сидоров",
-            first_name="Дмитрий",
-            middle_name="Александрович",
-            name_of_training_session="Кроссфит",
-            phone="+7(999)333-33-33",
-            email="sidorov@fitness.ru",
-            specialization="Кроссфит и функциональный тренинг",
-            experience_years=7
-        )
+            trainer3 = Trainers.create(
+                last_name="Сидоров",
+                first_name="Дмитрий",
+                middle_name="Александрович",
+                name_of_training_session="Кроссфит",
+                phone="+7(999)333-33-33",
+                email="sidorov@fitness.ru",
+                specialization="Кроссфит и функциональный тренинг",
+                experience_years=7
+            )
         
-        print("Тренеры созданы успешно!")
+            print("Тренеры созданы успешно!")
         
-        # Создание тренировок
-        workout1 = Workouts.create(
-            name_of_training_session="Йога для начинающих",
-            last_name="Иванов",
-            first_name="Александр",
-            middle_name="Петрович",
-            description="Мягкая практика для новичков",
-            duration_minutes=60,
-            max_participants=15,
-            difficulty_level="Начинающий"
-        )
+            # Создание тренировок
+            workout1 = Workouts.create(
+                name_of_training_session="Йога для начинающих",
+                last_name="Иванов",
+                first_name="Александр",
+                middle_name="Петрович",
+                description="Мягкая практика для новичков",
+                duration_minutes=60,
+                max_participants=15,
+                difficulty_level="Начинающий"
+            )
         
-        workout2 = Workouts.create(
-            name_of_training_session="Пилатес",
-            last_name="Петрова",
-            first_name="Мария",
-            middle_name="Сергеевна",
-            description="Укрепление мышц кора",
-            duration_minutes=45,
-            max_participants=12,
-            difficulty_level="Средний"
-        )
+            workout2 = Workouts.create(
+                name_of_training_session="Пилатес",
+                last_name="Петрова",
+                first_name="Мария",
+                middle_name="Сергеевна",
+                description="Укрепление мышц кора",
+                duration_minutes=45,
+                max_participants=12,
+                difficulty_level="Средний"
+            )
         
-        workout3 = Workouts.create(
-            name_of_training_session="Кроссфит",
-            last_name="Сидоров",
-            first_name="Дмитрий",
-            middle_name="Александрович",
-            description="Высокоинтенсивные тренировки",
-            duration_minutes=60,
-            max_participants=10,
-            difficulty_level="Продвинутый"
-        )
+            workout3 = Workouts.create(
+                name_of_training_session="Кроссфит",
+                last_name="Сидоров",
+                first_name="Дмитрий",
+                middle_name="Александрович",
+                description="Высокоинтенсивные тренировки",
+                duration_minutes=60,
+                max_participants=10,
+                difficulty_level="Продвинутый"
+            )
         
-        workout4 = Workouts.create(
-            name_of_training_session="Стретчинг",
-            last_name="Козлова",
-            first_name="Елена",
-            middle_name="Владимировна",
-            description="Растяжка и гибкость",
-            duration_minutes=45,
-            max_participants=20,
-            difficulty_level="Начинающий"
-        )
+            workout4 = Workouts.create(
+                name_of_training_session="Стретчинг",
+                last_name="Козлова",
+                first_name="Елена",
+                middle_name="Владимировна",
+                description="Растяжка и гибкость",
+                duration_minutes=45,
+                max_participants=20,
+                difficulty_level="Начинающий"
+            )
         
-        print("Тренировки созданы успешно!")
+            print("Тренировки созданы успешно!")
         
-        # Связывание тренеров и тренировок
-        TrainersWorkouts.create(trainer=trainer1, workout=workout1)
-        TrainersWorkouts.create(trainer=trainer2, workout=workout2)
-        TrainersWorkouts.create(trainer=trainer3, workout=workout3)
-        TrainersWorkouts.create(trainer=trainer1, workout=workout4)  # Иванов ведет и йогу, и стретчинг
+            # Связывание тренеров и тренировок
+            TrainersWorkouts.create(trainer=trainer1, workout=workout1)
+            TrainersWorkouts.create(trainer=trainer2, workout=workout2)
+            TrainersWorkouts.create(trainer=trainer3, workout=workout3)
+            TrainersWorkouts.create(trainer=trainer1, workout=workout4)  # Иванов ведет и йогу, и стретчинг
         
-        print("Связи тренеров и тренировок созданы!")
+            print("Связи тренеров и тренировок созданы!")
         
-        # Создание записей на тренировки
-        appointment1 = Appointments.create(
-            last_name="Смирнова",
-            first_name="Анна",
-            phone="+7(999)123-45-67",
-            trener=trainer1,
-            name_of_training_session="Йога для начинающих",
-            comment="Первый раз на йоге, нужна помощь",
-            status="Запланировано",
-            appointment_date=datetime(2024, 9, 1, 10, 0)
-        )
+            # Создание записей на тренировки
+            appointment1 = Appointments.create(
+                last_name="Смирнова",
+                first_name="Анна",
+                phone="+7(999)123-45-67",
+                trener=trainer1,
+                name_of_training_session="Йога для начинающих",
+                comment="Первый раз на йоге, нужна помощь",
+                status="Запланировано",
+                appointment_date=datetime(2024, 9, 1, 10, 0)
+            )
         
-        appointment2 = Appointments.create(
-            last_name="Петров",
-            first_name="Иван",
-            phone="+7(999)234-56-78",
-            trener=trainer2,
-            name_of_training_session="Пилатес",
-            comment="Регулярные занятия",
-            status="Запланировано",
-            appointment_date=datetime(2024, 9, 2, 18, 0)
-        )
+            appointment2 = Appointments.create(
+                last_name="Петров",
+                first_name="Иван",
+                phone="+7(999)234-56-78",
+                trener=trainer2,
+                name_of_training_session="Пилатес",
+                comment="Регулярные занятия",
+                status="Запланировано",
+                appointment_date=datetime(2024, 9, 2, 18, 0)
+            )
         
-        appointment3 = Appointments.create(
-            last_name="Козлов",
-            first_name="Петр",
-            phone="+7(999)345-67-89",
-            trener=trainer3,
-            name_of_training_session="Кроссфит",
-            comment="Интенсивная тренировка",
-            status="Проведено",
-            appointment_date=datetime(2024, 8, 30, 19, 0)
-        )
+            appointment3 = Appointments.create(
+                last_name="Козлов",
+                first_name="Петр",
+                phone="+7(999)345-67-89",
+                trener=trainer3,
+                name_of_training_session="Кроссфит",
+                comment="Интенсивная тренировка",
+                status="Проведено",
+                appointment_date=datetime(2024, 8, 30, 19, 0)
+            )
         
-        print("Записи на тренировки созданы!")
+            print("Записи на тренировки созданы!")
         
-        # Связывание записей и тренировок (каждая запись привязана к 2 тренировкам)
-        AppointmentsWorkouts.create(appointment=appointment1, workout=workout1)
-        AppointmentsWorkouts.create(appointment=appointment1, workout=workout4)
+            # Связывание записей и тренировок (каждая запись привязана к 2 тренировкам)
+            AppointmentsWorkouts.create(appointment=appointment1, workout=workout1)
+            AppointmentsWorkouts.create(appointment=appointment1, workout=workout4)
         
-        AppointmentsWorkouts.create(appointment=appointment2, workout=workout2)
-        AppointmentsWorkouts.create(appointment=appointment2, workout=workout4)
+            AppointmentsWorkouts.create(appointment=appointment2, workout=workout2)
+            AppointmentsWorkouts.create(appointment=appointment2, workout=workout4)
         
-        AppointmentsWorkouts.create(appointment=appointment3, workout=workout3)
-        AppointmentsWorkouts.create(appointment=appointment3, workout=workout1)
+            AppointmentsWorkouts.create(appointment=appointment3, workout=workout3)
+            AppointmentsWorkouts.create(appointment=appointment3, workout=workout1)
         
-        print("Связи записей и тренировок созданы!")
+            print("Связи записей и тренировок созданы!")
         
     except Exception as e:
         print(f"Ошибка при вставке данных: {e}")
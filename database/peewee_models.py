@@ -1,11 +1,224 @@
 from peewee import *
+from playhouse.pool import MaxConnectionsExceeded, PooledSqliteDatabase
 import os
+import threading
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+# Параметры подключения (переопределяются переменными окружения)
+DB_PATH = os.environ.get('BODY_FIT_DB_PATH', os.path.join(os.path.dirname(__file__), 'BODY_FIT.db'))
+DB_MAX_CONNECTIONS = int(os.environ.get('BODY_FIT_DB_MAX_CONNECTIONS', 8))
+DB_STALE_TIMEOUT = int(os.environ.get('BODY_FIT_DB_STALE_TIMEOUT', 300))
+DB_POOL_TIMEOUT = int(os.environ.get('BODY_FIT_DB_POOL_TIMEOUT', 10))
+# Пишущие запросы сериализуются на одном соединении (ожидание в пуле до DB_POOL_TIMEOUT),
+# читающие идут в отдельный пул соединений только для чтения
+DB_WRITER_CONNECTIONS = int(os.environ.get('BODY_FIT_DB_WRITER_CONNECTIONS', 1))
+DB_READER_CONNECTIONS = int(os.environ.get('BODY_FIT_DB_READER_CONNECTIONS', DB_MAX_CONNECTIONS))
+
+# Профили PRAGMA, применяемые к каждому новому соединению.
+# Во всех профилях включён WAL: читатели не блокируются пишущей транзакцией.
+#   safe       - synchronous=FULL, коммит переживает отключение питания
+#   throughput - synchronous=NORMAL (в WAL теряются лишь последние коммиты при сбое ОС),
+#                большой кэш страниц и mmap
+#   bulk-load  - synchronous=OFF и без проверки внешних ключей, только для разовой загрузки данных
+DB_PROFILES = {
+    'safe': {
+        'journal_mode': 'wal',
+        'synchronous': 2,
+        'busy_timeout': 5000,
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 0,
+        'foreign_keys': 1,
+    },
+    'throughput': {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'busy_timeout': 10000,
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 2,
+        'foreign_keys': 1,
+    },
+    'bulk-load': {
+        'journal_mode': 'wal',
+        'synchronous': 0,
+        'busy_timeout': 30000,
+        'cache_size': -256000,
+        'mmap_size': 1024 * 1024 * 1024,
+        'temp_store': 2,
+        'foreign_keys': 0,
+    },
+}
+DB_PROFILE = os.environ.get('BODY_FIT_DB_PROFILE', 'throughput')
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Неизвестный профиль базы данных '{DB_PROFILE}', допустимые: {', '.join(DB_PROFILES)}")
+
+class InstrumentedPooledSqliteDatabase(PooledSqliteDatabase):
+    """Пул соединений SQLite со счётчиками выдачи соединений и времени ожидания"""
+    # Вызывается после каждого запроса как query_hook(sql, секунды); задаётся instrumentation
+    query_hook: Optional[Callable[[str, float], None]] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._created = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def connect(self, reuse_if_open=False):
+        started = time.perf_counter()
+        try:
+            opened = super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        if opened:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+        return opened
+
+    def execute_sql(self, sql, *args, **kwargs):
+        hook = type(self).query_hook
+        if hook is None:
+            return super().execute_sql(sql, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().execute_sql(sql, *args, **kwargs)
+        finally:
+            hook(sql, time.perf_counter() - started)
+
+    def _add_conn_hooks(self, conn):
+        # Вызывается только для новых соединений, а не для взятых из пула
+        super()._add_conn_hooks(conn)
+        with self._stats_lock:
+            self._created += 1
+
+    def pool_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_connections": self._max_connections,
+                "in_use": len(self._in_use),
+                "idle": len(self._connections),
+                "checkouts": self._checkouts,
+                "connections_created": self._created,
+                "timeouts": self._timeouts,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+            }
+
+class RoutingDatabase(DatabaseProxy):
+    """
+    Маршрутизатор соединений: модели работают через него, а он передаёт вызовы
+    пулу писателя или пулу читателей, выбранному для текущего потока.
+
+    По умолчанию выбран писатель (скрипты, init_db, пакетная загрузка). Приложение
+    переключает поток на читателей для GET-запросов (use_reader) и обратно после ответа.
+    Читатели открывают файл с mode=ro и query_only, поэтому случайная запись в
+    GET-обработчике завершится ошибкой, а не возьмёт блокировку записи. В WAL читатели
+    не ждут пишущую транзакцию и не стоят в очереди за соединением писателя.
+    """
+    __slots__ = ('writer', 'reader', '_local')
+
+    def __init__(self, writer, reader):
+        object.__setattr__(self, 'writer', writer)
+        object.__setattr__(self, 'reader', reader)
+        object.__setattr__(self, '_local', threading.local())
+        super().__init__()
+
+    @property
+    def obj(self):
+        return getattr(self._local, 'db', self.writer)
+
+    @obj.setter
+    def obj(self, value):
+        # initialize() у Proxy: цель выбирается маршрутом, а не присваиванием
+        pass
+
+    def __setattr__(self, attr, value):
+        if attr not in ('obj', '_callbacks', '_Model'):
+            raise AttributeError('Cannot set attribute on proxy.')
+        object.__setattr__(self, attr, value)
+
+    def init(self, database, **kwargs) -> None:
+        """Переключает оба пула на другой файл базы данных"""
+        # Свободные соединения пулов открыты на прежний файл: без закрытия их выдали бы снова
+        self.writer.close_all()
+        self.reader.close_all()
+        self.writer.init(database, **kwargs)
+        self.reader.init(_reader_uri(database), **kwargs)
+
+    def use_reader(self) -> None:
+        self._local.db = self.reader
+
+    def use_writer(self) -> None:
+        self._local.db = self.writer
+
+    def route(self, read_only: bool) -> None:
+        self.use_reader() if read_only else self.use_writer()
+
+    @property
+    def is_reader(self) -> bool:
+        return self.obj is self.reader
+
+    def read_only(self):
+        """Контекст: соединение из пула читателей на время блока (вне обработчиков Flask)"""
+        return _ReadOnlyContext(self)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {"writer": self.writer.pool_stats(), "reader": self.reader.pool_stats()}
+
+class _ReadOnlyContext:
+    def __init__(self, db: RoutingDatabase):
+        self.db = db
+
+    def __enter__(self):
+        self._previous = self.db.obj
+        self.db.use_reader()
+        self.db.connect(reuse_if_open=True)
+        return self.db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.db.is_closed():
+            self.db.close()
+        self.db._local.db = self._previous
+
+def _reader_uri(path: str) -> str:
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+def _reader_pragmas(pragmas: Dict[str, Any]) -> Dict[str, Any]:
+    # journal_mode и synchronous задаёт писатель; соединение читателя не может их менять
+    read = {k: v for k, v in pragmas.items() if k not in ('journal_mode', 'synchronous')}
+    read['query_only'] = 1
+    return read
 
 # Создание базы данных
-DB_PATH = os.path.join(os.path.dirname(__file__), 'BODY_FIT.db')
-DB = SqliteDatabase(DB_PATH)
+WRITER_DB = InstrumentedPooledSqliteDatabase(
+    DB_PATH,
+    max_connections=DB_WRITER_CONNECTIONS,
+    stale_timeout=DB_STALE_TIMEOUT,
+    timeout=DB_POOL_TIMEOUT,
+    check_same_thread=False,
+    pragmas=DB_PROFILES[DB_PROFILE],
+)
+READER_DB = InstrumentedPooledSqliteDatabase(
+    _reader_uri(DB_PATH),
+    uri=True,
+    max_connections=DB_READER_CONNECTIONS,
+    stale_timeout=DB_STALE_TIMEOUT,
+    timeout=DB_POOL_TIMEOUT,
+    check_same_thread=False,
+    pragmas=_reader_pragmas(DB_PROFILES[DB_PROFILE]),
+)
+DB = RoutingDatabase(WRITER_DB, READER_DB)
 
 class BaseModel(Model):
     """Базовая модель для всех таблиц"""
@@ -22,7 +235,12 @@ class Trainers(BaseModel):
     email = CharField(max_length=100, null=True)
     specialization = CharField(max_length=200, null=True)
     experience_years = IntegerField(default=0)
-    created_at = DateTimeField(default=datetime.now)
+    created_at = DateTimeField(default=datetime.now, index=True)
+
+# Индексы из complete_database.sql объявлены под теми же именами, что и в скрипте:
+# база из SQL-скрипта и база из моделей получают одинаковый набор индексов
+Trainers.add_index(Trainers.index(Trainers.last_name, name='idx_trainers_last_name'))
+Trainers.add_index(Trainers.index(Trainers.specialization, name='idx_trainers_specialization'))
 
 class Workouts(BaseModel):
     """Модель тренировок"""
@@ -39,6 +257,9 @@ class Workouts(BaseModel):
                                       ('Продвинутый', 'Продвинутый')])
     created_at = DateTimeField(default=datetime.now)
 
+Workouts.add_index(Workouts.index(Workouts.difficulty_level, Workouts.duration_minutes,
+                                  name='idx_workouts_difficulty_duration'))
+
 class Clients(BaseModel):
     """Модель клиентов"""
     last_name = CharField(max_length=100, null=False)
@@ -59,23 +280,36 @@ class Appointments(BaseModel):
     last_name = CharField(max_length=100, null=False)
     first_name = CharField(max_length=100, null=False)
     phone = CharField(max_length=20, null=False)
-    date = DateTimeField(default=datetime.now)
+    # Значения по умолчанию продублированы в схеме: слой sqlite3 (fitness_database.py)
+    # вставляет записи без date, status и created_at
+    date = DateTimeField(default=datetime.now, constraints=[SQL('DEFAULT CURRENT_TIMESTAMP')])
     trener = ForeignKeyField(Trainers, backref='appointments', null=True, on_delete='SET NULL')
     name_of_training_session = CharField(max_length=200, null=False)
     comment = TextField(null=True)
-    status = CharField(max_length=20, default='Запланировано',
+    status = CharField(max_length=20, default='Запланировано', constraints=[SQL("DEFAULT 'Запланировано'")],
                      choices=[('Запланировано', 'Запланировано'), 
                              ('Проведено', 'Проведено'), 
                              ('Отменено', 'Отменено')])
-    appointment_date = DateTimeField(null=True)
-    created_at = DateTimeField(default=datetime.now)
+    appointment_date = DateTimeField(null=True, index=True)
+    created_at = DateTimeField(default=datetime.now, index=True, constraints=[SQL('DEFAULT CURRENT_TIMESTAMP')])
+
+# Покрывающий индекс для пакетного поиска по телефонам
+Appointments.add_index(Appointments.index(Appointments.phone, Appointments.appointment_date, Appointments.trener,
+                                          name='idx_appointments_phone_date_trener'))
+Appointments.add_index(Appointments.index(Appointments.status, name='idx_appointments_status'))
+# Сортировки GET /appointments?sort_by=... без полного просмотра (найдены database/index_advisor.py)
+Appointments.add_index(Appointments.index(Appointments.last_name, name='idx_appointments_last_name'))
+Appointments.add_index(Appointments.index(Appointments.first_name, name='idx_appointments_first_name'))
+Appointments.add_index(Appointments.index(Appointments.date, name='idx_appointments_date'))
 
 class TrainersWorkouts(BaseModel):
     """Связующая таблица тренеров и тренировок (многие ко многим)"""
-    trainer = ForeignKeyField(Trainers, backref='trainer_workouts', on_delete='CASCADE')
+    # Имена таблицы и колонки — как в SQL-скриптах и слое sqlite3 (fitness_database.py)
+    trainer = ForeignKeyField(Trainers, backref='trainer_workouts', on_delete='CASCADE', column_name='trener_id')
     workout = ForeignKeyField(Workouts, backref='trainer_workouts', on_delete='CASCADE')
 
     class Meta:
+        table_name = 'trainers_workouts'
         primary_key = CompositeKey('trainer', 'workout')
 
 class AppointmentsWorkouts(BaseModel):
@@ -84,5 +318,123 @@ class AppointmentsWorkouts(BaseModel):
     workout = ForeignKeyField(Workouts, backref='appointment_workouts', on_delete='CASCADE')
 
     class Meta:
+        table_name = 'appointments_workouts'
         primary_key = CompositeKey('appointment', 'workout')
-        
\ No newline at end of file
+
+class WorkoutSlots(BaseModel):
+    """Занятость групповой тренировки в конкретное время (счётчики обновляются в транзакции записи)"""
+    workout = ForeignKeyField(Workouts, backref='slots', on_delete='CASCADE')
+    slot_start = DateTimeField()
+    capacity = IntegerField()
+    booked = IntegerField(default=0)
+    waiting = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'workout_slots'
+        indexes = (
+            (('workout', 'slot_start'), True),
+            (('slot_start',), False),
+        )
+
+class Waitlist(BaseModel):
+    """Лист ожидания на заполненную групповую тренировку"""
+    workout = ForeignKeyField(Workouts, backref='waitlist', on_delete='CASCADE')
+    slot_start = DateTimeField()
+    last_name = CharField(max_length=100, null=False)
+    first_name = CharField(max_length=100, null=False)
+    phone = CharField(max_length=20, null=False)
+    trener = ForeignKeyField(Trainers, null=True, on_delete='SET NULL')
+    comment = TextField(null=True)
+    status = CharField(max_length=20, default='Ожидает',
+                     choices=[('Ожидает', 'Ожидает'),
+                             ('Переведено', 'Переведено')])
+    appointment = ForeignKeyField(Appointments, null=True, on_delete='SET NULL')
+    created_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = 'waitlist'
+        indexes = (
+            (('workout', 'slot_start', 'status', 'id'), False),
+        )
+
+class ReportTrainerDaily(BaseModel):
+    """Число записей тренера за день по статусам (поддерживается триггерами, см. reports.py)"""
+    trainer_id = IntegerField()
+    day = DateField()
+    total = IntegerField(default=0)
+    planned = IntegerField(default=0)
+    done = IntegerField(default=0)
+    cancelled = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'report_trainer_daily'
+        primary_key = CompositeKey('trainer_id', 'day')
+        indexes = (
+            (('day',), False),
+        )
+
+class ReportWorkoutTotals(BaseModel):
+    """Популярность тренировок: число записей по статусам"""
+    name_of_training_session = CharField(max_length=200, primary_key=True)
+    total = IntegerField(default=0)
+    planned = IntegerField(default=0)
+    done = IntegerField(default=0)
+    cancelled = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'report_workout_totals'
+
+class ReportStatusTotals(BaseModel):
+    """Общее число записей по статусам"""
+    status = CharField(max_length=20, primary_key=True)
+    total = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'report_status_totals'
+
+class ApiKeys(BaseModel):
+    """API-ключи партнёров и киосков (хранится только SHA-256 хэш ключа)"""
+    username = CharField(max_length=100, null=False)
+    key_hash = CharField(max_length=64, unique=True)
+    role = CharField(max_length=20, default='user',
+                     choices=[('admin', 'admin'), ('user', 'user')])
+    created_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = 'api_keys'
+
+class TableVersions(BaseModel):
+    """Версии таблиц для условных GET-запросов (увеличиваются триггерами при любом изменении)"""
+    table_name = CharField(max_length=100, primary_key=True)
+    version = IntegerField(default=0)
+    updated_at = DateTimeField()  # UTC, заполняется триггерами
+
+    class Meta:
+        table_name = 'table_versions'
+
+    @classmethod
+    def current(cls, tables) -> List[tuple]:
+        """Возвращает (таблица, версия, время изменения UTC) одним запросом по первичному ключу"""
+        return list(cls
+                    .select(cls.table_name, cls.version, cls.updated_at)
+                    .where(cls.table_name.in_(list(tables)))
+                    .order_by(cls.table_name)
+                    .tuples())
+
+# Все модели в порядке создания (таблицы, на которые ссылаются внешние ключи, — раньше)
+MODELS = [Trainers, Workouts, Clients, Appointments, TrainersWorkouts, AppointmentsWorkouts, WorkoutSlots,
+          Waitlist, ReportTrainerDaily, ReportWorkoutTotals, ReportStatusTotals, ApiKeys, TableVersions]
+
+VERSIONED_TABLES = ('trainers', 'appointments', 'api_keys', 'workout_slots')
+
+def create_version_triggers(db=DB) -> None:
+    """Создаёт строки table_versions и триггеры, увеличивающие версию при INSERT/UPDATE/DELETE"""
+    for table in VERSIONED_TABLES:
+        db.execute_sql(
+            "INSERT OR IGNORE INTO table_versions (table_name, version, updated_at) VALUES (?, 0, datetime('now'))",
+            (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            db.execute_sql(
+                f'CREATE TRIGGER IF NOT EXISTS "{table}_version_{event.lower()}" AFTER {event} ON "{table}" '
+                f"BEGIN UPDATE table_versions SET version = version + 1, updated_at = datetime('now') "
+                f"WHERE table_name = '{table}'; END")
@@ -0,0 +1,304 @@
+"""
+Профилирование запросов API и SQL (включается явно).
+
+Для каждого запроса к Flask-приложению считаются длительность (гистограмма по маршруту),
+а для выбранных выборкой запросов ещё и число SQL-запросов, время в SQLite, в сериализации
+(*_to_dict из utils и json_dumps) и в проверке API-ключа. Выбранные
+запросы получают заголовок Server-Timing, самые медленные SQL-операторы сохраняются.
+Всё это вместе со статистикой пулов, кэша и очереди записи отдаётся в GET /metrics
+в текстовом формате Prometheus.
+
+BODY_FIT_PROFILING=1 включает сбор, BODY_FIT_PROFILING_SAMPLE — доля запросов с подробной
+трассировкой (0..1). Выключенный сбор не ставит обработчиков: остаётся только проверка
+потоколокальной переменной в обёрнутых функциях.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from database.peewee_models import InstrumentedPooledSqliteDatabase
+
+PROFILING_ENABLED = os.environ.get("BODY_FIT_PROFILING", "0") == "1"
+PROFILING_SAMPLE = float(os.environ.get("BODY_FIT_PROFILING_SAMPLE", 1.0))
+# Сколько самых медленных операторов выводится и сколько различных операторов отслеживается
+SLOW_SQL_TOP = int(os.environ.get("BODY_FIT_SLOW_SQL_TOP", 20))
+SLOW_SQL_TRACKED = 500
+SQL_LABEL_LENGTH = 200
+
+# Границы корзин гистограммы длительности запросов, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Этапы, которые выделяются в Server-Timing и в метриках
+STAGES = ("db", "serialize", "auth")
+
+_local = threading.local()
+
+class RequestTrace:
+    """Время этапов и число SQL-запросов одного запроса (живёт в потоке обработчика)"""
+    __slots__ = ("stages", "queries", "depth")
+
+    def __init__(self):
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.queries = 0
+        # Вложенные timed-вызовы одного этапа (json_dumps внутри сериализатора) не считаются дважды
+        self.depth = dict.fromkeys(STAGES, 0)
+
+def timed(stage: str) -> Callable:
+    """Декоратор: время вызова добавляется к этапу stage трассируемого запроса"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, "trace", None)
+            if trace is None or trace.depth[stage]:
+                return fn(*args, **kwargs)
+            trace.depth[stage] += 1
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                trace.stages[stage] += time.perf_counter() - started
+                trace.depth[stage] -= 1
+        return wrapper
+    return decorator
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.total += value
+
+class Metrics:
+    """Накопленные метрики процесса; все изменения под одной блокировкой"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency: Dict[Tuple[str, str, int], _Histogram] = {}
+            # (метод, маршрут) -> [трассированных запросов, SQL-запросов, секунд по этапам...]
+            self.traced: Dict[Tuple[str, str], List[float]] = {}
+            # SQL -> [выполнений, суммарное время, максимальное время]
+            self.statements: Dict[str, List[float]] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        trace: Optional[RequestTrace]) -> None:
+        with self._lock:
+            key = (method, route, status)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = _Histogram()
+            histogram.observe(seconds)
+            if trace is not None:
+                totals = self.traced.setdefault((method, route), [0, 0] + [0.0] * len(STAGES))
+                totals[0] += 1
+                totals[1] += trace.queries
+                for i, stage in enumerate(STAGES):
+                    totals[2 + i] += trace.stages[stage]
+
+    def observe_query(self, sql: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.statements.get(sql)
+            if entry is None:
+                if len(self.statements) >= SLOW_SQL_TRACKED:
+                    # Вытесняется оператор с наименьшим максимумом, если новый медленнее
+                    fastest = min(self.statements, key=lambda s: self.statements[s][2])
+                    if self.statements[fastest][2] >= seconds:
+                        return
+                    del self.statements[fastest]
+                entry = self.statements[sql] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def slowest(self, limit: int = SLOW_SQL_TOP) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self.statements.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [{"sql": sql, "calls": int(calls), "total_seconds": total, "max_seconds": worst}
+                for sql, (calls, total, worst) in items]
+
+metrics = Metrics()
+
+def _on_query(sql: str, seconds: float) -> None:
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return
+    trace.queries += 1
+    trace.stages["db"] += seconds
+    metrics.observe_query(sql, seconds)
+
+_ENABLED = False
+_SAMPLE = PROFILING_SAMPLE
+
+def configure(enabled: bool = PROFILING_ENABLED, sample: float = PROFILING_SAMPLE) -> None:
+    """Включает или выключает сбор; sample — доля запросов с подробной трассировкой"""
+    global _ENABLED, _SAMPLE
+    if not 0 <= sample <= 1:
+        raise ValueError("Доля трассируемых запросов должна быть от 0 до 1")
+    _ENABLED, _SAMPLE = enabled, sample
+    InstrumentedPooledSqliteDatabase.query_hook = _on_query if enabled else None
+
+def enabled() -> bool:
+    return _ENABLED
+
+def init_app(app) -> None:
+    """Подключает сбор к жизненному циклу запросов Flask (регистрировать до остальных before_request)"""
+    from flask import request
+
+    @app.before_request
+    def start_trace():
+        if not _ENABLED:
+            return
+        _local.started = time.perf_counter()
+        _local.trace = RequestTrace() if _SAMPLE >= 1 or random.random() < _SAMPLE else None
+
+    @app.after_request
+    def finish_trace(response):
+        started = getattr(_local, "started", None)
+        if started is None:
+            return response
+        trace = _local.trace
+        # Для потоковых ответов учитывается время до первого блока: тело выдаётся после after_request
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        metrics.observe_request(request.method, route, response.status_code, elapsed, trace)
+        if trace is not None:
+            timings = [f'db;dur={trace.stages["db"] * 1000:.3f};desc="{trace.queries} queries"',
+                       f'serialize;dur={trace.stages["serialize"] * 1000:.3f}',
+                       f'auth;dur={trace.stages["auth"] * 1000:.3f}',
+                       f'total;dur={elapsed * 1000:.3f}']
+            response.headers.add("Server-Timing", ", ".join(timings))
+        return response
+
+    @app.teardown_request
+    def clear_trace(exc):
+        _local.started = None
+        _local.trace = None
+
+# ---- текстовый формат Prometheus ----
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Exposition:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: Any) -> None:
+        self.lines.append(f"{name}{_labels(**labels) if labels else ''} {_number(value)}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def _sql_labels(sql: str) -> Dict[str, str]:
+    # Текст обрезается, поэтому серии различаются по хэшу полного оператора
+    return {"statement": hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12], "sql": sql[:SQL_LABEL_LENGTH]}
+
+def _request_metrics(out: _Exposition) -> None:
+    with metrics._lock:
+        latency = {key: (list(h.buckets), h.count, h.total) for key, h in metrics.latency.items()}
+        traced = {key: list(values) for key, values in metrics.traced.items()}
+    out.family("body_fit_request_duration_seconds", "histogram", "Длительность обработки запроса")
+    for (method, route, status), (buckets, count, total) in sorted(latency.items()):
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, buckets):
+            cumulative += n
+            out.sample("body_fit_request_duration_seconds_bucket", cumulative,
+                       method=method, route=route, status=status, le=_number(bound))
+        out.sample("body_fit_request_duration_seconds_bucket", count,
+                   method=method, route=route, status=status, le="+Inf")
+        out.sample("body_fit_request_duration_seconds_count", count, method=method, route=route, status=status)
+        out.sample("body_fit_request_duration_seconds_sum", total, method=method, route=route, status=status)
+    out.family("body_fit_traced_requests_total", "counter", "Запросы с подробной трассировкой (выборка)")
+    for (method, route), values in sorted(traced.items()):
+        out.sample("body_fit_traced_requests_total", int(values[0]), method=method, route=route)
+    out.family("body_fit_db_queries_total", "counter", "SQL-запросы в трассированных запросах")
+    for (method, route), values in sorted(traced.items()):
+        out.sample("body_fit_db_queries_total", int(values[1]), method=method, route=route)
+    out.family("body_fit_stage_seconds_total", "counter", "Время этапов в трассированных запросах")
+    for (method, route), values in sorted(traced.items()):
+        for i, stage in enumerate(STAGES):
+            out.sample("body_fit_stage_seconds_total", values[2 + i], method=method, route=route, stage=stage)
+    slowest = metrics.slowest()
+    out.family("body_fit_sql_max_seconds", "gauge", "Самые медленные SQL-операторы: максимальное время")
+    for entry in slowest:
+        out.sample("body_fit_sql_max_seconds", entry["max_seconds"], **_sql_labels(entry["sql"]))
+    out.family("body_fit_sql_calls_total", "counter", "Самые медленные SQL-операторы: число выполнений")
+    for entry in slowest:
+        out.sample("body_fit_sql_calls_total", entry["calls"], **_sql_labels(entry["sql"]))
+
+def _pool_metrics(out: _Exposition, pools: Dict[str, Dict[str, Any]]) -> None:
+    gauges = {"max_connections": "Размер пула", "in_use": "Выданные соединения", "idle": "Свободные соединения"}
+    counters = {"checkouts": "Выдачи соединений", "connections_created": "Открытые соединения",
+                "timeouts": "Таймауты ожидания соединения", "wait_seconds_total": "Суммарное ожидание соединения"}
+    for field, help_text in gauges.items():
+        out.family(f"body_fit_db_pool_{field}", "gauge", help_text)
+        for pool, stats in pools.items():
+            out.sample(f"body_fit_db_pool_{field}", stats[field], pool=pool)
+    for field, help_text in counters.items():
+        name = f"body_fit_db_pool_{field}" if field.endswith("_total") else f"body_fit_db_pool_{field}_total"
+        out.family(name, "counter", help_text)
+        for pool, stats in pools.items():
+            out.sample(name, stats[field], pool=pool)
+
+def _cache_metrics(out: _Exposition, caches: Dict[str, Dict[str, Any]]) -> None:
+    out.family("body_fit_cache_size", "gauge", "Число записей в кэше")
+    for cache, stats in caches.items():
+        out.sample("body_fit_cache_size", stats["size"], cache=cache)
+    for field in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        out.family(f"body_fit_cache_{field}_total", "counter", f"Кэш: {field}")
+        for cache, stats in caches.items():
+            out.sample(f"body_fit_cache_{field}_total", stats[field], cache=cache)
+
+def _write_behind_metrics(out: _Exposition, stats: Optional[Dict[str, Any]]) -> None:
+    out.family("body_fit_write_behind_enabled", "gauge", "Очередь отложенной записи включена")
+    out.sample("body_fit_write_behind_enabled", int(stats is not None))
+    if stats is None:
+        return
+    out.family("body_fit_write_behind_queued", "gauge", "Заданий в очереди записи")
+    out.sample("body_fit_write_behind_queued", stats["queued"])
+    for field, help_text in (("batches", "Групповые коммиты"), ("items", "Записанные задания"),
+                             ("failed", "Задания с ошибкой")):
+        out.family(f"body_fit_write_behind_{field}_total", "counter", help_text)
+        out.sample(f"body_fit_write_behind_{field}_total", stats[field])
+
+def render_metrics(pools: Dict[str, Dict[str, Any]], caches: Dict[str, Dict[str, Any]],
+                   write_behind: Optional[Dict[str, Any]]) -> str:
+    """Все метрики процесса в текстовом формате Prometheus 0.0.4"""
+    out = _Exposition()
+    out.family("body_fit_profiling_enabled", "gauge", "Сбор метрик запросов включён")
+    out.sample("body_fit_profiling_enabled", int(_ENABLED))
+    out.family("body_fit_profiling_sample_ratio", "gauge", "Доля запросов с подробной трассировкой")
+    out.sample("body_fit_profiling_sample_ratio", _SAMPLE)
+    _request_metrics(out)
+    _pool_metrics(out, pools)
+    _cache_metrics(out, caches)
+    _write_behind_metrics(out, write_behind)
+    return out.render()
+
+if PROFILING_ENABLED:
+    configure(PROFILING_ENABLED, PROFILING_SAMPLE)
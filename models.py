@@ -6,6 +6,16 @@ from database.peewee_models import (
     Clients,
     TrainersWorkouts,
     AppointmentsWorkouts,
+    WorkoutSlots,
+    Waitlist,
+    ReportTrainerDaily,
+    ReportWorkoutTotals,
+    ReportStatusTotals,
+    ApiKeys,
+    TableVersions,
+    MODELS,
+    VERSIONED_TABLES,
+    create_version_triggers,
 )
 
 __all__ = [
@@ -16,6 +26,16 @@ __all__ = [
     "Clients",
     "TrainersWorkouts",
     "AppointmentsWorkouts",
+    "WorkoutSlots",
+    "Waitlist",
+    "ReportTrainerDaily",
+    "ReportWorkoutTotals",
+    "ReportStatusTotals",
+    "ApiKeys",
+    "TableVersions",
+    "MODELS",
+    "VERSIONED_TABLES",
+    "create_version_triggers",
 ]
 
 
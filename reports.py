@@ -0,0 +1,107 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from models import DB, ReportStatusTotals, ReportTrainerDaily, ReportWorkoutTotals
+
+# Счётчики по статусам: статус записи -> колонка агрегатной таблицы
+STATUS_COLUMNS = {
+    'Запланировано': 'planned',
+    'Проведено': 'done',
+    'Отменено': 'cancelled',
+}
+
+REPORT_TABLES = ('report_trainer_daily', 'report_workout_totals', 'report_status_totals')
+
+# День записи: дата занятия, а для записей без неё — дата создания
+_DAY = "date(COALESCE({row}.appointment_date, {row}.date))"
+
+def _counts(row: str, sign: int) -> str:
+    parts = [str(sign)] + [f"{sign} * ({row}.status = '{status}')" for status in STATUS_COLUMNS]
+    return ", ".join(parts)
+
+def _upsert(table: str, keys: List[str], key_values: List[str], row: str, sign: int, where: str = "1") -> str:
+    columns = ["total"] + list(STATUS_COLUMNS.values())
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+    return (f"INSERT INTO {table} ({', '.join(keys + columns)}) "
+            f"SELECT {', '.join(key_values)}, {_counts(row, sign)} WHERE {where} "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates};")
+
+def _apply(row: str, sign: int) -> str:
+    """Операторы, добавляющие (sign=1) или вычитающие (sign=-1) строку appointments из агрегатов"""
+    return " ".join([
+        _upsert("report_trainer_daily", ["trainer_id", "day"], [f"{row}.trener_id", _DAY.format(row=row)],
+                row, sign, where=f"{row}.trener_id IS NOT NULL AND {_DAY.format(row=row)} IS NOT NULL"),
+        _upsert("report_workout_totals", ["name_of_training_session"], [f"{row}.name_of_training_session"],
+                row, sign),
+        f"INSERT INTO report_status_totals (status, total) SELECT {row}.status, {sign} WHERE {row}.status IS NOT NULL "
+        f"ON CONFLICT (status) DO UPDATE SET total = total + excluded.total;",
+    ])
+
+REPORT_TRIGGERS = {
+    "appointments_report_insert": f"AFTER INSERT ON appointments BEGIN {_apply('NEW', 1)} END",
+    "appointments_report_delete": f"AFTER DELETE ON appointments BEGIN {_apply('OLD', -1)} END",
+    "appointments_report_update": (
+        "AFTER UPDATE OF status, trener_id, appointment_date, date, name_of_training_session ON appointments "
+        f"BEGIN {_apply('OLD', -1)} {_apply('NEW', 1)} END"),
+}
+
+def _rebuild_sql() -> List[str]:
+    counts = ", ".join(["COUNT(*)"] + [f"SUM(status = '{s}')" for s in STATUS_COLUMNS])
+    columns = ", ".join(["total"] + list(STATUS_COLUMNS.values()))
+    day = _DAY.format(row="appointments")
+    return [f"DELETE FROM {table}" for table in REPORT_TABLES] + [
+        f"INSERT INTO report_trainer_daily (trainer_id, day, {columns}) "
+        f"SELECT trener_id, {day}, {counts} FROM appointments "
+        f"WHERE trener_id IS NOT NULL AND {day} IS NOT NULL GROUP BY trener_id, {day}",
+        f"INSERT INTO report_workout_totals (name_of_training_session, {columns}) "
+        f"SELECT name_of_training_session, {counts} FROM appointments GROUP BY name_of_training_session",
+        "INSERT INTO report_status_totals (status, total) "
+        "SELECT status, COUNT(*) FROM appointments WHERE status IS NOT NULL GROUP BY status",
+    ]
+
+def rebuild_reports(db=DB) -> None:
+    """Полностью пересчитывает агрегаты по appointments (после загрузки дампа или в обход триггеров)"""
+    with db.atomic():
+        for sql in _rebuild_sql():
+            db.execute_sql(sql)
+
+def create_report_triggers(db=DB) -> None:
+    """Создаёт триггеры, обновляющие агрегаты в той же транзакции, что и запись.
+
+    При первом создании агрегаты заполняются по уже существующим записям.
+    """
+    existing = {name for (name,) in db.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'appointments'").fetchall()}
+    missing = [name for name in REPORT_TRIGGERS if name not in existing]
+    if not missing:
+        return
+    with db.atomic():
+        for name in missing:
+            db.execute_sql(f'CREATE TRIGGER IF NOT EXISTS "{name}" {REPORT_TRIGGERS[name]}')
+        rebuild_reports(db)
+
+def trainer_daily(start: date, end: date, trainer_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Загрузка тренеров по дням в [start, end] — чтение по первичному ключу (trainer_id, day)"""
+    query = (ReportTrainerDaily
+             .select()
+             .where((ReportTrainerDaily.day >= start) & (ReportTrainerDaily.day <= end)
+                    & (ReportTrainerDaily.total > 0)))
+    if trainer_id is not None:
+        query = query.where(ReportTrainerDaily.trainer_id == trainer_id)
+    return list(query.order_by(ReportTrainerDaily.trainer_id, ReportTrainerDaily.day).dicts())
+
+def workout_popularity(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    query = (ReportWorkoutTotals
+             .select()
+             .where(ReportWorkoutTotals.total > 0)
+             .order_by(ReportWorkoutTotals.total.desc(), ReportWorkoutTotals.name_of_training_session))
+    if limit is not None:
+        query = query.limit(limit)
+    return list(query.dicts())
+
+def status_breakdown() -> Dict[str, int]:
+    totals = {status: 0 for status in STATUS_COLUMNS}
+    for status, total in ReportStatusTotals.select(ReportStatusTotals.status, ReportStatusTotals.total).tuples():
+        if total:
+            totals[status] = total
+    return totals
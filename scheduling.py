@@ -0,0 +1,230 @@
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from peewee import DatabaseError
+from models import DB, Appointments, TableVersions, Workouts
+
+DEFAULT_DURATION_MINUTES = 60
+CANCELLED_STATUS = "Отменено"
+
+Interval = Tuple[datetime, datetime, int, Optional[str]]  # (начало, конец, id записи, тренировка)
+
+def local_naive(value: datetime) -> datetime:
+    """Время со смещением (2026-10-20T15:00:00+03:00) переводится в местное без смещения.
+
+    В базе время хранится без смещения в местном поясе; сравнение наивного datetime
+    с datetime со смещением вызывает TypeError.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Приводит значение appointment_date к местному datetime без смещения (None для пустых и некорректных)"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return local_naive(value)
+    try:
+        return local_naive(datetime.fromisoformat(str(value)))
+    except ValueError:
+        return None
+
+class TrainerSchedule:
+    """Занятые интервалы одного тренера, отсортированные по началу"""
+
+    def __init__(self):
+        self._starts: List[datetime] = []
+        self._intervals: List[Interval] = []
+        self._by_id: Dict[int, Interval] = {}
+        self._max_length = timedelta(0)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, start: datetime, end: datetime, appointment_id: int, session_name: Optional[str] = None) -> None:
+        self.remove(appointment_id)
+        interval = (start, end, appointment_id, session_name)
+        i = bisect_left(self._intervals, interval)
+        self._intervals.insert(i, interval)
+        self._starts.insert(i, start)
+        self._by_id[appointment_id] = interval
+        self._max_length = max(self._max_length, end - start)
+
+    def remove(self, appointment_id: int) -> None:
+        interval = self._by_id.pop(appointment_id, None)
+        if interval is None:
+            return
+        i = bisect_left(self._intervals, interval)
+        del self._intervals[i]
+        del self._starts[i]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Interval]:
+        """Интервалы, пересекающиеся с [start, end).
+
+        Пересечься может только интервал, начавшийся не раньше start минус самая
+        длинная тренировка, поэтому просматривается окно из двух бинарных поисков,
+        а не весь список.
+        """
+        lo = bisect_left(self._starts, start - self._max_length)
+        hi = bisect_left(self._starts, end)
+        return [iv for iv in self._intervals[lo:hi] if iv[1] > start]
+
+class ScheduleIndex:
+    """Индекс занятости тренеров в памяти процесса.
+
+    Интервал записи: от appointment_date до appointment_date + Workouts.duration_minutes
+    (по названию тренировки, по умолчанию 60 минут); отменённые записи не учитываются.
+    Индекс привязан к версии таблицы appointments из table_versions: если её изменил
+    кто-то другой (другой процесс, пакетная загрузка), индекс сбрасывается и строится
+    заново по требованию, по одному тренеру за раз.
+    """
+
+    def __init__(self, db=DB):
+        self.db = db
+        self._lock = threading.RLock()
+        self._trainers: Dict[int, TrainerSchedule] = {}
+        self._durations: Optional[Dict[str, int]] = None
+        self._version: Optional[int] = None
+        self.rebuilds = 0
+
+    def _current_version(self) -> Optional[int]:
+        rows = TableVersions.current(("appointments",))
+        return rows[0][1] if rows else None
+
+    def _ensure_fresh(self) -> None:
+        version = self._current_version()
+        if version is None or version != self._version:
+            self._trainers.clear()
+            self._durations = None
+            self._version = version
+
+    def _duration(self, session_name: Optional[str]) -> timedelta:
+        if self._durations is None:
+            try:
+                self._durations = {
+                    name: minutes
+                    for name, minutes in Workouts
+                    .select(Workouts.name_of_training_session, Workouts.duration_minutes)
+                    .order_by(Workouts.id.desc())
+                    .tuples()
+                    if minutes
+                }
+            except DatabaseError:
+                # Таблицы тренировок может не быть в базе API
+                self._durations = {}
+        return timedelta(minutes=self._durations.get(session_name, DEFAULT_DURATION_MINUTES))
+
+    def interval(self, appointment_date, session_name: Optional[str]) -> Optional[Tuple[datetime, datetime]]:
+        start = parse_datetime(appointment_date)
+        if start is None:
+            return None
+        return start, start + self._duration(session_name)
+
+    def _schedule(self, trainer_id: int) -> TrainerSchedule:
+        schedule = self._trainers.get(trainer_id)
+        if schedule is None:
+            schedule = TrainerSchedule()
+            query = (Appointments
+                     .select(Appointments.id, Appointments.appointment_date, Appointments.name_of_training_session)
+                     .where((Appointments.trener == trainer_id)
+                            & Appointments.appointment_date.is_null(False)
+                            & (Appointments.status != CANCELLED_STATUS))
+                     .tuples())
+            for appointment_id, appointment_date, session_name in query.iterator():
+                interval = self.interval(appointment_date, session_name)
+                if interval:
+                    schedule.add(interval[0], interval[1], appointment_id, session_name)
+            self._trainers[trainer_id] = schedule
+            self.rebuilds += 1
+        return schedule
+
+    def conflicts(self, trainer_id: int, start: datetime, end: datetime,
+                  exclude_id: Optional[int] = None) -> List[Interval]:
+        """Записи тренера, пересекающиеся с [start, end), кроме exclude_id"""
+        with self._lock:
+            self._ensure_fresh()
+            return [iv for iv in self._schedule(trainer_id).overlapping(start, end) if iv[2] != exclude_id]
+
+    def booking_conflicts(self, trainer_id: int, appointment_date, session_name: Optional[str],
+                          exclude_id: Optional[int] = None, group: bool = False) -> List[Interval]:
+        """Конфликты для записи на appointment_date с длительностью тренировки session_name.
+
+        Для групповой тренировки (group=True) записи на то же занятие в то же время
+        конфликтом не считаются: их число ограничивает capacity, а не расписание тренера.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            interval = self.interval(appointment_date, session_name)
+            if interval is None:
+                return []
+            conflicts = self.conflicts(trainer_id, interval[0], interval[1], exclude_id=exclude_id)
+            if group:
+                conflicts = [iv for iv in conflicts if (iv[0], iv[3]) != (interval[0], session_name)]
+            return conflicts
+
+    def record(self, appointment_id: int, trainer_id: Optional[int], appointment_date,
+               session_name: Optional[str], status: Optional[str] = None,
+               previous_trainer_id: Optional[int] = None) -> None:
+        """Переносит в индекс изменение одной записи, сделанное в текущей транзакции.
+
+        Вызывается после INSERT/UPDATE/DELETE одной строки appointments: версия таблицы
+        должна вырасти ровно на единицу, иначе между проверкой и записью таблицу менял
+        кто-то ещё, и индекс сбрасывается.
+        """
+        with self._lock:
+            version = self._current_version()
+            if self._version is None or version != self._version + 1:
+                self._trainers.clear()
+                self._durations = None
+                self._version = None
+                return
+            self._version = version
+            for tid in (previous_trainer_id, trainer_id):
+                if tid in self._trainers:
+                    self._trainers[tid].remove(appointment_id)
+            if trainer_id in self._trainers and status != CANCELLED_STATUS:
+                interval = self.interval(appointment_date, session_name)
+                if interval:
+                    self._trainers[trainer_id].add(interval[0], interval[1], appointment_id, session_name)
+
+    def forget(self, appointment_id: int, trainer_id: Optional[int]) -> None:
+        """Удаляет запись из индекса после DELETE"""
+        self.record(appointment_id, None, None, None, previous_trainer_id=trainer_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._trainers.clear()
+            self._durations = None
+            self._version = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "trainers": len(self._trainers),
+                "intervals": sum(len(s) for s in self._trainers.values()),
+                "rebuilds": self.rebuilds,
+            }
+
+def free_slots(busy: List[Interval], start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Свободные промежутки внутри [start, end) между занятыми интервалами"""
+    slots = []
+    cursor = start
+    for busy_start, busy_end, *_ in busy:
+        if busy_start > cursor:
+            slots.append((cursor, min(busy_start, end)))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        slots.append((cursor, end))
+    return slots
+
+schedule_index = ScheduleIndex()
+
+def booking_transaction():
+    """Транзакция для проверки конфликта и записи: BEGIN IMMEDIATE сразу берёт блокировку
+    записи, поэтому между проверкой и INSERT другой писатель вклиниться не может"""
+    return DB.atomic(lock_type="IMMEDIATE")
@@ -2,6 +2,7 @@ PRAGMA foreign_keys = OFF;
 BEGIN TRANSACTION;
 
 -- Удаление существующих таблиц (если есть)
+DROP TABLE IF EXISTS appointments_fts;
 DROP TABLE IF EXISTS appointments_workouts;
 DROP TABLE IF EXISTS trainers_workouts;
 DROP TABLE IF EXISTS appointments;
@@ -193,13 +194,14 @@ CREATE INDEX idx_trainers_last_name ON trainers(last_name);
 -- Ускоряет поиск клиентов по номеру телефона
 CREATE INDEX idx_clients_phone ON clients(phone);
 
--- Составной индекс для поиска записей по телефону и дате
--- Ускоряет поиск записей конкретного клиента на определенную дату
-CREATE INDEX idx_appointments_phone_date ON appointments(phone, appointment_date);
+-- Составной покрывающий индекс для поиска записей по телефону, дате и тренеру
+-- Ускоряет поиск записей конкретного клиента на определенную дату, а пакетная сверка
+-- по списку телефонов (id, дата, тренер) читает только индекс, не обращаясь к таблице
+CREATE INDEX idx_appointments_phone_date_trener ON appointments(phone, appointment_date, trener_id);
 
--- Составной индекс для поиска тренировок по уровню сложности и цене
--- Ускоряет фильтрацию тренировок по сложности и ценовому диапазону
-CREATE INDEX idx_workouts_difficulty_price ON workouts(difficulty_level, price);
+-- Составной индекс для поиска тренировок по уровню сложности и длительности
+-- Ускоряет фильтрацию тренировок по сложности и подбор занятий нужной длительности
+CREATE INDEX idx_workouts_difficulty_duration ON workouts(difficulty_level, duration_minutes);
 
 -- Индекс для поиска записей по статусу
 -- Ускоряет получение списка записей по статусу (запланировано, проведено, отменено)
@@ -209,5 +211,35 @@ CREATE INDEX idx_appointments_status ON appointments(status);
 -- Ускоряет поиск тренеров по их специализации
 CREATE INDEX idx_trainers_specialization ON trainers(specialization);
 
+-- Полнотекстовый индекс по комментарию и названию тренировки (FTS5)
+-- Заменяет поиск LIKE '%...%', который всегда сканирует всю таблицу appointments.
+-- unicode61 приводит кириллицу к нижнему регистру, «ё» заменяется на «е»,
+-- prefix ускоряет поиск по началу слова («йог» -> «йога», «йоге»)
+CREATE VIRTUAL TABLE appointments_fts USING fts5(
+    comment,
+    name_of_training_session,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+SELECT id, replace(replace(comment, 'ё', 'е'), 'Ё', 'Е'), replace(replace(name_of_training_session, 'ё', 'е'), 'Ё', 'Е') FROM appointments;
+
+-- Триггеры поддерживают индекс в актуальном состоянии
+CREATE TRIGGER appointments_fts_ai AFTER INSERT ON appointments BEGIN
+    INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+    VALUES (new.id, replace(replace(new.comment, 'ё', 'е'), 'Ё', 'Е'), replace(replace(new.name_of_training_session, 'ё', 'е'), 'Ё', 'Е'));
+END;
+
+CREATE TRIGGER appointments_fts_ad AFTER DELETE ON appointments BEGIN
+    DELETE FROM appointments_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER appointments_fts_au AFTER UPDATE OF comment, name_of_training_session ON appointments BEGIN
+    DELETE FROM appointments_fts WHERE rowid = old.id;
+    INSERT INTO appointments_fts (rowid, comment, name_of_training_session)
+    VALUES (new.id, replace(replace(new.comment, 'ё', 'е'), 'Ё', 'Е'), replace(replace(new.name_of_training_session, 'ё', 'е'), 'Ё', 'Е'));
+END;
+
 COMMIT;
 PRAGMA foreign_keys = ON;
\ No newline at end of file
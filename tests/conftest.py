@@ -0,0 +1,27 @@
+"""Общие фикстуры: приложение на копии шаблона базы (database/bootstrap.py)"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def db_path(tmp_path_factory) -> str:
+    from database import bootstrap
+    from models import DB
+
+    path = bootstrap.clone(str(tmp_path_factory.mktemp("db") / "body_fit.db"))
+    DB.init(path)
+    yield path
+    DB.writer.close_all()
+    DB.reader.close_all()
+
+@pytest.fixture(scope="session")
+def client(db_path):
+    from app import app
+    return app.test_client()
+
+@pytest.fixture
+def headers():
+    return {"api_key": "admin_secret_key_123"}
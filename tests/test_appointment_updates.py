@@ -0,0 +1,39 @@
+"""Изменение записи читает её под блокировкой записи и не отменяет чужую отмену"""
+import sqlite3
+
+from blueprints.appointments import routes
+
+def _appointment(**extra):
+    return dict({"first_name": "Павел", "last_name": "Гонкин", "phone": "+7(999)000-15-15",
+                 "name_of_training_session": "Бокс"}, **extra)
+
+def test_update_does_not_revive_cancelled_appointment(client, headers, db_path, monkeypatch):
+    created = client.post("/appointments", headers=headers, json=_appointment())
+    assert created.status_code == 201, created.get_json()
+    appointment_id = created.get_json()["id"]
+    original = routes.booking_transaction
+
+    def cancelled_first():
+        # Отмена, зафиксированная другим соединением между чтением запроса и блокировкой
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE appointments SET status = 'Отменено' WHERE id = ?", (appointment_id,))
+        conn.commit()
+        conn.close()
+        return original()
+
+    monkeypatch.setattr(routes, "booking_transaction", cancelled_first)
+    response = client.put(f"/appointments/{appointment_id}", headers=headers,
+                          json=_appointment(comment="Изменено"))
+    assert response.status_code == 200, response.get_json()
+    conn = sqlite3.connect(db_path)
+    try:
+        status, comment = conn.execute("SELECT status, comment FROM appointments WHERE id = ?",
+                                       (appointment_id,)).fetchone()
+    finally:
+        conn.close()
+    assert (status, comment) == ("Отменено", "Изменено")
+
+def test_missing_appointment(client, headers):
+    assert client.put("/appointments/999999", headers=headers, json=_appointment()).status_code == 404
+    assert client.post("/appointments/999999/cancel", headers=headers).status_code == 404
+    assert client.delete("/appointments/999999", headers=headers).status_code == 404
@@ -0,0 +1,53 @@
+"""Список записей читается постоянным числом запросов, без запроса к trainers на каждую запись"""
+import logging
+import sqlite3
+
+import pytest
+
+ROWS = 50
+
+class _QueryCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.statements = []
+
+    def emit(self, record):
+        self.statements.append(record.msg[0])
+
+@pytest.fixture(scope="module")
+def appointments(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        trainers = [row[0] for row in conn.execute("SELECT id FROM trainers ORDER BY id")]
+        conn.executemany("""
+            INSERT INTO appointments (last_name, first_name, phone, trener_id, name_of_training_session)
+            VALUES ('Запросов', 'Счётчик', ?, ?, 'Йога для начинающих')
+        """, [(f"+7(999)500-{i:02d}-00", trainers[i % len(trainers)]) for i in range(ROWS)])
+        conn.commit()
+    finally:
+        conn.close()
+
+def _count_queries(client, headers, limit: int):
+    logger = logging.getLogger("peewee")
+    counter = _QueryCounter()
+    level = logger.level
+    logger.addHandler(counter)
+    logger.setLevel(logging.DEBUG)
+    try:
+        response = client.get(f"/appointments?limit={limit}", headers=headers)
+    finally:
+        logger.removeHandler(counter)
+        logger.setLevel(level)
+    assert response.status_code == 200, response.get_json()
+    rows = response.get_json()["appointments"]
+    assert len(rows) == limit
+    assert all(row["trainer"] for row in rows if row["client_phone"].startswith("+7(999)500-"))
+    return counter.statements
+
+def test_appointments_query_count_does_not_grow(client, headers, appointments):
+    # Первый запрос загружает ключи API в кэш — его запросы не сравниваем
+    _count_queries(client, headers, 5)
+    few = _count_queries(client, headers, 5)
+    many = _count_queries(client, headers, ROWS)
+    assert len(few) == len(many), many
+    assert not any("FROM \"trainers\"" in sql and "JOIN" not in sql for sql in many)
@@ -0,0 +1,55 @@
+"""Условный GET: 304 только для того же представления, что получил клиент"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from blueprints.appointments import routes as appointment_routes
+from blueprints.trainers import routes as trainer_routes
+
+def _revalidate(client, headers, url, moved, monkeypatch, module, name):
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200, first.get_json()
+    assert first.headers.get("Last-Modified") is None
+    etag = first.headers["ETag"]
+    assert client.get(url, headers=dict(headers, **{"If-None-Match": etag})).status_code == 304
+    # Период по умолчанию сдвинулся (прошла минута или сутки) — прежний ETag уже не подходит
+    monkeypatch.setattr(module, name, lambda: moved)
+    return client.get(url, headers=dict(headers, **{"If-None-Match": etag}))
+
+def test_availability_default_window_in_etag(client, headers, monkeypatch):
+    moved = trainer_routes._availability_start() + timedelta(minutes=1)
+    response = _revalidate(client, headers, "/trainers/1/availability", moved, monkeypatch,
+                           trainer_routes, "_availability_start")
+    assert response.status_code == 200
+    assert response.get_json()["from"] == moved.isoformat()
+
+def test_capacity_default_window_in_etag(client, headers, monkeypatch):
+    moved = appointment_routes._capacity_start() + timedelta(days=1)
+    response = _revalidate(client, headers, "/appointments/capacity", moved, monkeypatch,
+                           appointment_routes, "_capacity_start")
+    assert response.status_code == 200
+
+def _set_updated_at(db_path, seconds_ago: int) -> str:
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("UPDATE table_versions SET updated_at = datetime('now', ?) WHERE table_name = 'trainers'",
+                     (f"{-seconds_ago} seconds",))
+        conn.commit()
+        value = conn.execute("SELECT updated_at FROM table_versions WHERE table_name = 'trainers'").fetchone()[0]
+    finally:
+        conn.close()
+    return format_datetime(datetime.fromisoformat(value).replace(tzinfo=timezone.utc), usegmt=True)
+
+def test_if_modified_since_within_the_write_second(client, headers, db_path):
+    # Секунда последней записи ещё не прошла (здесь — в будущем): в ней возможна
+    # ещё одна запись, поэтому Last-Modified не отдаётся, а If-Modified-Since не даёт 304
+    modified = _set_updated_at(db_path, -5)
+    response = client.get("/trainers", headers=dict(headers, **{"If-Modified-Since": modified}))
+    assert response.status_code == 200
+    assert response.headers.get("Last-Modified") is None
+
+def test_if_modified_since_after_the_write_second(client, headers, db_path):
+    modified = _set_updated_at(db_path, 10)
+    assert client.get("/trainers", headers=headers).headers["Last-Modified"] == modified
+    response = client.get("/trainers", headers=dict(headers, **{"If-Modified-Since": modified}))
+    assert response.status_code == 304
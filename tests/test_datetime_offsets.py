@@ -0,0 +1,39 @@
+"""Время записи со смещением UTC приводится к местному без смещения"""
+from datetime import datetime
+
+from scheduling import parse_datetime
+
+OFFSET_DATE = "2031-03-10T15:00:00+03:00"
+
+def _local(value: str) -> datetime:
+    return datetime.fromisoformat(value).astimezone().replace(tzinfo=None)
+
+def test_parse_datetime_drops_offset():
+    parsed = parse_datetime(OFFSET_DATE)
+    assert parsed.tzinfo is None
+    assert parsed == _local(OFFSET_DATE)
+    assert parse_datetime("2031-03-10T15:00:00") == datetime(2031, 3, 10, 15, 0)
+
+def _appointment(trainer_id):
+    return {"first_name": "Ольга", "last_name": "Смещение", "phone": "+7(999)000-31-03",
+            "name_of_training_session": "Пилатес", "trainer_id": trainer_id, "appointment_date": OFFSET_DATE}
+
+def test_create_appointment_with_offset_and_trainer(client, headers):
+    response = client.post("/appointments", headers=headers, json=_appointment(2))
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["appointment_date"] == _local(OFFSET_DATE).isoformat()
+    stored = client.get(f"/appointments/{response.get_json()['id']}", headers=headers).get_json()["appointment"]
+    assert stored["appointment_date"] == _local(OFFSET_DATE).isoformat()
+    # Другая тренировка у того же тренера в то же местное время — конфликт, а не 500
+    response = client.post("/appointments", headers=headers,
+                           json=dict(_appointment(2), name_of_training_session="Кроссфит",
+                                     appointment_date="2031-03-10T12:00:00+00:00"))
+    assert response.status_code == 409, response.get_json()
+
+def test_create_appointment_with_offset_without_trainer(client, headers):
+    response = client.post("/appointments", headers=headers,
+                           json=dict(_appointment(None), appointment_date="2031-03-11T09:30:00+05:00"))
+    assert response.status_code == 201, response.get_json()
+    stored = client.get(f"/appointments/{response.get_json()['id']}", headers=headers).get_json()["appointment"]
+    # Без тренера значение тоже хранится без смещения и читается как datetime, а не строка
+    assert stored["appointment_date"] == _local("2031-03-11T09:30:00+05:00").isoformat()
@@ -0,0 +1,23 @@
+"""Параметр fields: повторы не влияют на ответ, служебные колонки не попадают в него"""
+
+def test_duplicate_fields_do_not_leak_columns(client, headers):
+    response = client.get("/trainers?fields=first_name,first_name", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    trainers = response.get_json()["trainers"]
+    assert trainers and all(set(trainer) == {"first_name"} for trainer in trainers)
+
+def test_duplicate_fields_in_appointments(client, headers):
+    response = client.get("/appointments?fields=client_phone,client_phone", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    appointments = response.get_json()["appointments"]
+    assert appointments and all(set(a) == {"client_phone"} for a in appointments)
+
+def test_trainer_row_projection_drops_service_columns():
+    from utils import trainer_row_to_dict
+    # В строке выборки есть id и поле сортировки сверх запрошенных полей
+    row = {"first_name": "Анна", "last_name": "Иванова", "id": 7}
+    assert trainer_row_to_dict(row, ["first_name", "last_name"]) == {"first_name": "Анна", "last_name": "Иванова"}
+    assert trainer_row_to_dict(row, ["first_name"]) == {"first_name": "Анна"}
+    # Число колонок совпадает с числом полей, но колонки другие
+    assert trainer_row_to_dict({"first_name": "Анна", "id": 7}, ["first_name", "first_name"]) == {"first_name": "Анна"}
+    assert trainer_row_to_dict(row) is row
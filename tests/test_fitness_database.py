@@ -0,0 +1,39 @@
+"""Слой sqlite3: create_appointments разрешает имена под блокировкой записи"""
+import sqlite3
+
+from database import bootstrap, fitness_database
+
+TRAINER = "Иванов Александр Петрович"
+
+def test_trainer_deleted_concurrently_is_not_referenced(tmp_path, monkeypatch):
+    path = bootstrap.clone(str(tmp_path / "fitness.db"))
+    conn = fitness_database.connect(path)
+    original = fitness_database.NameCache.ensure_fresh
+    deleted = []
+
+    def ensure_fresh_then_delete(self, connection):
+        original(self, connection)
+        # Другой процесс удаляет тренера сразу после чтения кэша имён
+        other = sqlite3.connect(path, timeout=0)
+        try:
+            other.execute("DELETE FROM trainers WHERE last_name = 'Иванов' AND first_name = 'Александр'")
+            other.commit()
+            deleted.append(True)
+        except sqlite3.OperationalError:
+            pass  # блокировка записи уже взята
+        finally:
+            other.close()
+
+    monkeypatch.setattr(fitness_database.NameCache, "ensure_fresh", ensure_fresh_then_delete)
+    try:
+        ids = fitness_database.create_appointments(conn, [{
+            "client_name": "Гонкина Мария", "client_phone": "+7(999)000-13-13",
+            "trainer_name": TRAINER, "workouts_list": ["Йога для начинающих"]}])
+        orphans = conn.execute("""
+            SELECT a.id FROM appointments a LEFT JOIN trainers t ON t.id = a.trener_id
+            WHERE a.trener_id IS NOT NULL AND t.id IS NULL
+        """).fetchall()
+    finally:
+        conn.close()
+    assert orphans == []
+    assert deleted or ids[0] > 0
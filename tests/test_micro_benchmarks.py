@@ -0,0 +1,51 @@
+"""
+Микробенчмарки benchmarks/micro.py через pytest-benchmark.
+
+Замеры идут на отдельной копии базы: create_appointment пишет в неё. По умолчанию это
+копия шаблона (database/bootstrap.py); BODY_FIT_BENCH_SCALE=10k|1m|10m берёт синтетическую
+базу benchmarks/datagen.py. Запуск: python -m pytest tests/test_micro_benchmarks.py --benchmark-only
+"""
+import os
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+SQLITE_CASES = ("find_appointment_by_phone", "find_appointments_by_phones_100", "find_appointment_by_comment",
+                "search_appointments_fts", "create_appointment")
+SERIALIZER_CASES = ("appointments_to_dict", "appointments_to_dict_x50", "trainers_to_dict",
+                    "appointment_row_to_dict_x50", "trainer_row_to_dict_x50", "json_dumps_page_50")
+
+@pytest.fixture(scope="module")
+def cases(db_path, tmp_path_factory):
+    from benchmarks import datagen, micro
+    from database import bootstrap
+    from database.fitness_database import connect
+    from models import DB
+
+    scale = os.environ.get("BODY_FIT_BENCH_SCALE")
+    if scale:
+        path = datagen.working_copy(scale, datagen.DEFAULT_SEED, str(tmp_path_factory.mktemp("bench")))
+    else:
+        path = bootstrap.clone(str(tmp_path_factory.mktemp("bench") / "body_fit.db"))
+    DB.init(path)
+    conn = connect(path)
+    DB.connect(reuse_if_open=True)
+    try:
+        yield {**micro._sqlite_cases(conn, random.Random(datagen.DEFAULT_SEED)), **micro._serializer_cases()}
+    finally:
+        DB.close()
+        conn.close()
+        DB.init(db_path)
+
+def test_all_cases_benchmarked(cases):
+    assert set(cases) == set(SQLITE_CASES + SERIALIZER_CASES)
+
+@pytest.mark.parametrize("name", SQLITE_CASES)
+def test_sqlite_layer(benchmark, cases, name):
+    benchmark(cases[name])
+
+@pytest.mark.parametrize("name", SERIALIZER_CASES)
+def test_serializers(benchmark, cases, name):
+    benchmark(cases[name])
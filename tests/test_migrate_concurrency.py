@@ -0,0 +1,31 @@
+"""Процессы, одновременно запускающие миграции, не применяют и не записывают одну миграцию дважды"""
+import os
+import sqlite3
+import subprocess
+import sys
+
+from database import bootstrap
+from database.migrate import MIGRATIONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = "import sys; from database.peewee_models import DB; from database.migrate import migrate; " \
+         "DB.init(sys.argv[1]); migrate(DB)"
+
+def test_concurrent_migrate(tmp_path):
+    path = bootstrap.clone(str(tmp_path / "body_fit.db"))
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM schema_version")
+    conn.commit()
+    conn.close()
+    processes = [subprocess.Popen([sys.executable, "-c", SCRIPT, path], cwd=ROOT,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                 for _ in range(4)]
+    for process in processes:
+        _, stderr = process.communicate(timeout=60)
+        assert process.returncode == 0, stderr
+    conn = sqlite3.connect(path)
+    try:
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    finally:
+        conn.close()
+    assert versions == sorted(MIGRATIONS)
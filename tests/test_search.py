@@ -0,0 +1,44 @@
+"""Полнотекстовый поиск записей: формат дат и ошибки поиска"""
+import sqlite3
+
+from database import fitness_database
+from blueprints.appointments import routes
+
+def test_search_returns_iso_dates(client, headers):
+    response = client.post("/appointments", headers=headers,
+                           json={"first_name": "Ирина", "last_name": "Поисковая", "phone": "+7(999)000-31-12",
+                                 "name_of_training_session": "Стретчинг", "comment": "Проверка формата даты",
+                                 "appointment_date": "2031-03-12T10:00:00"})
+    assert response.status_code == 201, response.get_json()
+    found = client.get("/appointments/search?q=формата", headers=headers).get_json()["appointments"]
+    dates = [a["appointment_date"] for a in found if a["id"] == response.get_json()["id"]]
+    assert dates == ["2031-03-12T10:00:00"]
+
+def test_search_malformed_match_is_bad_request(client, headers, monkeypatch):
+    # Строка передаётся в MATCH как есть, без экранирования слов
+    monkeypatch.setattr(fitness_database, "build_match_query", lambda text: text)
+    response = client.get('/appointments/search?q="незакрытая', headers=headers)
+    assert response.status_code == 400
+    assert "Некорректный поисковый запрос" in response.get_json()["error"]
+
+def test_search_database_error_is_server_error(client, headers, monkeypatch):
+    def missing_index(conn, text, limit):
+        raise sqlite3.OperationalError("no such table: appointments_fts")
+
+    monkeypatch.setattr(routes, "query_appointments_fts", missing_index)
+    response = client.get("/appointments/search?q=йога", headers=headers)
+    assert response.status_code == 500
+    assert "appointments_fts" in response.get_json()["error"]
+
+def test_search_without_index_on_sqlite3_layer(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "empty.db"))
+    try:
+        assert fitness_database.search_appointments(conn, "йога") == []
+        try:
+            fitness_database.query_appointments_fts(conn, "йога")
+        except sqlite3.OperationalError as e:
+            assert "appointments_fts" in str(e)
+        else:
+            raise AssertionError("ожидалась ошибка базы данных")
+    finally:
+        conn.close()
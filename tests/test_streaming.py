@@ -0,0 +1,38 @@
+"""Потоковая выдача с limit возвращает курсор следующей страницы, как и обычная"""
+import json
+
+def _pages(client, headers, stream=False):
+    ids, cursor = [], None
+    while True:
+        url = "/appointments?limit=2&sort_by=id" + ("&stream=1" if stream else "")
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        if response.mimetype == "application/x-ndjson":
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            rows, cursor = lines[:-1], lines[-1]["next_cursor"]
+        else:
+            body = response.get_json()
+            rows, cursor = body["appointments"], body["next_cursor"]
+        assert len(rows) <= 2
+        ids.extend(row["id"] for row in rows)
+        if cursor is None:
+            return ids
+
+def test_stream_pages_match_regular_pages(client, headers):
+    regular = _pages(client, headers)
+    assert len(regular) > 2
+    streamed = _pages(client, headers, stream=True)
+    assert streamed == regular
+
+def test_ndjson_pages_match_regular_pages(client, headers):
+    regular = _pages(client, headers)
+    ndjson = _pages(client, dict(headers, Accept="application/x-ndjson"))
+    assert ndjson == regular
+
+def test_stream_without_limit_has_no_cursor(client, headers):
+    response = client.get("/appointments?stream=1", headers=headers)
+    assert response.get_json()["next_cursor"] is None
+    response = client.get("/appointments", headers=dict(headers, Accept="application/x-ndjson"))
+    assert all("id" in json.loads(line) for line in response.get_data(as_text=True).splitlines())
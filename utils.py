@@ -1,6 +1,36 @@
-from typing import Any, Dict, Tuple
+import base64
+import json
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from flask import Response
+from peewee import JOIN
 from models import Trainers, Appointments
+from instrumentation import timed
 
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё используется стандартный json
+    orjson = None
+
+JSON_MIMETYPE = "application/json; charset=utf-8"
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+@timed("serialize")
+def json_dumps(data: Any) -> bytes:
+    # Даты и время кодируются самим энкодером в ISO 8601, без ручного isoformat() в сериализаторах
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, check_circular=False, separators=(",", ":"),
+                      default=_json_default).encode("utf-8")
+
+def json_response(data: Any, status: int = 200) -> Response:
+    return Response(json_dumps(data), status=status, mimetype=JSON_MIMETYPE)
+
+@timed("serialize")
 def trainers_to_dict(trainer: Trainers) -> Dict[str, Any]:
     return {
         "id": trainer.id,
@@ -12,9 +42,10 @@ def trainers_to_dict(trainer: Trainers) -> Dict[str, Any]:
         "specialization": trainer.specialization,
         "experience_years": trainer.experience_years,
         "name_of_training_session": trainer.name_of_training_session,
-        "created_at": trainer.created_at.isoformat() if trainer.created_at else None,
+        "created_at": trainer.created_at,
     }
 
+@timed("serialize")
 def appointments_to_dict(appointment: Appointments) -> Dict[str, Any]:
     trainer_info = None
     if appointment.trener:
@@ -28,14 +59,223 @@ def appointments_to_dict(appointment: Appointments) -> Dict[str, Any]:
         "id": appointment.id,
         "client_name": f"{appointment.last_name} {appointment.first_name}",
         "client_phone": appointment.phone,
-        "date": appointment.date.isoformat() if appointment.date else None,
-        "appointment_date": appointment.appointment_date.isoformat() if appointment.appointment_date else None,
+        "date": appointment.date,
+        "appointment_date": appointment.appointment_date,
         "name_of_training_session": appointment.name_of_training_session,
         "comment": appointment.comment,
         "trainer": trainer_info,
-        "created_at": appointment.created_at.isoformat() if appointment.created_at else None,
+        "created_at": appointment.created_at,
+    }
+
+# Поля ответа -> колонки, которые нужно выбрать для их сериализации
+TRAINER_COLUMNS = {
+    "id": (Trainers.id,),
+    "first_name": (Trainers.first_name,),
+    "middle_name": (Trainers.middle_name,),
+    "last_name": (Trainers.last_name,),
+    "phone": (Trainers.phone,),
+    "email": (Trainers.email,),
+    "specialization": (Trainers.specialization,),
+    "experience_years": (Trainers.experience_years,),
+    "name_of_training_session": (Trainers.name_of_training_session,),
+    "created_at": (Trainers.created_at,),
+}
+
+APPOINTMENT_COLUMNS = {
+    "id": (Appointments.id,),
+    "client_name": (Appointments.last_name, Appointments.first_name),
+    "client_phone": (Appointments.phone,),
+    "date": (Appointments.date,),
+    "appointment_date": (Appointments.appointment_date,),
+    "name_of_training_session": (Appointments.name_of_training_session,),
+    "comment": (Appointments.comment,),
+    "trainer": (
+        Trainers.id.alias("trainer_id"),
+        Trainers.first_name.alias("trainer_first_name"),
+        Trainers.last_name.alias("trainer_last_name"),
+        Trainers.middle_name.alias("trainer_middle_name"),
+    ),
+    "created_at": (Appointments.created_at,),
+}
+
+MAX_PAGE_SIZE = 1000
+
+def _trainer_info(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if row["trainer_id"] is None:
+        return None
+    return {
+        "id": row["trainer_id"],
+        "first_name": row["trainer_first_name"],
+        "last_name": row["trainer_last_name"],
+        "middle_name": row["trainer_middle_name"],
     }
 
+_APPOINTMENT_SERIALIZERS = {
+    "id": lambda row: row["id"],
+    "client_name": lambda row: f"{row['last_name']} {row['first_name']}",
+    "client_phone": lambda row: row["phone"],
+    "date": lambda row: row["date"],
+    "appointment_date": lambda row: row["appointment_date"],
+    "name_of_training_session": lambda row: row["name_of_training_session"],
+    "comment": lambda row: row["comment"],
+    "trainer": _trainer_info,
+    "created_at": lambda row: row["created_at"],
+}
+
+def _projection(columns: Dict[str, tuple], fields: Optional[List[str]], extra: tuple = ()) -> list:
+    # Собираем колонки без повторов; peewee перегружает == у полей,
+    # поэтому дубликаты отсекаются по имени колонки в результате
+    selected = {}
+    for name in (fields or columns):
+        for node in columns[name]:
+            selected.setdefault(_column_key(node), node)
+    for node in extra:
+        selected.setdefault(_column_key(node), node)
+    return list(selected.values())
+
+def _column_key(node) -> str:
+    return node._alias if node.is_alias() else node.name
+
+def select_trainers(fields: Optional[List[str]] = None, extra: tuple = ()):
+    return Trainers.select(*_projection(TRAINER_COLUMNS, fields, extra)).dicts()
+
+def select_appointments(fields: Optional[List[str]] = None, extra: tuple = ()):
+    # Один LEFT JOIN вместо отдельного запроса к trainers на каждую запись;
+    # строки возвращаются словарями, без создания экземпляров моделей.
+    # Если поле "trainer" не запрошено, JOIN не выполняется вовсе
+    query = Appointments.select(*_projection(APPOINTMENT_COLUMNS, fields, extra))
+    if fields is None or "trainer" in fields:
+        query = query.join(Trainers, JOIN.LEFT_OUTER, on=(Appointments.trener == Trainers.id))
+    return query.dicts()
+
+@timed("serialize")
+def trainer_row_to_dict(row: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    # Колонки тренера совпадают с полями ответа: полная строка отдаётся без копирования,
+    # при выборе полей служебные колонки (id и поле сортировки) отбрасываются
+    if fields is None:
+        return row
+    return {name: row[name] for name in TRAINER_COLUMNS if name in fields}
+
+@timed("serialize")
+def appointment_row_to_dict(row: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {name: fn(row) for name, fn in _APPOINTMENT_SERIALIZERS.items() if fields is None or name in fields}
+
+def parse_fields(raw: Optional[str], allowed: Dict[str, tuple]) -> Optional[List[str]]:
+    if not raw:
+        return None
+    # Повторы отбрасываются с сохранением порядка
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+def parse_limit(raw: Optional[str]) -> Optional[int]:
+    if raw is None or raw == "":
+        return None
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("Параметр 'limit' должен быть целым числом")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"Параметр 'limit' должен быть от 1 до {MAX_PAGE_SIZE}")
+    return limit
+
+def encode_cursor(value: Any, row_id: int) -> str:
+    payload = json.dumps([value, row_id], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[Any, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return value, int(row_id)
+    except Exception:
+        raise ValueError("Некорректный параметр 'cursor'")
+
+def keyset_query(query, field, id_field, direction: str, cursor: Optional[str]):
+    """Упорядочивает выборку по ключу (field, id) и продолжает её с позиции курсора.
+
+    NULL в SQLite сортируются первыми при ASC и последними при DESC, поэтому
+    условие продолжения учитывает их отдельно.
+    """
+    desc = direction == "desc"
+    same_field = field is id_field
+    if same_field:
+        query = query.order_by(id_field.desc() if desc else id_field)
+    else:
+        query = query.order_by(*((field.desc(), id_field.desc()) if desc else (field, id_field)))
+    if not cursor:
+        return query
+    value, last_id = decode_cursor(cursor)
+    if same_field:
+        cond = (id_field < last_id) if desc else (id_field > last_id)
+    elif desc:
+        if value is None:
+            cond = field.is_null() & (id_field < last_id)
+        else:
+            cond = (field < value) | ((field == value) & (id_field < last_id)) | field.is_null()
+    else:
+        if value is None:
+            cond = (field.is_null() & (id_field > last_id)) | field.is_null(False)
+        else:
+            cond = (field > value) | ((field == value) & (id_field > last_id))
+    return query.where(cond)
+
+def keyset_paginate(query, field, id_field, direction: str, cursor: Optional[str], limit: Optional[int]):
+    """Постраничная выборка без OFFSET.
+
+    Возвращает список строк и курсор следующей страницы (None, если страниц больше нет).
+    """
+    query = keyset_query(query, field, id_field, direction, cursor)
+    if limit is None:
+        return list(query), None
+    rows = list(query.limit(limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[field.name], last[id_field.name])
+
+class KeysetStream:
+    """Строки keyset_query, отдаваемые по мере чтения: не больше limit, после чего
+    next_cursor — курсор следующей страницы (None, если страниц больше нет).
+    Выборка должна читать limit + 1 строк: лишняя строка только показывает, что страница не последняя."""
+
+    def __init__(self, rows, field, id_field, limit: Optional[int]):
+        self.rows = rows
+        self.field = field
+        self.id_field = id_field
+        self.limit = limit
+        self.next_cursor: Optional[str] = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        last = None
+        for count, row in enumerate(self.rows):
+            if self.limit is not None and count == self.limit:
+                self.next_cursor = encode_cursor(last[self.field.name], last[self.id_field.name])
+                return
+            last = row
+            yield row
+
+def ndjson_stream(rows, serialize: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Iterator[bytes]:
+    # По одной строке JSON на запись, без накопления результата в памяти;
+    # у страницы с limit последняя строка — {"next_cursor": ...}
+    for row in rows:
+        yield json_dumps(serialize(row)) + b"\n"
+    if isinstance(rows, KeysetStream) and rows.limit is not None:
+        yield json_dumps({"next_cursor": rows.next_cursor}) + b"\n"
+
+def json_array_stream(key: str, rows, serialize: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Iterator[bytes]:
+    # Тот же документ, что и при обычном ответе ({key: [...], "next_cursor": ...}),
+    # но отдаётся частями по мере чтения курсора; курсор известен после последней строки
+    yield b'{"%s":[' % key.encode("utf-8")
+    separator = b""
+    for row in rows:
+        yield separator + json_dumps(serialize(row))
+        separator = b","
+    yield b'],"next_cursor":' + json_dumps(getattr(rows, "next_cursor", None)) + b"}"
+
 def validate_trainers_data(data: Dict[str, Any]) -> Tuple[bool, str]:
     required_fields = ["first_name", "last_name", "middle_name", "name_of_training_session"]
     for field in required_fields:
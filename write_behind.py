@@ -0,0 +1,180 @@
+"""
+Отложенная запись (write-behind) с групповыми коммитами.
+
+Обработчики кладут проверенную запись в очередь процесса, а отдельный поток-писатель
+выбирает из неё до WRITE_BEHIND_BATCH заданий — всё, что накопилось за время предыдущего
+коммита, плюс пришедшее за WRITE_BEHIND_WAIT_MS. По умолчанию ожидания нет: на быстром
+диске оно только добавляет задержку, а на медленном пачки и так растут за время fsync.
+Задания пачки выполняются в одной транзакции BEGIN IMMEDIATE, каждое — в своей точке
+сохранения, так что ошибка одного не откатывает остальные. Вместо коммита (и fsync)
+на запрос получается один коммит на пачку.
+
+Режимы (BODY_FIT_WRITE_BEHIND):
+  off     — очередь не используется, каждый запрос коммитит сам (по умолчанию);
+  commit  — запрос ждёт коммита своей пачки: ответ означает, что запись сохранена;
+            не дождавшись за WRITE_BEHIND_TIMEOUT секунд, он получает 503 и номер заявки;
+  enqueue — запрос получает 202 и номер заявки сразу после постановки в очередь;
+            результат доступен по номеру, но при падении процесса очередь теряется.
+"""
+import atexit
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from models import DB
+
+MODES = ("off", "commit", "enqueue")
+WRITE_BEHIND_MODE = os.environ.get("BODY_FIT_WRITE_BEHIND", "off")
+WRITE_BEHIND_BATCH = int(os.environ.get("BODY_FIT_WRITE_BEHIND_BATCH", 200))
+WRITE_BEHIND_WAIT_MS = float(os.environ.get("BODY_FIT_WRITE_BEHIND_WAIT_MS", 0))
+WRITE_BEHIND_MAX_QUEUE = int(os.environ.get("BODY_FIT_WRITE_BEHIND_MAX_QUEUE", 10000))
+# Сколько секунд запрос в режиме commit ждёт коммита своей пачки
+WRITE_BEHIND_TIMEOUT = float(os.environ.get("BODY_FIT_WRITE_BEHIND_TIMEOUT", 30))
+# Сколько последних результатов хранится для GET по номеру заявки
+WRITE_BEHIND_RESULTS = 10000
+if WRITE_BEHIND_MODE not in MODES:
+    raise ValueError(f"Неизвестный режим отложенной записи '{WRITE_BEHIND_MODE}', допустимые: {', '.join(MODES)}")
+
+class QueueFull(Exception):
+    pass
+
+class WriteBehindQueue:
+    def __init__(self, batch_size: int = WRITE_BEHIND_BATCH, wait_ms: float = WRITE_BEHIND_WAIT_MS,
+                 max_queue: int = WRITE_BEHIND_MAX_QUEUE, db=DB):
+        self.batch_size = batch_size
+        self.wait = wait_ms / 1000
+        self.db = db
+        self._queue: "queue.Queue[Optional[Tuple[int, Callable[[], Any], Future]]]" = queue.Queue(maxsize=max_queue)
+        self._tickets = itertools.count(1)
+        self._results: "OrderedDict[int, Future]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+        self.max_batch = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[[], Any]) -> Tuple[int, Future]:
+        """Ставит задание в очередь; fn выполняется в транзакции потока-писателя"""
+        future: Future = Future()
+        ticket = next(self._tickets)
+        try:
+            self._queue.put_nowait((ticket, fn, future))
+        except queue.Full:
+            raise QueueFull("Очередь записи переполнена, повторите запрос позже")
+        with self._results_lock:
+            self._results[ticket] = future
+            while len(self._results) > WRITE_BEHIND_RESULTS:
+                self._results.popitem(last=False)
+        return ticket, future
+
+    def result(self, ticket: int) -> Optional[Future]:
+        with self._results_lock:
+            return self._results.get(ticket)
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # остановка после этой пачки
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._commit(self._collect(first))
+
+    def _commit(self, batch) -> None:
+        results = []
+        self.db.use_writer()
+        try:
+            # Соединение писателя берётся на одну пачку, чтобы PUT/DELETE не ждали очередь
+            with self.db.connection_context():
+                with self.db.atomic(lock_type="IMMEDIATE"):
+                    for _, fn, future in batch:
+                        try:
+                            with self.db.atomic():
+                                results.append((future, fn(), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+        except Exception as e:
+            # Коммит пачки не удался: ни одно задание не сохранено
+            for _, _, future in batch:
+                future.set_exception(e)
+            with self._stats_lock:
+                self.failed += len(batch)
+            return
+        failed = 0
+        for future, value, error in results:
+            if error is None:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(error)
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.failed += failed
+            self.max_batch = max(self.max_batch, len(batch))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Дописывает уже поставленные задания и останавливает поток"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "failed": self.failed,
+                "max_batch": self.max_batch,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0,
+            }
+
+_QUEUE: Optional[WriteBehindQueue] = None
+_MODE = "off"
+
+def configure(mode: str = WRITE_BEHIND_MODE, **kwargs) -> Optional[WriteBehindQueue]:
+    """Включает режим отложенной записи (или выключает при mode='off'), дописав старую очередь"""
+    global _QUEUE, _MODE
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим отложенной записи '{mode}', допустимые: {', '.join(MODES)}")
+    if _QUEUE is not None:
+        _QUEUE.close()
+    _MODE = mode
+    _QUEUE = WriteBehindQueue(**kwargs) if mode != "off" else None
+    return _QUEUE
+
+def mode() -> str:
+    return _MODE
+
+def get_queue() -> Optional[WriteBehindQueue]:
+    return _QUEUE
+
+@atexit.register
+def _flush() -> None:
+    if _QUEUE is not None:
+        _QUEUE.close(timeout=30)
+
+if WRITE_BEHIND_MODE != "off":
+    configure(WRITE_BEHIND_MODE)